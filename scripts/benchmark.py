@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Verifier Benchmark Suite
+Generates synthetic README corpora and measures how parsing, badge updates
+and per-step runner overhead scale in scripts/verify-readme.py and
+scripts/verify-readme.js, plus what an isolated workspace clone costs and
+how long verify-readme.py takes from launch to its first step. Every measurement runs in a fresh child process
+with a timeout, so a pathological parser shows up as a timeout instead of
+hanging the suite. Results are saved as JSON for comparison across commits.
+
+Usage:
+    python scripts/benchmark.py
+    python scripts/benchmark.py --sizes 10,1000 --implementations python
+    python scripts/benchmark.py --compare old-benchmark.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_OUTPUT = 'benchmark-results.json'
+
+# Runner benchmarks spawn one process per step, so they stop at this size
+DEFAULT_MAX_RUN_STEPS = 1000
+
+CORPORA = ('steps', 'rules', 'unterminated')
+OPERATIONS = ('parse', 'update', 'run', 'clone', 'startup')
+CLONE_STRATEGIES = ('reflink', 'hardlink', 'copy')
+
+# Workspace clone benchmarks stop at this many files
+DEFAULT_MAX_CLONE_FILES = 10000
+IMPLEMENTATIONS = ('python', 'js')
+
+# Launch-to-first-step budget for verify-readme.py, in milliseconds
+STARTUP_TARGET_MS = 50
+
+def generate_corpus(kind, size):
+    """Markdown text for a synthetic README with `size` units of `kind`.
+
+    steps:        `size` no-op (`true`) verification steps
+    rules:        `size` frontmatter-looking `---` pairs with no code block
+    unterminated: `size` steps whose code fences are never closed
+    """
+    parts = ['# Benchmark README', '', '<!-- VERIFICATION-BADGES -->',
+             '<!-- END-VERIFICATION-BADGES -->', '']
+    for i in range(size):
+        if kind == 'steps':
+            parts += ['---', 'verify: true', f'step: "step-{i}"', '---',
+                      '```bash', 'true', '```', '']
+        elif kind == 'rules':
+            parts += ['---', f'verify: true {i}', '---', 'Not a code block', '']
+        elif kind == 'unterminated':
+            parts += ['---', 'verify: true', f'step: "step-{i}"', '---', '```bash', 'true', '']
+        else:
+            raise ValueError(f'Unknown corpus: {kind}')
+    return '\n'.join(parts) + '\n'
+
+def generate_tree(root, files):
+    """A project-like tree of `files` 1 KB files, 100 per directory"""
+    for i in range(files):
+        directory = os.path.join(root, f'dir-{i // 100}')
+        if i % 100 == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'file-{i}.txt'), 'wb') as f:
+            f.write(b'x' * 1024)
+
+def measure_clone(workdir, files, repeat):
+    """Time cloning a tree of `files` files with each workspace strategy"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from step_workspaces import clone_tree, snapshot
+
+    source = os.path.join(workdir, f'tree-{files}')
+    generate_tree(source, files)
+    results = []
+    for strategy in CLONE_STRATEGIES:
+        timings = []
+        error = None
+        for attempt in range(repeat):
+            target = os.path.join(workdir, f'clone-{strategy}-{attempt}')
+            start = time.perf_counter()
+            try:
+                clone_tree(source, target, strategy)
+                # The snapshot taken for merging is part of the cost
+                snapshot(target)
+            except OSError as e:
+                error = f'{strategy} unsupported here: {e.strerror or e}'
+                break
+            finally:
+                timings.append(time.perf_counter() - start)
+                shutil.rmtree(target, ignore_errors=True)
+        result = {'implementation': 'python', 'operation': f'clone-{strategy}', 'corpus': 'tree',
+                  'size': files, 'bytes': files * 1024}
+        result.update({'error': error} if error else {'seconds': min(timings), 'steps': 0,
+                                                      'peakMemoryKB': None})
+        results.append(result)
+    shutil.rmtree(source, ignore_errors=True)
+    return results
+
+def measure_startup(workdir, config, repeat, timeout):
+    """Milliseconds from launching verify-readme.py to its first step starting"""
+    readme = os.path.join(workdir, 'startup.md')
+    text = generate_corpus('steps', 1)
+    with open(readme, 'w', encoding='utf-8') as f:
+        f.write(text)
+    command = [sys.executable, str(SCRIPTS_DIR / 'verify-readme.py'), readme, config, '--no-cache']
+    result = {'implementation': 'python', 'operation': 'startup', 'corpus': 'steps', 'size': 1,
+              'bytes': len(text.encode('utf-8')), 'targetMs': STARTUP_TARGET_MS}
+
+    timings = []
+    # One untimed run first: it fills the parsed config cache every later run reuses
+    for attempt in range(repeat + 1):
+        env = dict(os.environ, README_VERIFIER_LAUNCHED=repr(time.time()))
+        try:
+            completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True,
+                                       text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return dict(result, error=f'timed out after {timeout}s')
+        match = re.search(r'First step started (\d+)ms after launch', completed.stdout)
+        if not match:
+            lines = (completed.stderr or completed.stdout).strip().splitlines()
+            return dict(result, error=lines[-1] if lines else 'no step was started')
+        if attempt:
+            timings.append(int(match.group(1)))
+
+    best = min(timings)
+    return dict(result, seconds=best / 1000, steps=1, peakMemoryKB=None,
+                withinTarget=best <= STARTUP_TARGET_MS)
+
+def load_python_verifier():
+    """Import scripts/verify-readme.py, whose name isn't a valid module name"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    spec = importlib.util.spec_from_file_location('verify_readme', SCRIPTS_DIR / 'verify-readme.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def measure_python(operation, readme, config, repeat):
+    """Time one operation in this process; returns a result dict"""
+    module = load_python_verifier()
+
+    def run_once():
+        verifier = module.ReadmeVerifier(readme, config, use_cache=False)
+        if operation == 'parse':
+            return len(verifier.parse_readme())
+        if operation == 'update':
+            verifier.update_readme()
+            return 0
+        verifier.verify()
+        return len(verifier.results['steps'])
+
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            steps = run_once()
+            timings.append(time.perf_counter() - start)
+
+        peak = None
+        if operation != 'run':
+            # Separate pass: tracing allocations slows the timed runs down
+            tracemalloc.start()
+            run_once()
+            peak = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+
+    return {'seconds': min(timings), 'steps': steps, 'peakMemoryKB': peak}
+
+# Runs inside `node -e`; argv: operation, readme, config, repeat
+NODE_WORKER = r"""
+const [operation, readme, config, repeat] = process.argv.slice(1);
+const ReadmeVerifier = require(process.env.RV_SCRIPT);
+const log = console.log;
+console.log = console.warn = () => {};
+
+(async () => {
+  const baseline = process.memoryUsage().rss;
+  const timings = [];
+  let steps = 0;
+  for (let i = 0; i < Number(repeat); i++) {
+    const verifier = new ReadmeVerifier(readme, config);
+    const start = process.hrtime.bigint();
+    if (operation === 'parse') {
+      steps = verifier.parseReadme().length;
+    } else if (operation === 'update') {
+      verifier.updateReadme();
+    } else {
+      await verifier.verify();
+      steps = verifier.results.steps.length;
+    }
+    timings.push(Number(process.hrtime.bigint() - start) / 1e9);
+  }
+  const peak = process.resourceUsage().maxRSS * 1024 - baseline;
+  log(JSON.stringify({
+    seconds: Math.min(...timings),
+    steps,
+    peakMemoryKB: operation === 'run' ? null : Math.max(0, Math.round(peak / 1024))
+  }));
+})();
+"""
+
+def run_worker(implementation, operation, readme, config, repeat, timeout, workdir):
+    """Run one measurement in a child process, returning its result dict"""
+    if implementation == 'python':
+        command = [sys.executable, str(Path(__file__).resolve()), '--worker',
+                   operation, readme, config, str(repeat)]
+    else:
+        command = ['node', '-e', NODE_WORKER, operation, readme, config, str(repeat)]
+
+    env = dict(os.environ, RV_SCRIPT=str(SCRIPTS_DIR / 'verify-readme.js'))
+    try:
+        completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True,
+                                   text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'timed out after {timeout}s'}
+
+    if completed.returncode != 0:
+        lines = (completed.stderr or completed.stdout).strip().splitlines()
+        return {'error': lines[-1] if lines else f'exit code {completed.returncode}'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def available_implementations(requested):
+    """Drop implementations that can't run here, with a note why"""
+    available = []
+    for implementation in requested:
+        if implementation == 'js':
+            if not shutil.which('node'):
+                print('⚠️  Skipping js: node not found')
+                continue
+            probe = subprocess.run(['node', '-e', "require('js-yaml')"], cwd=SCRIPTS_DIR,
+                                   capture_output=True)
+            if probe.returncode != 0:
+                print('⚠️  Skipping js: js-yaml not installed (run npm install)')
+                continue
+        available.append(implementation)
+    return available
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_key(result):
+    return (result['implementation'], result['operation'], result['corpus'], result['size'])
+
+def run_suite(args):
+    implementations = available_implementations(args.implementations)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='readme-bench-') as workdir:
+        config = os.path.join(workdir, 'config.yml')
+        with open(config, 'w', encoding='utf-8') as f:
+            f.write('cache:\n  enabled: false\n'
+                    f'storage:\n  logsPath: "{Path(workdir, "logs").as_posix()}"\n')
+
+        for kind in args.corpora:
+            for size in args.sizes:
+                text = generate_corpus(kind, size)
+                for operation in args.operations:
+                    if operation == 'run' and (kind != 'steps' or size > args.max_run_steps):
+                        continue
+                    if operation in ('clone', 'startup'):
+                        continue
+                    for implementation in implementations:
+                        # A fresh copy each time, since update rewrites the file
+                        readme = os.path.join(workdir, f'{kind}-{size}.md')
+                        with open(readme, 'w', encoding='utf-8') as f:
+                            f.write(text)
+
+                        repeat = 1 if operation == 'run' else args.repeat
+                        measured = run_worker(implementation, operation, readme, config,
+                                              repeat, args.timeout, workdir)
+                        result = {
+                            'implementation': implementation,
+                            'operation': operation,
+                            'corpus': kind,
+                            'size': size,
+                            'bytes': len(text.encode('utf-8')),
+                            **measured
+                        }
+                        if 'seconds' in measured and measured['steps']:
+                            result['stepsPerSecond'] = round(measured['steps'] / max(measured['seconds'], 1e-9), 1)
+                        results.append(result)
+                        print_result(result)
+
+        if 'clone' in args.operations and 'python' in implementations:
+            for size in args.sizes:
+                if size > args.max_clone_files:
+                    continue
+                for result in measure_clone(workdir, size, args.repeat):
+                    results.append(result)
+                    print_result(result)
+
+        if 'startup' in args.operations and 'python' in implementations:
+            result = measure_startup(workdir, config, args.repeat, args.timeout)
+            results.append(result)
+            print_result(result)
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'environment': {
+            'os': platform.system(),
+            'arch': platform.machine(),
+            'python': platform.python_version(),
+            'node': subprocess.run(['node', '--version'], capture_output=True, text=True).stdout.strip()
+                    if 'js' in implementations else None
+        },
+        'settings': {
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'timeout': args.timeout,
+            'maxRunSteps': args.max_run_steps,
+            'maxCloneFiles': args.max_clone_files
+        },
+        'results': results
+    }
+
+def print_result(result):
+    label = f'{result["implementation"]:<7} {result["operation"]:<14} {result["corpus"]:<13} {result["size"]:>7}'
+    if 'error' in result:
+        print(f'{label}  ❌ {result["error"]}')
+        return
+    memory = f'{result["peakMemoryKB"]:>9} KB' if result.get('peakMemoryKB') is not None else ' ' * 12
+    rate = f'{result["stepsPerSecond"]:>12.1f} steps/s' if 'stepsPerSecond' in result else ''
+    if 'withinTarget' in result:
+        rate = f'  {"✅" if result["withinTarget"] else "❌"} target {result["targetMs"]} ms'
+    print(f'{label}  {result["seconds"] * 1000:>10.1f} ms {memory}{rate}')
+
+def print_comparison(baseline, current):
+    """Print the time ratio current/baseline for every benchmark in both runs"""
+    previous = {benchmark_key(r): r for r in baseline['results'] if 'seconds' in r}
+    print(f'\nCompared with {baseline.get("commit") or "baseline"} ({baseline.get("timestamp", "?")}):')
+    for result in current['results']:
+        before = previous.get(benchmark_key(result))
+        if not before or 'seconds' not in result:
+            continue
+        ratio = result['seconds'] / max(before['seconds'], 1e-9)
+        marker = '🐢' if ratio > 1.1 else '🚀' if ratio < 0.9 else '  '
+        label = f'{result["implementation"]:<7} {result["operation"]:<14} {result["corpus"]:<13} {result["size"]:>7}'
+        print(f'{label}  {before["seconds"] * 1000:>10.1f} ms -> {result["seconds"] * 1000:>10.1f} ms  '
+              f'x{ratio:.2f} {marker}')
+
+def csv_list(cast=str, choices=None):
+    def parse(value):
+        items = [cast(item.strip()) for item in value.split(',') if item.strip()]
+        if choices and any(item not in choices for item in items):
+            raise argparse.ArgumentTypeError(f'choose from {", ".join(choices)}')
+        return items
+    return parse
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the README verifier implementations')
+    parser.add_argument('--sizes', type=csv_list(int), default=DEFAULT_SIZES,
+                        help='Comma-separated corpus sizes (default: 10,100,1000,10000,100000)')
+    parser.add_argument('--corpora', type=csv_list(choices=CORPORA), default=list(CORPORA),
+                        help='Comma-separated corpora: steps, rules, unterminated')
+    parser.add_argument('--operations', type=csv_list(choices=OPERATIONS), default=list(OPERATIONS),
+                        help='Comma-separated operations: parse, update, run, clone, startup')
+    parser.add_argument('--implementations', type=csv_list(choices=IMPLEMENTATIONS),
+                        default=list(IMPLEMENTATIONS), help='Comma-separated: python, js')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed repetitions per parse/update benchmark; the best is kept')
+    parser.add_argument('--timeout', type=float, default=120,
+                        help='Seconds before a single benchmark is abandoned')
+    parser.add_argument('--max-run-steps', type=int, default=DEFAULT_MAX_RUN_STEPS,
+                        help='Largest corpus to execute for the runner benchmark')
+    parser.add_argument('--max-clone-files', type=int, default=DEFAULT_MAX_CLONE_FILES,
+                        help='Largest tree (in files) to clone for the workspace benchmark')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT,
+                        help=f'Where to save the JSON results (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--compare', metavar='PATH', default=None,
+                        help='Earlier results file to compare against')
+    parser.add_argument('--worker', nargs=4, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+
+    if args.worker:
+        operation, readme, config, repeat = args.worker
+        print(json.dumps(measure_python(operation, readme, config, int(repeat))))
+        return 0
+
+    report = run_suite(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'\n💾 Benchmark results saved to {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
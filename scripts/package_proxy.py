@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Package Proxy
+A caching HTTP proxy on localhost in front of PyPI- and npm-style package
+indexes (proxy.enabled). Steps run with PIP_INDEX_URL, UV_INDEX_URL and
+npm_config_registry pointing at it. Responses are kept in a content-addressed
+store: package files are served from it on every later request, index pages
+once older than metadataMaxAge are fetched again (and served stale if the
+index can't be reached). In offline mode nothing is fetched at all, so the
+store is all steps can install from. It can only be filled by an online run
+(locally, or restored from a CI cache of the store directory); there is no
+import of packages downloaded some other way.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_STORE_DIR = '.github/readme-verifier/packages'
+
+# Seconds a stored index page (as opposed to a package file) is served without asking upstream
+DEFAULT_METADATA_MAX_AGE = 600
+
+# Seconds to wait for an upstream index
+UPSTREAM_TIMEOUT = 30
+
+# {route: upstream base URL}; steps reach upstream <base>/<rest> as <proxy>/<route>/<rest>
+DEFAULT_UPSTREAMS = {
+    'pypi': 'https://pypi.org/simple',
+    'pypi-files': 'https://files.pythonhosted.org',
+    'npm': 'https://registry.npmjs.org',
+}
+
+# Package archives never change once published, unlike the index pages listing them
+PACKAGE_FILE = re.compile(r'\.(?:whl|tar\.gz|tgz|tar\.bz2|zip|egg|metadata)$')
+
+# Responses whose upstream URLs are rewritten to go through the proxy
+TEXT_TYPES = ('html', 'json', 'text')
+
+COPY_CHUNK = 1024 * 1024
+
+class PackageStore:
+    """Content-addressed store: blobs by SHA-256, plus a ref per request naming its blob"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.blobs = self.root / 'blobs'
+        self.refs = self.root / 'refs'
+
+    @staticmethod
+    def request_key(url, accept=None):
+        """Key for a response; None for `accept` gives the key for the URL alone"""
+        import hashlib
+        # Indexes answer in different formats depending on Accept
+        material = url if accept is None else f'{url}\n{accept}'
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def blob_path(self, digest):
+        return self.blobs / digest[:2] / digest
+
+    def lookup(self, key):
+        """The stored ref for a request key, or None if it or its blob is missing"""
+        try:
+            with open(self.refs / f'{key}.json', 'r', encoding='utf-8') as f:
+                ref = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return ref if self.blob_path(ref['blob']).exists() else None
+
+    def write(self, keys, url, content_type, stream):
+        """Store a response body read from stream under each of `keys`; returns its ref"""
+        import hashlib
+        digest = hashlib.sha256()
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.blobs / f'.{threading.get_ident()}.tmp'
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(COPY_CHUNK), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            path = self.blob_path(digest.hexdigest())
+            path.parent.mkdir(exist_ok=True)
+            # Identical content stored under another URL is kept only once
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        ref = {'url': url, 'contentType': content_type, 'blob': digest.hexdigest(),
+               'size': size, 'fetched': time.time()}
+        self.refs.mkdir(parents=True, exist_ok=True)
+        for key in keys:
+            ref_path = self.refs / f'{key}.json'
+            tmp_ref = ref_path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_ref, 'w', encoding='utf-8') as f:
+                json.dump(ref, f)
+            os.replace(tmp_ref, ref_path)
+        return ref
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.proxy.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+class PackageProxy:
+    """Serves <url>/<route>/... from the store or the route's upstream index"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, upstreams=None, offline=False,
+                 metadata_max_age=DEFAULT_METADATA_MAX_AGE):
+        self.store = PackageStore(store_dir)
+        self.upstreams = dict(DEFAULT_UPSTREAMS, **(upstreams or {}))
+        self.offline = offline
+        self.metadata_max_age = metadata_max_age
+        self.server = None
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'fromStore': 0, 'fetched': 0, 'missing': 0, 'bytesFromStore': 0}
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def environment(self):
+        """Variables pointing pip, uv, npm and yarn at the proxy"""
+        return {
+            'PIP_INDEX_URL': f'{self.url}/pypi/',
+            'UV_INDEX_URL': f'{self.url}/pypi/',
+            'npm_config_registry': f'{self.url}/npm/',
+            'YARN_NPM_REGISTRY_SERVER': f'{self.url}/npm',
+        }
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.1},
+                         daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def count(self, **increments):
+        with self.lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def rewrite(self, body):
+        """Point upstream URLs in an index page (e.g. file links) back at the proxy"""
+        # URLs are ASCII, so bytes that aren't UTF-8 (a legacy charset) pass through unchanged
+        text = body.decode('utf-8', errors='surrogateescape')
+        for route, base in sorted(self.upstreams.items(), key=lambda item: -len(item[1])):
+            text = text.replace(base.rstrip('/'), f'{self.url}/{route}')
+        return text.encode('utf-8', errors='surrogateescape')
+
+    def fetch(self, url, accept):
+        """Open url upstream; returns the response or raises OSError"""
+        import urllib.request
+        request = urllib.request.Request(url, headers={
+            'Accept': accept or '*/*',
+            'Accept-Encoding': 'identity',
+            'User-Agent': 'readme-verifier-package-proxy'
+        })
+        return urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT)
+
+    def handle(self, handler):
+        """Answer one GET, from the store where possible"""
+        import urllib.error
+        route, _, rest = handler.path.lstrip('/').partition('/')
+        if route not in self.upstreams:
+            return self.send_error(handler, 404, f'Unknown route /{route}/ (use {", ".join(self.upstreams)})')
+        self.count(requests=1)
+
+        url = f'{self.upstreams[route].rstrip("/")}/{rest}'
+        accept = handler.headers.get('Accept', '')
+        immutable = bool(PACKAGE_FILE.search(rest.split('?', 1)[0]))
+        # A package file is the same whatever the client accepts; an index page is
+        # also stored under its URL alone, as the offline fallback for other Accepts
+        url_key = self.store.request_key(url)
+        key = url_key if immutable else self.store.request_key(url, accept)
+        ref = self.store.lookup(key)
+        if ref is None and self.offline:
+            ref = self.store.lookup(url_key)
+        fresh = ref and (immutable or time.time() - ref['fetched'] < self.metadata_max_age)
+
+        if ref and (fresh or self.offline):
+            return self.send_stored(handler, ref)
+        if self.offline:
+            self.count(missing=1)
+            return self.send_error(handler, 404, f'{url} is not in the offline package store')
+
+        try:
+            with self.fetch(url, accept) as response:
+                ref = self.store.write({key, url_key}, url, response.headers.get('Content-Type', ''),
+                                       response)
+        except urllib.error.HTTPError as e:
+            # Not found upstream: say so without storing anything
+            self.count(missing=1)
+            return self.send_error(handler, e.code, f'{url}: {e.reason}')
+        except OSError as e:
+            if ref:
+                # Upstream unreachable: an old index page beats none
+                return self.send_stored(handler, ref)
+            self.count(missing=1)
+            return self.send_error(handler, 502, f'{url}: {e}')
+        self.count(fetched=1)
+        self.send_stored(handler, ref, counted=False)
+
+    def send_stored(self, handler, ref, counted=True):
+        path = self.store.blob_path(ref['blob'])
+        content_type = ref['contentType'] or 'application/octet-stream'
+        body = None
+        if any(kind in content_type for kind in TEXT_TYPES):
+            body = self.rewrite(path.read_bytes())
+        if counted:
+            self.count(fromStore=1, bytesFromStore=ref['size'])
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body) if body is not None else ref['size']))
+        handler.end_headers()
+        if body is not None:
+            handler.wfile.write(body)
+            return
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+                handler.wfile.write(chunk)
+
+    @staticmethod
+    def send_error(handler, status, message):
+        body = message.encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/plain; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
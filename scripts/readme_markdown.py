@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+README Markdown Tokenizer
+Single-pass, line-oriented scanner that finds frontmatter-annotated code
+blocks and badge markers in a README without regular-expression backtracking,
+and rewrites the badge section in place
+"""
+
+import os
+import re
+
+# Frontmatter longer than this is not treated as step metadata (keeps memory flat)
+MAX_FRONTMATTER_LINES = 200
+
+# Up to three spaces of indentation, then a run of ``` or ~~~
+FENCE_OPEN = re.compile(r' {0,3}(`{3,}|~{3,})(.*)')
+
+# `key: value` line of flat frontmatter
+FLAT_PAIR = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*):(?: +(.*))?')
+INTEGER = re.compile(r'[-+]?(?:0|[1-9][0-9]*)')
+DECIMAL = re.compile(r'[-+]?(?:0|[1-9][0-9]*)\.[0-9]+')
+# Plain scalars that YAML reads as strings whatever follows the first character
+PLAIN_START = re.compile(r'[A-Za-z_/]')
+
+# Plain scalars YAML 1.1 (PyYAML) resolves to booleans and null
+BOOLEANS = {word: value for value, words in ((True, 'yes true on'), (False, 'no false off'))
+            for base in words.split() for word in (base, base.capitalize(), base.upper())}
+NULLS = {'null', 'Null', 'NULL', '~'}
+
+def fence_opener(line):
+    """Return (char, length, info) if line opens a fenced code block"""
+    match = FENCE_OPEN.match(line)
+    if not match:
+        return None
+
+    fence, info = match.group(1), match.group(2).strip()
+    # A backtick fence's info string may not itself contain backticks
+    if fence[0] == '`' and '`' in info:
+        return None
+    return fence[0], len(fence), info
+
+def is_fence_closer(line, char, length):
+    """True if line closes a fence opened with `length` x `char`"""
+    stripped = line.lstrip(' ')
+    if len(line) - len(stripped) > 3:
+        return False
+    run = len(stripped) - len(stripped.lstrip(char))
+    return run >= length and not stripped[run:].strip()
+
+def tokenize_markdown(lines, markers=()):
+    """Scan Markdown lines once, yielding ('step', block) and ('marker', hit) events.
+
+    A step block is frontmatter delimited by two `---` lines immediately
+    followed by a fenced code block. Block dicts carry the raw frontmatter,
+    the fence language and code, and 1-based line numbers. Marker hits are
+    reported only for markers outside code fences. Every line is examined a
+    constant number of times, so runtime is linear in the size of the input
+    however many rules and fences it contains.
+    """
+    fence = None           # (char, length) of the open fence
+    block = None           # step block being collected inside the fence
+    segment = None         # lines since the last `---` outside a fence
+    segment_start = 0
+    pending = None         # frontmatter closed on the previous line
+    line_no = 0
+
+    for raw in lines:
+        line_no += 1
+        line = raw.rstrip('\r\n')
+
+        if fence:
+            if is_fence_closer(line, *fence):
+                if block:
+                    block['code'] = '\n'.join(block.pop('codeLines')).strip()
+                    block['lineEnd'] = line_no
+                    yield 'step', block
+                fence = None
+                block = None
+            elif block:
+                block['codeLines'].append(line)
+            continue
+
+        opener = fence_opener(line)
+        if opener:
+            char, length, info = opener
+            fence = (char, length)
+            if pending and pending['closeLine'] == line_no - 1:
+                block = {
+                    'frontmatter': '\n'.join(pending['lines']),
+                    'language': info.split()[0] if info else None,
+                    'lineStart': pending['openLine'],
+                    'codeStart': line_no + 1,
+                    'codeLines': []
+                }
+            pending = None
+            segment = None
+            continue
+
+        if line.strip() == '---':
+            if segment is not None:
+                pending = {
+                    'lines': segment,
+                    'openLine': segment_start,
+                    'closeLine': line_no
+                }
+            # The closing rule may equally open the next frontmatter block
+            segment = []
+            segment_start = line_no
+            continue
+
+        if segment is not None:
+            if len(segment) >= MAX_FRONTMATTER_LINES:
+                segment = None
+            else:
+                segment.append(line)
+
+        for marker in markers:
+            column = line.find(marker)
+            if column != -1:
+                yield 'marker', {'marker': marker, 'line': line_no, 'column': column}
+
+def flat_scalar(text, in_list=False):
+    """(True, value) for a scalar the fast path reads exactly as YAML would, else (False, None)"""
+    if not text:
+        return (False, None) if in_list else (True, None)
+    if text[0] in '"\'' and len(text) >= 2 and text[-1] == text[0]:
+        inner = text[1:-1]
+        # No escapes or embedded quotes, which YAML would rewrite
+        if text[0] not in inner and '\\' not in inner:
+            return True, inner
+        return False, None
+    if text[0] == '[' and not in_list:
+        if text[-1] != ']':
+            return False, None
+        inner = text[1:-1].strip()
+        items = [flat_scalar(item.strip(), in_list=True) for item in inner.split(',')] if inner else []
+        if all(ok for ok, _ in items):
+            return True, [value for _, value in items]
+        return False, None
+    if text in BOOLEANS:
+        return True, BOOLEANS[text]
+    if text in NULLS:
+        return True, None
+    if INTEGER.fullmatch(text):
+        return True, int(text)
+    if DECIMAL.fullmatch(text):
+        return True, float(text)
+    if PLAIN_START.match(text) and ': ' not in text and not text.endswith(':') \
+            and not (in_list and any(c in text for c in '[]{}')):
+        return True, text
+    return False, None
+
+def parse_flat_frontmatter(text):
+    """Parse frontmatter made only of flat `key: value` lines without importing yaml.
+
+    Handles strings (plain or quoted without escapes), integers, decimals,
+    booleans, null, one-line [a, b] lists and # comments, giving the same
+    result as yaml.safe_load. Returns None for anything else, including
+    an empty document, so the caller can fall back to a full YAML parser.
+    """
+    if '\t' in text:
+        return None
+    data = {}
+    for line in text.split('\n'):
+        if not line.strip() or line.startswith('#'):
+            continue
+        match = FLAT_PAIR.fullmatch(line.rstrip())
+        if not match or match.group(1) in BOOLEANS or match.group(1) in NULLS:
+            return None
+        value = match.group(2) or ''
+        if value.startswith('#'):
+            value = ''
+        elif ' #' in value:
+            value = value[:value.index(' #')].rstrip()
+        ok, value = flat_scalar(value)
+        if not ok:
+            return None
+        data[match.group(1)] = value
+    return data or None
+
+def iter_step_blocks(lines):
+    """Yield only the frontmatter + code block pairs from a Markdown document"""
+    for kind, data in tokenize_markdown(lines):
+        if kind == 'step':
+            yield data
+
+def shift_block(block, offset):
+    """Copy of a step block with its line numbers moved by offset"""
+    return dict(block, lineStart=block['lineStart'] + offset, codeStart=block['codeStart'] + offset,
+                lineEnd=block['lineEnd'] + offset)
+
+def reparse_step_blocks(old_lines, old_blocks, new_lines):
+    """Step blocks of new_lines, re-tokenizing only the region that differs from old_lines.
+
+    Scanning restarts after the last block that closed before the first
+    changed line, since the tokenizer holds no state after a block's closing
+    fence. It stops at the first block past the edit that matches an old
+    block at the shifted position: from there on the text and so the blocks
+    are the same. Returns (blocks, lines scanned).
+    """
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    if prefix == len(old_lines) == len(new_lines):
+        return list(old_blocks), 0
+
+    kept = [block for block in old_blocks if block['lineEnd'] <= prefix]
+    restart = kept[-1]['lineEnd'] if kept else 0
+    offset = len(new_lines) - len(old_lines)
+    # Old blocks lying wholly in the unchanged tail, keyed by their new position
+    tail_start = len(old_lines) - suffix
+    tail = [block for block in old_blocks if block['lineStart'] > tail_start]
+    tail_index = {block['lineStart'] + offset: i for i, block in enumerate(tail)}
+
+    blocks = kept
+    scanned = len(new_lines) - restart
+    for kind, data in tokenize_markdown(new_lines[restart:]):
+        if kind != 'step':
+            continue
+        block = shift_block(data, restart)
+        match = tail_index.get(block['lineStart'])
+        if match is not None and shift_block(tail[match], offset) == block:
+            scanned = block['lineEnd'] - restart
+            blocks.extend(shift_block(old, offset) for old in tail[match:])
+            return blocks, scanned
+        blocks.append(block)
+    return blocks, scanned
+
+BADGE_MARKER = '<!-- VERIFICATION-BADGES -->'
+BADGE_END_MARKER = '<!-- END-VERIFICATION-BADGES -->'
+
+def find_marker_span(data, start_marker=BADGE_MARKER, end_marker=BADGE_END_MARKER):
+    """Return byte offsets (start, end) of the marker pair in UTF-8 `data`.
+
+    `end` points just past the end marker. Markers inside code fences are
+    ignored; either offset is None when its marker is missing.
+    """
+    raw_lines = data.split(b'\n')
+    offsets = []
+    position = 0
+    for raw in raw_lines:
+        offsets.append(position)
+        position += len(raw) + 1
+
+    # '\n' never occurs inside a multi-byte UTF-8 sequence, so lines decode independently
+    lines = (raw.decode('utf-8') for raw in raw_lines)
+    start = None
+    for kind, hit in tokenize_markdown(lines, (start_marker, end_marker)):
+        if kind != 'marker':
+            continue
+        index = hit['line'] - 1
+        # Columns count characters; convert them back to bytes
+        column = len(raw_lines[index].decode('utf-8')[:hit['column']].encode('utf-8'))
+        if hit['marker'] == start_marker and start is None:
+            start = offsets[index] + column
+        elif hit['marker'] == end_marker and start is not None:
+            return start, offsets[index] + column + len(end_marker.encode('utf-8'))
+    return start, None
+
+def render_badge_section(data, section):
+    """Return README bytes with `section` placed between the badge markers.
+
+    Without markers the section is inserted after the first `# ` heading;
+    a README with neither is returned unchanged.
+    """
+    body = f'{BADGE_MARKER}\n{section}\n{BADGE_END_MARKER}'.encode('utf-8')
+    start, end = find_marker_span(data)
+    if start is not None:
+        # An unterminated start marker leaves the README alone rather than guess
+        return data[:start] + body + data[end:] if end is not None else data
+
+    position = 0
+    for raw in data.split(b'\n'):
+        end = position + len(raw)
+        if raw.startswith(b'# '):
+            if end == len(data):
+                return data + b'\n\n' + body + b'\n'
+            return data[:end + 1] + b'\n' + body + b'\n\n' + data[end + 1:]
+        position = end + 1
+    return data
+
+def write_atomic(path, data):
+    """Replace file `path` with `data` via a temp file and rename.
+
+    Readers see either the old or the new file, never a partial write, and
+    the file keeps its permissions.
+    """
+    import shutil
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            shutil.copymode(path, temp_path)
+        except OSError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def rewrite_badge_section(path, section, data=None):
+    """Write `section` into the README's badge slot, returning True if the file changed.
+
+    `data` is the README content already read, if any. Nothing is written
+    when the rendered README is identical, so mtimes and git status stay put.
+    """
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    updated = render_badge_section(data, section)
+    if updated == data:
+        return False
+    write_atomic(path, updated)
+    return True
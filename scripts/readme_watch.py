@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+README Watch Mode
+Keeps the verifier resident while a README is being edited (--watch). Each
+save re-tokenizes only the edited region, re-runs only steps whose code,
+settings or input files changed (plus the steps depending on them), and
+reuses every other result from memory. Changes are picked up with inotify on
+Linux and by polling elsewhere.
+"""
+
+import ctypes
+import hashlib
+import json
+import os
+import select
+import sys
+import time
+from datetime import datetime
+
+from readme_markdown import reparse_step_blocks
+from step_cache import StepCache
+
+# Seconds between checks when polling, and the inotify safety-net timeout
+POLL_INTERVAL = 0.5
+
+# Editors often save in several writes; wait this long for them to settle
+DEBOUNCE = 0.1
+
+# IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_MASK = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+
+def open_inotify():
+    """(libc, inotify fd) on Linux, or None where inotify is unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    return (libc, fd) if fd >= 0 else None
+
+class ChangeWatcher:
+    """Blocks until one of a set of files changes.
+
+    The files are listed by a callable, so newly created files matching a
+    step's `inputs` globs are noticed too. inotify watches only wake the
+    watcher up; what changed is decided by comparing (mtime, size) snapshots,
+    so files a step writes next to the README don't trigger a re-run.
+    """
+
+    def __init__(self, list_files, interval=POLL_INTERVAL):
+        self.list_files = list_files
+        self.interval = interval
+        self.state = {}
+        self.watched = set()
+        inotify = open_inotify()
+        self.libc, self.fd = inotify if inotify else (None, None)
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def snapshot(self):
+        state = {}
+        for path in self.list_files():
+            try:
+                info = os.stat(path)
+                state[str(path)] = (info.st_mtime_ns, info.st_size)
+            except OSError:
+                state[str(path)] = None
+        return state
+
+    def mark(self):
+        """Record the current state of the files as seen"""
+        self.state = self.snapshot()
+        if self.fd is None:
+            return
+        # Watch directories, not files: editors often save by renaming a new file over the old one
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in self.state}:
+            if directory not in self.watched and os.path.isdir(directory):
+                if self.libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK) >= 0:
+                    self.watched.add(directory)
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self):
+        """Block until a file differs from the last mark(); returns the changed paths"""
+        while True:
+            if self.fd is not None:
+                ready, _, _ = select.select([self.fd], [], [], self.interval * 4)
+                if ready:
+                    time.sleep(DEBOUNCE)
+                    self.drain()
+            else:
+                time.sleep(self.interval)
+
+            current = self.snapshot()
+            changed = [path for path in current.keys() | self.state.keys()
+                       if current.get(path) != self.state.get(path)]
+            if changed:
+                return sorted(changed)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class WatchSession:
+    """Re-verifies a README on every change, keeping parsed steps and results warm"""
+
+    def __init__(self, verifier, log=print):
+        self.verifier = verifier
+        self.log = log
+        # Reuse parsed YAML for frontmatter that didn't change
+        verifier.frontmatter_cache = {}
+        # Used only to fingerprint steps (code, environment and input hashes), never saved
+        self.fingerprinter = verifier.cache or StepCache()
+        self.lines = []
+        self.blocks = []
+        self.steps = []
+        # {step fingerprint: last result}
+        self.results = {}
+        self.watcher = ChangeWatcher(self.watched_files)
+
+    def watched_files(self):
+        files = [self.verifier.readme_path]
+        for step in self.steps:
+            if step.get('inputs'):
+                files.extend(self.fingerprinter.input_files(step))
+        return files
+
+    def fingerprint(self, step):
+        """Content address of everything that decides a step's result"""
+        settings = [step['timeout'], step['required'], sorted(step.get('dependsOn', [])),
+                    step.get('expect', []), step.get('expectNot', [])]
+        material = self.fingerprinter.key_for(step) + json.dumps(settings)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def parse(self):
+        """Re-parse the README, re-tokenizing only the edited region"""
+        lines = self.verifier.read_readme().decode('utf-8').split('\n')
+        self.blocks, scanned = reparse_step_blocks(self.lines, self.blocks, lines)
+        if self.lines and 0 < scanned < len(lines):
+            self.log(f'👀 Re-parsed {scanned} of {len(lines)} line(s)')
+        self.lines = lines
+        self.steps = self.verifier.parse_readme(self.blocks)
+
+    def plan(self):
+        """{index: reused result} for steps that are unchanged and don't depend on a changed step"""
+        fingerprints = [self.fingerprint(step) for step in self.steps]
+        _, dependents = self.verifier.build_step_graph(self.steps)
+        stale = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in self.results]
+        rerun = set()
+        while stale:
+            i = stale.pop()
+            if i not in rerun:
+                rerun.add(i)
+                stale.extend(dependents[i])
+            if not stale and rerun:
+                # Background services only live for one run, so re-runs need them started again
+                stale = [i for i, step in enumerate(self.steps) if step.get('background') and i not in rerun]
+
+        carried = {}
+        for i, step in enumerate(self.steps):
+            if i not in rerun:
+                carried[i] = dict(self.results[fingerprints[i]], name=step['name'],
+                                  description=step['description'], carriedOver=True)
+        return fingerprints, carried
+
+    def iteration(self):
+        self.parse()
+        self.watcher.mark()
+        if not self.steps:
+            self.log(f'⚠️  No verification steps found in {self.verifier.readme_path}')
+            return
+
+        fingerprints, carried = self.plan()
+        if len(carried) == len(self.steps) and self.verifier.results['steps']:
+            self.log('👀 No step code or inputs changed')
+            return
+        self.log(f'👀 Running {len(self.steps) - len(carried)} changed step(s), '
+                 f'reusing {len(carried)} result(s)\n')
+
+        verifier = self.verifier
+        verifier.results['timestamp'] = datetime.now().isoformat()
+        verifier.results['steps'] = []
+        verifier.verify(self.steps, carried=carried)
+        if len(verifier.results['steps']) == len(fingerprints):
+            for fingerprint, result in zip(fingerprints, verifier.results['steps']):
+                # Skipped steps never ran, so there is nothing to reuse
+                if not result.get('carriedOver') and result['status'] != 'skipped':
+                    self.results[fingerprint] = dict(result)
+        verifier.print_report()
+        # Local edit loops shouldn't count as runs in the history store
+        verifier.save_results(record=False)
+
+    def run(self):
+        self.log(f'👀 Watching {self.verifier.readme_path} for changes ({self.watcher.mode}); '
+                 f'press Ctrl+C to stop\n')
+        try:
+            while True:
+                try:
+                    self.iteration()
+                except Exception as e:
+                    self.log(f'\n❌ Verification failed: {e}')
+                    # Keep the step list in sync with the README even after a failed run
+                    self.watcher.mark()
+                self.log(f'\n👀 Waiting for changes to {self.verifier.readme_path} ...')
+                changed = self.watcher.wait()
+                names = ', '.join(os.path.relpath(path) for path in changed[:3])
+                self.log(f'\n👀 Changed: {names}' + (' ...' if len(changed) > 3 else ''))
+        except KeyboardInterrupt:
+            self.log('\n👀 Watch mode stopped')
+        finally:
+            self.watcher.close()
+        return 0
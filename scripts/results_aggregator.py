@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Results Aggregator
+Merges per-OS (or per-shard) results.json files into combined-results.json,
+and the shards of one OS back into a complete per-OS results file.
+Each file is read once and its step list is counted while it is decoded, so
+memory stays flat however many steps or artifacts there are. A file that
+arrives later can be merged into an existing combined file; re-merging the
+same OS or shard replaces its earlier counts instead of adding to them.
+
+Usage:
+    python scripts/results_aggregator.py combine verification-results/*/results.json
+        [--output combined-results.json] [--merge] [--history-dir DIR]
+    python scripts/results_aggregator.py summary results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+DEFAULT_COMBINED_PATH = '.github/readme-verifier/combined-results.json'
+
+# Characters read per chunk while streaming a results file
+READ_SIZE = 64 * 1024
+
+COUNT_KEYS = ('total', 'success', 'failed', 'warnings', 'skipped', 'slow')
+
+# Result OS names that belong to each platform shown in badges and tables
+PLATFORM_ALIASES = {
+    'macOS': ('macos', 'darwin'),
+    'Ubuntu': ('ubuntu', 'linux'),
+    'Windows': ('windows',)
+}
+
+DECODER = json.JSONDecoder()
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = '0123456789.eE+-'
+
+class JsonStream:
+    """Reads a JSON document from a file one value at a time"""
+
+    def __init__(self, f, chunk_size=READ_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        # Read at least as much as is buffered, so a huge value is re-scanned O(log n) times
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume one of the punctuation characters in `chars` and return it"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'Malformed results file: expected {" or ".join(chars)}, '
+                             f'found {char or "end of file"!r}')
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer (or cut off at "1." or "1e") may
+                # continue in the next chunk
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+def iter_results(f):
+    """Stream a results.json object as (key, value) pairs.
+
+    Each element of the `steps` array is yielded on its own as ('steps', step)
+    rather than building the whole list.
+    """
+    stream = JsonStream(f)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'steps' and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield 'steps', stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            yield key, stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+def new_counts():
+    return dict.fromkeys(COUNT_KEYS, 0)
+
+def count_step(counts, step):
+    status = step.get('status')
+    counts['total'] += 1
+    # A slow step still passed; it is counted separately as well
+    if status in ('success', 'slow'):
+        counts['success'] += 1
+    if status == 'slow':
+        counts['slow'] += 1
+    elif status == 'failed':
+        counts['failed'] += 1
+    elif status == 'warning':
+        counts['warnings'] += 1
+    elif status == 'skipped':
+        counts['skipped'] += 1
+
+def summarize(results):
+    """Status counts for a results dict already in memory"""
+    counts = new_counts()
+    for step in results['steps']:
+        count_step(counts, step)
+    return counts
+
+def success_rate(stats):
+    return round(stats['success'] / stats['total'] * 100) if stats['total'] > 0 else 0
+
+def summarize_file(path):
+    """Source entry (OS, shard, timestamp and status counts) for one results.json, in one pass"""
+    counts = new_counts()
+    fields = {}
+    with open(path, encoding='utf-8') as f:
+        for key, value in iter_results(f):
+            if key == 'steps':
+                count_step(counts, value)
+            elif key in ('timestamp', 'environment', 'shard'):
+                fields[key] = value
+
+    source = {'os': (fields.get('environment') or {}).get('os', 'unknown'),
+              'timestamp': fields.get('timestamp', '')}
+    if fields.get('shard'):
+        source['shard'] = fields['shard']
+    source.update(counts)
+    return source
+
+def source_key(source):
+    """Identity of a source in the combined file: its OS, plus the shard if sharded"""
+    if source.get('shard'):
+        return f'{source["os"]} shard {source["shard"]}'
+    return source['os']
+
+def shard_total(source):
+    """N for a source from shard i/N, None when unsharded"""
+    return source['shard'].split('/')[1] if source.get('shard') else None
+
+def build_combined(sources):
+    """combined-results.json content from {source key: source entry}"""
+    combined = {
+        'timestamp': '',
+        'results_by_os': {},
+        'total_steps': 0,
+        'total_success': 0,
+        'total_failed': 0,
+        'total_warnings': 0,
+        'total_skipped': 0,
+        'total_slow': 0,
+        'sources': sources
+    }
+    for source in sources.values():
+        stats = combined['results_by_os'].setdefault(source['os'], dict(new_counts(), timestamp=''))
+        for key in COUNT_KEYS:
+            stats[key] += source.get(key, 0)
+        combined['total_steps'] += source.get('total', 0)
+        for key in COUNT_KEYS[1:]:
+            combined[f'total_{key}'] += source.get(key, 0)
+        # ISO timestamps compare correctly as strings
+        stats['timestamp'] = max(stats['timestamp'], source.get('timestamp', ''))
+        combined['timestamp'] = max(combined['timestamp'], stats['timestamp'])
+    return combined
+
+def load_combined(path=DEFAULT_COMBINED_PATH):
+    """Parsed combined results, or None when the file doesn't exist"""
+    if not Path(path).exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def combined_sources(combined):
+    """Source entries of an existing combined file, including pre-`sources` files"""
+    if not combined:
+        return {}
+    if 'sources' in combined:
+        return dict(combined['sources'])
+    return {os_name: dict(stats, os=os_name)
+            for os_name, stats in combined.get('results_by_os', {}).items()}
+
+def merge_sources(new_sources, existing=None):
+    """Combined results with the given source entries merged into `existing`"""
+    sources = combined_sources(existing)
+    for source in new_sources:
+        # Results from a different split of the same OS (unsharded, or another shard count) are stale
+        split = shard_total(source)
+        for key, other in list(sources.items()):
+            if other['os'] == source['os'] and shard_total(other) != split:
+                del sources[key]
+        sources[source_key(source)] = source
+    return build_combined(sources)
+
+def combine(paths, existing=None):
+    """Merge results files into `existing` combined results (or a fresh set)"""
+    return merge_sources((summarize_file(path) for path in paths), existing)
+
+def shard_index(source):
+    return int(source['shard'].split('/')[0]) if source.get('shard') else 0
+
+def missing_shards(sources):
+    """'i/N' labels absent from one OS's shard sources"""
+    count = max(int(shard_total(source) or 1) for source in sources)
+    present = {shard_index(source) for source in sources}
+    return [f'{i}/{count}' for i in range(1, count + 1) if i not in present]
+
+def merge_shard_files(paths, output):
+    """Write one complete results.json from the shard results of a single OS.
+
+    Steps are written in README order (by lineStart), so the merged file
+    doesn't change with the way steps were split between shards. Only the
+    list of steps is held in memory while sorting. The merged file keeps
+    the latest timestamp and drops the shard tag, so it can serve as
+    --previous-results for any shard.
+    """
+    shards = []
+    for path in paths:
+        header = {}
+        with open(path, encoding='utf-8') as f:
+            for key, value in iter_results(f):
+                if key != 'steps':
+                    header[key] = value
+        shards.append((shard_index(header), path, header))
+    shards.sort(key=lambda item: item[0])
+
+    header = dict(shards[-1][2])
+    header.pop('shard', None)
+    header['timestamp'] = max(h.get('timestamp', '') for _, _, h in shards)
+    header['shards'] = max(int(shard_total(h) or 1) for _, _, h in shards)
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as out:
+        out.write(json.dumps(header, indent=2)[:-2] + ',\n  "steps": [')
+        steps = []
+        for _, path, _ in shards:
+            with open(path, encoding='utf-8') as f:
+                steps.extend(value for key, value in iter_results(f) if key == 'steps')
+        # Stable: steps without a line (older results) keep their shard order at the end
+        steps.sort(key=lambda step: (step.get('lineStart') is None, step.get('lineStart') or 0))
+        out.write(','.join('\n    ' + json.dumps(step) for step in steps))
+        out.write('\n  ]\n}\n')
+
+def save_combined(combined, path=DEFAULT_COMBINED_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(combined, f, indent=2)
+
+def overall_stats(combined):
+    """Counts across every OS in combined results, keyed like per-OS stats"""
+    return {'total': combined.get('total_steps', 0),
+            **{key: combined.get(f'total_{key}', 0) for key in COUNT_KEYS[1:]}}
+
+def find_platform(combined, aliases):
+    """(results OS name, stats) of the first OS matching any alias, or (None, None)"""
+    for key, stats in (combined or {}).get('results_by_os', {}).items():
+        if any(alias in key.lower() for alias in aliases):
+            return key, stats
+    return None, None
+
+def summary_table(combined):
+    """Markdown table of per-OS results"""
+    lines = ['## Multi-OS Verification Summary', '',
+             '| OS | Total | Success | Failed | Warnings | Success Rate |',
+             '|---|---|---|---|---|---|']
+    for os_name, stats in combined['results_by_os'].items():
+        status = 'PASS' if stats['failed'] == 0 else 'FAIL'
+        lines.append(f'| {status} {os_name} | {stats["total"]} | {stats["success"]} | '
+                     f'{stats["failed"]} | {stats["warnings"]} | {success_rate(stats)}% |')
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Combine verification results')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    combine_cmd = commands.add_parser('combine', help='Merge results.json files into combined results')
+    combine_cmd.add_argument('files', nargs='*')
+    combine_cmd.add_argument('--output', '-o', default=DEFAULT_COMBINED_PATH)
+    combine_cmd.add_argument('--merge', action='store_true',
+                             help='Merge into the existing output file instead of replacing it')
+    combine_cmd.add_argument('--history-dir', default=None,
+                             help='Also write each OS\'s complete results here as results-<os>.json '
+                                  '(the shards of an OS merged into one file)')
+
+    summary_cmd = commands.add_parser('summary', help='Markdown summary of one results.json')
+    summary_cmd.add_argument('file')
+
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        source = summarize_file(args.file)
+        print(f'## {source["os"]} Verification Summary')
+        print()
+        print('| Metric | Value |')
+        print('|--------|-------|')
+        print(f'| Total Steps | {source["total"]} |')
+        print(f'| Success | {source["success"]} |')
+        print(f'| Failed | {source["failed"]} |')
+        print(f'| Warnings | {source["warnings"]} |')
+        print(f'| Success Rate | {success_rate(source)}% |')
+        return 0
+
+    sources = [summarize_file(path) for path in args.files]
+    combined = merge_sources(sources, load_combined(args.output) if args.merge else None)
+    save_combined(combined, args.output)
+    print(summary_table(combined))
+
+    if args.history_dir:
+        os.makedirs(args.history_dir, exist_ok=True)
+        by_os = {}
+        for path, source in zip(args.files, sources):
+            by_os.setdefault(source['os'], []).append((path, source))
+        for os_name, files in by_os.items():
+            history_file = os.path.join(args.history_dir, f'results-{os_name}.json')
+            if any(source.get('shard') for _, source in files):
+                missing = missing_shards([source for _, source in files])
+                if missing:
+                    print(f'Warning: {os_name} results are missing shard(s) {", ".join(missing)}')
+                merge_shard_files([path for path, _ in files], history_file)
+            else:
+                # The file was only counted, so copy it rather than re-encoding
+                shutil.copyfile(files[-1][0], history_file)
+            print(f'Saved {history_file}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
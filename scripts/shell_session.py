@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Persistent Shell Session
+Runs every step of a verification in one long-lived POSIX shell so `cd`,
+`export` and virtualenv activation carry over between steps
+(execution.preserveEnv). Each step is followed by sentinel markers that
+split the shared stdout/stderr streams back into per-step output.
+"""
+
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+from collections import deque
+from datetime import datetime
+
+from step_processes import DEFAULT_GRACE, spawn_options, terminate_group
+
+READ_CHUNK = 64 * 1024
+STREAMS = ('stdout', 'stderr')
+
+def find_shell(preferred=None):
+    """Return a POSIX shell executable, or None if none is available"""
+    for candidate in [preferred, 'bash', 'sh']:
+        if candidate and shutil.which(candidate):
+            return shutil.which(candidate)
+    return None
+
+class StepSkipped(Exception):
+    """Raised by ShellSession.run for a batched step the shell skipped"""
+
+class SessionJob:
+    """One step submitted to the session"""
+
+    def __init__(self, step, capture):
+        self.step = step
+        self.capture = capture
+        self.returncode = None
+        # Set when the shell exited before reaching this step
+        self.unstarted = False
+        # Set when the shell skipped this step after a required one failed
+        self.skipped = False
+        self.started_at = None
+        self.finished_at = None
+        self.remaining = set(STREAMS)
+        self.done = threading.Event()
+
+    @property
+    def duration(self):
+        """Milliseconds between this step starting and finishing in the shell"""
+        if not self.started_at or not self.finished_at:
+            return None
+        return (self.finished_at - self.started_at).total_seconds() * 1000
+
+class ShellSession:
+    """A long-lived shell fed step scripts over stdin"""
+
+    def __init__(self, shell, cwd='.', kill_grace=DEFAULT_GRACE, env=None):
+        self.shell = shell
+        self.kill_grace = kill_grace
+        self.env = env
+        self.root = os.path.abspath(cwd)
+        self.sentinel = f'__RV_DONE_{os.urandom(16).hex()}'.encode('ascii')
+        self.process = None
+        self.queues = {}
+        self.by_step = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        # Steps sent ahead to a shell that exited get new captures when they run
+        for job in self.by_step.values():
+            if job.unstarted:
+                job.capture.close()
+        self.process = subprocess.Popen(
+            [self.shell],
+            cwd=self.root,
+            env=self.env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **spawn_options()
+        )
+        self.queues = {name: deque() for name in STREAMS}
+        self.by_step = {}
+        for name in STREAMS:
+            stream = getattr(self.process, name)
+            thread = threading.Thread(target=self.read_stream, args=(stream, name), daemon=True)
+            thread.start()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def script_for(self, step):
+        """Shell snippet that runs a step and reports its exit status.
+
+        A step with a workingDir runs there and the shell then returns to
+        the directory it was in, so only steps without one pass on a `cd`.
+        """
+        lines = ['if [ "$__rv_stop" != 1 ]; then']
+        working_dir = step.get('workingDir', '.') not in ('.', '')
+        if working_dir:
+            target = os.path.join(self.root, step['workingDir'])
+            lines += ['__rv_dir=$PWD', f'cd {shlex.quote(target)} &&']
+        lines += [
+            '{',
+            step['code'],
+            '} </dev/null',
+            '__rv_status=$?'
+        ]
+        if working_dir:
+            lines.append('cd "$__rv_dir"')
+        if step.get('required', True):
+            lines.append('[ "$__rv_status" -ne 0 ] && __rv_stop=1')
+        sentinel = self.sentinel.decode('ascii')
+        lines += [
+            'else __rv_status=skip; fi',
+            f"printf '\\n%s %s\\n' '{sentinel}' \"$__rv_status\"",
+            f"printf '\\n%s\\n' '{sentinel}' >&2",
+            ''
+        ]
+        return '\n'.join(lines)
+
+    def submit(self, items):
+        """Queue (step, capture) pairs and send their scripts in one write"""
+        if not self.alive:
+            self.start()
+
+        jobs = []
+        with self.lock:
+            idle = not self.queues['stdout']
+            for step, capture in items:
+                capture.open('stdout')
+                capture.open('stderr')
+                job = SessionJob(step, capture)
+                for queue in self.queues.values():
+                    queue.append(job)
+                self.by_step[id(step)] = job
+                jobs.append(job)
+            if idle:
+                jobs[0].started_at = datetime.now()
+
+        payload = ''.join(self.script_for(job.step) for job in jobs)
+        try:
+            self.process.stdin.write(payload.encode('utf-8'))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.fail_pending()
+        return jobs
+
+    def capture_for(self, step):
+        """Capture already attached to a step submitted as part of a batch"""
+        job = self.by_step.get(id(step))
+        return job.capture if job else None
+
+    def run(self, step, capture, timeout, progress=None, interval=10):
+        """Run a step in the session and return (exit code, duration in ms).
+
+        `progress(elapsed)` is called every `interval` seconds while the step
+        runs. Raises StepSkipped for a batched step the shell skipped after
+        a required step failed, and subprocess.TimeoutExpired after `timeout` seconds,
+        stopping the session and every process it started (noted in
+        capture.cleanup); the next step starts a fresh one. A step sent
+        ahead in a batch whose shell exited before reaching it (an earlier
+        step ran `exit`) is run again in a fresh shell.
+        """
+        job = self.by_step.get(id(step))
+        if job is None:
+            job = self.submit([(step, capture)])[0]
+
+        start = job.started_at or datetime.now()
+        while True:
+            elapsed = (datetime.now() - start).total_seconds()
+            if elapsed >= timeout:
+                capture.cleanup = self.close(kill=True)
+                raise subprocess.TimeoutExpired(step['code'], timeout)
+            if job.done.wait(min(timeout - elapsed, interval)):
+                if not job.unstarted:
+                    break
+                self.by_step.pop(id(step), None)
+                job = self.submit([(step, capture)])[0]
+                start = job.started_at or datetime.now()
+                continue
+            if progress and job.started_at:
+                progress((datetime.now() - job.started_at).total_seconds())
+
+        self.by_step.pop(id(step), None)
+        if job.skipped:
+            raise StepSkipped('Skipped: an earlier required step failed')
+        return job.returncode, job.duration
+
+    def read_stream(self, stream, name):
+        """Split a session stream into per-job output at sentinel lines"""
+        held_newline = False
+        try:
+            while True:
+                line = stream.readline(READ_CHUNK)
+                if not line:
+                    break
+
+                if line.startswith(self.sentinel):
+                    # The newline before the sentinel was ours, not the step's
+                    held_newline = False
+                    self.finish_stream(name, line[len(self.sentinel):].strip())
+                    continue
+
+                job = self.current_job(name)
+                if held_newline and job:
+                    job.capture.write(name, b'\n')
+                held_newline = line.endswith(b'\n')
+                if held_newline:
+                    line = line[:-1]
+                if job and line:
+                    job.capture.write(name, line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.fail_pending()
+
+    def current_job(self, name):
+        with self.lock:
+            queue = self.queues.get(name)
+            return queue[0] if queue else None
+
+    def finish_stream(self, name, status):
+        with self.lock:
+            queue = self.queues[name]
+            if not queue:
+                return
+            job = queue.popleft()
+            if name == 'stdout':
+                job.finished_at = datetime.now()
+                if status == b'skip':
+                    job.skipped = True
+                else:
+                    job.returncode = int(status or 0)
+                if queue:
+                    queue[0].started_at = job.finished_at
+            job.remaining.discard(name)
+            if not job.remaining:
+                job.done.set()
+
+    def fail_pending(self):
+        """Resolve every queued job once the shell has exited"""
+        if self.process is None:
+            return
+        try:
+            code = self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            return
+
+        with self.lock:
+            pending = []
+            for queue in self.queues.values():
+                while queue:
+                    job = queue.popleft()
+                    if job not in pending:
+                        pending.append(job)
+
+            for position, job in enumerate(pending):
+                if job.done.is_set():
+                    continue
+                if position == 0 and job.returncode is None and not job.skipped:
+                    # The step that was running exited the shell itself
+                    job.returncode = code
+                elif job.returncode is None and not job.skipped:
+                    job.unstarted = True
+                job.finished_at = job.finished_at or datetime.now()
+                job.done.set()
+
+    def close(self, kill=False):
+        """End the shell; with `kill`, stop its whole process group and return the cleanup"""
+        if self.process is None:
+            return None
+        cleanup = None
+        try:
+            if kill:
+                cleanup = terminate_group(self.process.pid, self.kill_grace)
+            else:
+                self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.fail_pending()
+        return cleanup
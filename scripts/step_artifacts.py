@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Install Artifact Cache
+Snapshots what an install step produces (node_modules, .venv) into a
+compressed archive keyed by the hash of its lockfiles, the step code and the
+OS/arch, and restores it instead of reinstalling when nothing changed. Steps
+opt in with `cacheKeyFiles:`, or are recognized by their install command and
+the lockfiles next to it. Archives are checked against their recorded
+SHA-256 before use and evicted least recently used beyond a size cap.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+ARTIFACT_MAX_SIZE_MB = 2048
+
+# gzip level for archives; higher levels cost far more time than they save space
+COMPRESS_LEVEL = 3
+
+# An install command with nothing after it but flags, e.g. `npm ci --silent`
+FLAGS_ONLY = r'(?:[ \t]+-\S+)*[ \t]*(?:$|[;&|)])'
+
+# (install command, lockfiles, other files hashed into the key, directory the install fills).
+# Python installs are only recognized when the step installs into .venv.
+INSTALLERS = [
+    (re.compile(r'\bnpm\s+(?:ci|install|i)' + FLAGS_ONLY, re.M),
+     ('package-lock.json', 'npm-shrinkwrap.json'), ('package.json',), 'node_modules'),
+    (re.compile(r'\byarn(?:\s+install)?' + FLAGS_ONLY, re.M),
+     ('yarn.lock',), ('package.json',), 'node_modules'),
+    (re.compile(r'\bpnpm\s+(?:install|i)' + FLAGS_ONLY, re.M),
+     ('pnpm-lock.yaml',), ('package.json',), 'node_modules'),
+    (re.compile(r'\bpip3?\s+install\s(?:[^\n;&|]*\s)?-r\s*(?P<file>[^\s;&|]+)'),
+     (), (), '.venv'),
+    (re.compile(r'\bpoetry\s+install\b'), ('poetry.lock',), ('pyproject.toml',), '.venv'),
+    (re.compile(r'\bpipenv\s+(?:install|sync)\b'), ('Pipfile.lock',), (), '.venv'),
+    (re.compile(r'\buv\s+sync\b'), ('uv.lock',), ('pyproject.toml',), '.venv'),
+]
+
+# Creating the virtualenv an install fills, e.g. `python3 -m venv .venv`
+VENV_CREATE = re.compile(r'\b(?:python[\d.]*\s+-m\s+venv|virtualenv)(?:\s+-\S+)*\s+\.venv/?$')
+
+# What joins commands on one line, kept with the command it follows
+COMMAND_SEPARATOR = re.compile(r'(\s*(?:&&|;)\s*)')
+
+# Quoting, expansions, pipes, redirections and compound commands: an
+# install command can't safely be taken out of code using any of these
+SHELL_SYNTAX = re.compile(r'[\'"`$(){}\\|<>]|\b(?:if|then|else|elif|fi|for|while|until|do|done|case|esac|function)\b')
+
+SHELL_LANGUAGES = ('bash', 'sh', 'shell', 'zsh')
+
+class ArtifactError(Exception):
+    """An archive that is missing, corrupt or can't be unpacked safely"""
+
+def default_paths(key_files):
+    """Directories filled by the installs that use these lockfiles, for `cacheKeyFiles:` alone"""
+    paths = set()
+    for name in (Path(path).name for path in key_files):
+        for _, lockfiles, others, directory in INSTALLERS:
+            if name in lockfiles or name in others or \
+                    (directory == '.venv' and name.startswith('requirements') and name.endswith('.txt')):
+                paths.add(directory)
+    return sorted(paths)
+
+def check_paths(paths):
+    """Raise ValueError unless every cache path stays inside the step's working directory"""
+    for path in paths:
+        parts = Path(path).parts
+        if not parts or Path(path).is_absolute() or '..' in parts:
+            raise ValueError(f'cachePaths entries must be relative paths inside workingDir, not {path!r}')
+
+def is_install_command(command, paths):
+    """Whether a single command is nothing but an install filling one of paths"""
+    for pattern, _, _, directory in INSTALLERS:
+        match = pattern.search(command)
+        if match and directory in paths and re.fullmatch(r'(?:\S*/)?', command[:match.start()]) \
+                and re.fullmatch(r'(?:\s+-\S+)*\s*', command[match.end():]):
+            return True
+    return '.venv' in paths and bool(VENV_CREATE.fullmatch(command))
+
+def code_without_installs(step, paths):
+    """The step's code with the install commands filling paths taken out.
+
+    Returns '' for a step that is nothing but those installs, and None when
+    there are none to take out or they can't be taken out safely, because
+    the code uses anything beyond plain commands joined by newlines, && or ;.
+    """
+    code = step['code']
+    commands = [line for line in code.split('\n') if not line.strip().startswith('#')]
+    if step['language'] not in SHELL_LANGUAGES or any(SHELL_SYNTAX.search(line) for line in commands):
+        return None
+    lines = []
+    for line in code.split('\n'):
+        parts = COMMAND_SEPARATOR.split(line.strip())
+        # [(command, separator after it)]
+        commands = list(zip(parts[0::2], parts[1::2] + ['']))
+        kept = [(command, separator) for command, separator in commands
+                if not is_install_command(command, paths)]
+        if len(kept) == len(commands):
+            lines.append(line)
+        elif kept:
+            lines.append(''.join(command + separator for command, separator in kept[:-1]) + kept[-1][0])
+    rest = '\n'.join(lines)
+    if rest == code:
+        return None
+    # Only comments and blank lines left: the step was just the install
+    if all(not line.strip() or line.strip().startswith('#') for line in lines):
+        return ''
+    return rest
+
+def artifact_plan(step):
+    """{'keyFiles', 'paths', 'rest'} for a step whose install output can be cached, else None.
+
+    'rest' is the code still to run when the archive is restored (see
+    code_without_installs).
+
+    `cacheKeyFiles:` globs name the key files explicitly; `cachePaths:`
+    overrides the directories derived from them. Otherwise the step is
+    matched against INSTALLERS and needs a lockfile in its working directory.
+    """
+    if step.get('background'):
+        return None
+    base = Path(step.get('workingDir') or '.')
+    if step.get('cacheKeyFiles'):
+        key_files = set()
+        for pattern in step['cacheKeyFiles']:
+            key_files.update(path for path in base.glob(pattern) if path.is_file())
+        paths = step.get('cachePaths') or default_paths(key_files)
+        if not key_files or not paths:
+            return None
+        return {'keyFiles': sorted(key_files), 'paths': paths, 'rest': code_without_installs(step, paths)}
+
+    key_files, paths = set(), set()
+    for command, lockfiles, others, directory in INSTALLERS:
+        match = command.search(step['code'])
+        if not match or (directory == '.venv' and '.venv' not in step['code']):
+            continue
+        locks = [base / name for name in lockfiles if (base / name).is_file()]
+        if 'file' in command.groupindex and (base / match.group('file')).is_file():
+            locks.append(base / match.group('file'))
+        if locks:
+            key_files.update(locks)
+            key_files.update(base / name for name in others if (base / name).is_file())
+            paths.add(directory)
+    if not key_files:
+        return None
+    paths = step.get('cachePaths') or sorted(paths)
+    return {'keyFiles': sorted(key_files), 'paths': paths, 'rest': code_without_installs(step, paths)}
+
+def file_digest(path):
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def remove_path(path):
+    import shutil
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+class ArtifactCache:
+    """LRU, size-bounded store of install artifact archives under cache_dir"""
+
+    def __init__(self, cache_dir, max_size_mb=ARTIFACT_MAX_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / 'index.json'
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.index = {}
+        self.dirty = False
+
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception:
+                self.index = {}
+
+    def archive_path(self, key):
+        return self.cache_dir / f'{key}.tar.gz'
+
+    def key_for(self, step, plan):
+        """Content address of an install: key file contents, step code, paths, OS/arch
+        and, for virtualenvs, the Python they were made with"""
+        import hashlib
+        import platform
+        base = Path(step.get('workingDir') or '.')
+        material = {
+            'code': step['code'],
+            'language': step['language'],
+            # Virtualenvs hold absolute paths, so they only fit the directory they were made in
+            'workingDir': str(Path(step.get('sourceDir') or base).resolve()),
+            'platform': [platform.system(), platform.machine()],
+            'paths': plan['paths'],
+            'keyFiles': {Path(path).relative_to(base).as_posix(): file_digest(path)
+                         for path in plan['keyFiles']}
+        }
+        if '.venv' in plan['paths']:
+            # A virtualenv only works with the interpreter it was created by
+            import shutil
+            python = shutil.which('python3') or shutil.which('python')
+            material['python'] = [platform.python_version(), python and os.path.realpath(python)]
+        encoded = json.dumps(material, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        """Index entry for key, or None on a miss"""
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            if not self.archive_path(key).exists():
+                del self.index[key]
+                self.dirty = True
+                return None
+            entry['lastUsed'] = datetime.now().timestamp()
+            self.dirty = True
+            return dict(entry)
+
+    def discard(self, key):
+        with self.lock:
+            if self.index.pop(key, None) is not None:
+                self.dirty = True
+        try:
+            self.archive_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def restore(self, key, entry, base):
+        """Replace entry's paths under base with the archived copies.
+
+        The archive's SHA-256 is checked first; raises ArtifactError (after
+        dropping the entry) when it doesn't match or can't be unpacked.
+        """
+        import shutil
+        import tarfile
+        import tempfile
+        archive = self.archive_path(key)
+        try:
+            if file_digest(archive) != entry['sha256']:
+                raise ArtifactError('checksum mismatch')
+        except OSError as e:
+            self.discard(key)
+            raise ArtifactError(str(e))
+        except ArtifactError:
+            self.discard(key)
+            raise
+
+        staging = tempfile.mkdtemp(prefix='.artifact-', dir=base)
+        try:
+            with tarfile.open(archive, 'r:gz') as tar:
+                members = tar.getmembers()
+                for member in members:
+                    parts = Path(member.name).parts
+                    if Path(member.name).is_absolute() or '..' in parts or \
+                            not any(member.name == path or member.name.startswith(path + '/')
+                                    for path in entry['paths']):
+                        raise ArtifactError(f'unexpected archive member {member.name}')
+                if hasattr(tarfile, 'tar_filter'):
+                    tar.extractall(staging, members, filter='tar')
+                else:
+                    tar.extractall(staging, members)
+            for path in entry['paths']:
+                target = os.path.join(base, path)
+                remove_path(target)
+                os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+                os.replace(os.path.join(staging, path), target)
+        except (OSError, tarfile.TarError, ArtifactError) as e:
+            self.discard(key)
+            raise ArtifactError(str(e))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def put(self, key, base, paths):
+        """Archive the existing paths under base; returns the new entry, or None if none exist"""
+        import tarfile
+        paths = [path for path in paths if os.path.lexists(os.path.join(base, path))]
+        if not paths:
+            return None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        archive = self.archive_path(key)
+        tmp_path = archive.with_suffix(f'.{threading.get_ident()}.tmp')
+        try:
+            with tarfile.open(tmp_path, 'w:gz', compresslevel=COMPRESS_LEVEL) as tar:
+                for path in paths:
+                    tar.add(os.path.join(base, path), arcname=Path(path).as_posix())
+            entry = {
+                'paths': [Path(path).as_posix() for path in paths],
+                'size': tmp_path.stat().st_size,
+                'sha256': file_digest(tmp_path),
+                'lastUsed': datetime.now().timestamp()
+            }
+            os.replace(tmp_path, archive)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        with self.lock:
+            self.index[key] = entry
+            self.dirty = True
+            self.evict()
+        return dict(entry)
+
+    def evict(self):
+        """Drop least recently used archives until under the size cap (lock held)"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['lastUsed']):
+            if total <= self.max_size:
+                break
+            total -= self.index.pop(key)['size']
+            self.dirty = True
+            try:
+                self.archive_path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def save(self):
+        """Apply the size cap (which may have been lowered) and persist the LRU index"""
+        with self.lock:
+            self.evict()
+            if not self.dirty:
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
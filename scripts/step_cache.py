@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Step Result Cache
+Content-addressed cache of verification step results, keyed by the step code,
+its environment and the hashes of the files it declares as `inputs:`
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = '.github/readme-verifier/cache'
+DEFAULT_MAX_SIZE_MB = 50
+
+# Environment variables that change what most commands resolve to
+BASE_ENV_VARS = ['PATH']
+
+# $VAR, ${VAR} and %VAR% references in step code
+ENV_REFERENCE = re.compile(r'\$\{?([A-Za-z_][A-Za-z0-9_]*)|%([A-Za-z_][A-Za-z0-9_]*)%')
+
+class FileHasher:
+    """Hashes files in parallel, skipping files whose mtime and size are unchanged"""
+
+    def __init__(self, index_path, workers=None):
+        self.index_path = Path(index_path)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.lock = threading.Lock()
+        self.index = {}
+        self.dirty = False
+
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception:
+                self.index = {}
+
+    def hash_file(self, path):
+        stat = os.stat(path)
+        key = str(Path(path).resolve())
+
+        with self.lock:
+            entry = self.index.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        import hashlib
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        with self.lock:
+            self.index[key] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+            self.dirty = True
+        return digest.hexdigest()
+
+    def hash_files(self, paths):
+        """Return {path: sha256} for the given paths"""
+        paths = list(paths)
+        if len(paths) <= 1:
+            return {str(p): self.hash_file(p) for p in paths}
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip((str(p) for p in paths), pool.map(self.hash_file, paths)))
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+
+class StepCache:
+    """LRU, size-bounded store of step results under cache_dir"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / 'entries'
+        self.index_path = self.cache_dir / 'index.json'
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hasher = FileHasher(self.cache_dir / 'file-hashes.json')
+        self.lock = threading.Lock()
+        self.index = {}
+
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception:
+                self.index = {}
+
+    @staticmethod
+    def is_cacheable(step):
+        """Only steps that declare their inputs are cached, never background services"""
+        return bool(step.get('inputs')) and not step.get('background')
+
+    def input_files(self, step):
+        base = Path(step.get('workingDir') or '.')
+        files = set()
+        for pattern in step.get('inputs', []):
+            for path in base.glob(pattern):
+                if path.is_file():
+                    files.add(path)
+        return sorted(files)
+
+    def relevant_env(self, step, env=None):
+        """Variables of env (the step's environment, default os.environ) that go into its key.
+
+        PATH, the variables the step references, and any variable the
+        verifier set or changed for steps (e.g. the package proxy's).
+        """
+        env = os.environ if env is None else env
+        names = set(BASE_ENV_VARS)
+        for match in ENV_REFERENCE.finditer(step['code']):
+            names.add(match.group(1) or match.group(2))
+        names.update(name for name, value in env.items() if os.environ.get(name) != value)
+        return {name: env.get(name) for name in sorted(names)}
+
+    def key_for(self, step, env=None):
+        """Compute the content address of a step run with env (default os.environ)"""
+        import hashlib
+        import platform
+        base = Path(step.get('workingDir') or '.')
+        file_hashes = self.hasher.hash_files(self.input_files(step))
+        material = {
+            'code': step['code'],
+            'language': step['language'],
+            # An isolated workspace clone stands in for its source directory
+            'workingDir': str(Path(step.get('sourceDir') or base).resolve()),
+            'platform': [platform.system(), platform.machine()],
+            'env': self.relevant_env(step, env),
+            'inputs': {
+                Path(path).relative_to(base).as_posix(): digest
+                for path, digest in sorted(file_hashes.items())
+            }
+        }
+        encoded = json.dumps(material, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        """Return the stored result for key, or None on a miss"""
+        entry_path = self.entries_dir / f'{key}.json'
+        with self.lock:
+            if key not in self.index or not entry_path.exists():
+                self.index.pop(key, None)
+                return None
+            self.index[key]['lastUsed'] = datetime.now().timestamp()
+
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def put(self, key, result):
+        data = json.dumps(result).encode('utf-8')
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self.entries_dir / f'{key}.json'
+        tmp_path = entry_path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, entry_path)
+
+        with self.lock:
+            self.index[key] = {
+                'size': len(data),
+                'lastUsed': datetime.now().timestamp()
+            }
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until under the size cap (lock held)"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['lastUsed']):
+            if total <= self.max_size:
+                break
+            total -= self.index.pop(key)['size']
+            try:
+                (self.entries_dir / f'{key}.json').unlink()
+            except FileNotFoundError:
+                pass
+
+    def save(self):
+        """Persist the LRU index and file hash index"""
+        self.hasher.save()
+        with self.lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Step Output Capture
+Reads a step's stdout/stderr incrementally, spilling the full log to disk and
+keeping only a bounded tail of each stream in memory for results.json. Output
+can also be matched against a step's expect/expectNot patterns as it arrives.
+"""
+
+import codecs
+import re
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_LOGS_DIR = '.github/readme-verifier/logs'
+DEFAULT_OUTPUT_LIMIT_KB = 64
+READ_CHUNK = 64 * 1024
+
+# Longest unfinished line kept for expect/expectNot matching
+MAX_MATCH_LINE = 64 * 1024
+
+def log_file_name(step_name):
+    """Filesystem-safe log name for a step"""
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '-', step_name).strip('-') or 'step'
+    return f'{slug}.log'
+
+def compile_pattern(pattern):
+    """Regex for an expect/expectNot pattern: `/regex/` or `/regex/i`, else a literal substring"""
+    match = re.fullmatch(r'/(.*)/(i?)', pattern, re.DOTALL)
+    if match:
+        return re.compile(match.group(1), re.IGNORECASE if match.group(2) else 0)
+    return re.compile(re.escape(pattern))
+
+class OutputMatcher:
+    """Matches expect/expectNot patterns against output lines as they stream in.
+
+    Lines from stdout and stderr are matched separately, each as soon as it
+    is complete; an unfinished last line (a prompt, a progress bar) is
+    matched too. The verdict is 'expected' once every expect pattern has
+    been seen, or 'unexpected' at the first expectNot match. `event` is set
+    and `on_verdict` called at that moment.
+    """
+
+    def __init__(self, expect=(), expect_not=(), on_verdict=None):
+        self.pending = {pattern: compile_pattern(pattern) for pattern in expect}
+        self.expect_not = [(pattern, compile_pattern(pattern)) for pattern in expect_not]
+        self.on_verdict = on_verdict
+        self.decoders = {}
+        self.partial = {}
+        self.verdict = None
+        self.pattern = None
+        self.line = None
+        self.event = threading.Event()
+
+    def feed(self, name, chunk):
+        if self.verdict:
+            return
+        if name not in self.decoders:
+            self.decoders[name] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        lines = (self.partial.get(name, '') + self.decoders[name].decode(chunk)).split('\n')
+        self.partial[name] = lines.pop()[-MAX_MATCH_LINE:]
+        for line in lines:
+            if self.check(line):
+                return
+        if self.partial[name]:
+            self.check(self.partial[name])
+
+    def check(self, line):
+        """Match one line, returning True once it decided the verdict"""
+        line = line.rstrip('\r')
+        for pattern, regex in self.expect_not:
+            if regex.search(line):
+                return self.decide('unexpected', pattern, line)
+        for pattern in [p for p, regex in self.pending.items() if regex.search(line)]:
+            del self.pending[pattern]
+            if not self.pending:
+                return self.decide('expected', pattern, line)
+        return False
+
+    def decide(self, verdict, pattern, line):
+        self.verdict, self.pattern, self.line = verdict, pattern, line.strip()[:200]
+        self.event.set()
+        if self.on_verdict:
+            self.on_verdict()
+        return True
+
+class RingBuffer:
+    """Keeps the last `limit` bytes written to it"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = bytearray()
+        self.total = 0
+
+    def write(self, chunk):
+        self.total += len(chunk)
+        self.data.extend(chunk)
+        # Trim lazily so appends stay amortized O(1)
+        if len(self.data) > 2 * self.limit:
+            del self.data[:-self.limit]
+
+    def text(self):
+        return bytes(self.data[-self.limit:]).decode('utf-8', errors='replace')
+
+    @property
+    def truncated(self):
+        return self.total > self.limit
+
+class StepOutput:
+    """Drains a process's pipes on background threads"""
+
+    def __init__(self, log_path=None, limit_kb=DEFAULT_OUTPUT_LIMIT_KB):
+        self.log_path = Path(log_path) if log_path else None
+        self.limit = int(limit_kb * 1024)
+        self.buffers = {}
+        self.threads = []
+        self.lock = threading.Lock()
+        self.last_line = ''
+        self.log = None
+        # OutputMatcher for steps with expect/expectNot patterns
+        self.matcher = None
+        # How the step's process tree was stopped, if it was (see terminate_group)
+        self.cleanup = None
+
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self.log = open(self.log_path, 'wb')
+
+    def attach(self, stream, name):
+        """Start draining `stream` (a binary pipe) into the buffer `name`"""
+        self.open(name)
+        thread = threading.Thread(target=self.drain, args=(stream, name), daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def open(self, name):
+        """Create the buffer `name` for output fed in with write()"""
+        self.buffers[name] = RingBuffer(self.limit)
+
+    def write(self, name, chunk):
+        with self.lock:
+            self.buffers[name].write(chunk)
+            if self.log:
+                self.log.write(chunk)
+            lines = chunk.rstrip(b'\n').rsplit(b'\n', 1)
+            if lines[-1].strip():
+                self.last_line = lines[-1].decode('utf-8', errors='replace').strip()
+            if self.matcher:
+                self.matcher.feed(name, chunk)
+
+    def drain(self, stream, name):
+        try:
+            while True:
+                chunk = stream.read1(READ_CHUNK)
+                if not chunk:
+                    break
+                self.write(name, chunk)
+        except (OSError, ValueError):
+            # Pipe closed underneath us (process killed)
+            pass
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def close(self, timeout=None):
+        """Wait up to `timeout` seconds in total for the readers, then close the log"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        with self.lock:
+            if self.log:
+                self.log.close()
+                self.log = None
+
+    @property
+    def total_bytes(self):
+        return sum(buffer.total for buffer in self.buffers.values())
+
+    def text(self, name):
+        """Bounded tail of stream `name`, noting any truncation"""
+        buffer = self.buffers.get(name)
+        if not buffer:
+            return ''
+        text = buffer.text()
+        if buffer.truncated:
+            dropped = buffer.total - buffer.limit
+            where = f', full log: {self.log_path.as_posix()}' if self.log_path else ''
+            text = f'[... {dropped} bytes truncated{where}]\n' + text
+        return text
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Step Process Groups
+Every step runs in its own process group (a new session on POSIX), so the
+npm, node and server processes a step's shell starts can be stopped along
+with it. A timed-out or cancelled step's whole tree gets SIGTERM, then
+SIGKILL once a short grace period has passed. Results record how many
+processes were stopped and how long the cleanup took. Windows has no
+process groups; there the tree is killed with taskkill /T.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+IS_WINDOWS = sys.platform == 'win32'
+HAS_PROC = sys.platform.startswith('linux') and os.path.isdir('/proc')
+
+# Seconds between SIGTERM and SIGKILL when stopping a step's process tree
+DEFAULT_GRACE = 2
+
+# Seconds to wait for the tree to disappear after SIGKILL
+KILL_WAIT = 1
+
+def spawn_options():
+    """Popen keyword arguments that start a step in its own process group"""
+    return {} if IS_WINDOWS else {'start_new_session': True}
+
+def group_members(pgid):
+    """PIDs of the running (not zombie) processes in group pgid, or None where unknown.
+
+    Exited members linger as zombies until whoever inherited them reaps
+    them, which never happens in containers without an init process, so
+    they don't count. Only Linux exposes this, through /proc.
+    """
+    if not HAS_PROC:
+        return None
+    members = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                # "pid (comm) state ppid pgrp ..."; comm may itself contain ")"
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid and fields[0] != b'Z':
+            members.append(int(entry))
+    return members
+
+def group_alive(pgid):
+    """Whether any process in group pgid is still running"""
+    members = group_members(pgid)
+    if members is not None:
+        return bool(members)
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # macOS reports EPERM for a group holding only zombies
+        return False
+
+def signal_group(pgid, signum):
+    try:
+        os.killpg(pgid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def kill_tree_windows(pid):
+    subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def terminate_group(pid, grace=DEFAULT_GRACE):
+    """Stop the process group led by `pid`: SIGTERM, then SIGKILL after `grace` seconds.
+
+    The leader itself is left for the caller to reap (with wait4 for its
+    resource usage). Returns {'signal', 'processes', 'cleanupMs'}: the last
+    signal sent, how many processes were running (None where that can't be
+    told), and how long it took until none were left.
+    """
+    start = time.monotonic()
+    if IS_WINDOWS:
+        kill_tree_windows(pid)
+        return {'signal': 'taskkill', 'processes': None,
+                'cleanupMs': round((time.monotonic() - start) * 1000, 1)}
+
+    members = group_members(pid)
+    sent = 'SIGTERM'
+    signal_group(pid, signal.SIGTERM)
+    deadline = start + grace
+    delay = 0.005
+    while group_alive(pid):
+        now = time.monotonic()
+        if now >= deadline:
+            if sent == 'SIGKILL':
+                break
+            sent = 'SIGKILL'
+            signal_group(pid, signal.SIGKILL)
+            deadline = now + KILL_WAIT
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+    return {'signal': sent, 'processes': len(members) if members is not None else None,
+            'cleanupMs': round((time.monotonic() - start) * 1000, 1)}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Step Resource Accounting
+Reaps step processes with wait4() so each result can report the CPU time,
+peak memory and block I/O of the step's process tree, not just wall time.
+Descendants count once the step's shell has waited for them, which is the
+normal case for commands run in sequence. Where wait4() is unavailable
+(Windows) steps run as before without resource figures.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+HAS_WAIT4 = hasattr(os, 'wait4')
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+MAXRSS_SCALE = 1 / 1024 if sys.platform == 'darwin' else 1
+
+def usage_dict(rusage, duration_ms=None):
+    """Resource figures for results.json from a struct_rusage"""
+    user_ms = rusage.ru_utime * 1000
+    system_ms = rusage.ru_stime * 1000
+    usage = {
+        'cpuUserMs': round(user_ms, 1),
+        'cpuSystemMs': round(system_ms, 1),
+        'maxRssKB': int(rusage.ru_maxrss * MAXRSS_SCALE),
+        'ioReadBlocks': rusage.ru_inblock,
+        'ioWriteBlocks': rusage.ru_oublock
+    }
+    if duration_ms:
+        # Near 100% per core means CPU bound; near 0% means waiting on I/O or the network
+        usage['cpuPercent'] = round((user_ms + system_ms) / duration_ms * 100, 1)
+    return usage
+
+def wait_with_usage(process, timeout, interrupt=None):
+    """Wait up to `timeout` seconds for a Popen process and reap it with wait4.
+
+    Returns (returncode, rusage or None). Raises subprocess.TimeoutExpired
+    like Popen.wait, also early once the `interrupt` event is set; polls
+    with the same backoff Popen.wait uses.
+    """
+    use_wait4 = HAS_WAIT4 and process.returncode is None
+    if not use_wait4 and interrupt is None:
+        return process.wait(timeout=timeout), None
+
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        if use_wait4:
+            try:
+                pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            except ChildProcessError:
+                # Already reaped elsewhere
+                return process.wait(), None
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return process.returncode, rusage
+        elif process.poll() is not None:
+            return process.returncode, None
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (interrupt is not None and interrupt.is_set()):
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
+
+def cpu_ms(usage):
+    return usage['cpuUserMs'] + usage['cpuSystemMs']
+
+def io_blocks(usage):
+    return usage['ioReadBlocks'] + usage['ioWriteBlocks']
+
+def max_rss(usage):
+    return usage['maxRssKB']
+
+def top_consumers(results, measure, count=3):
+    """The `count` step results with the highest measure(resources), skipping zeros"""
+    measured = [r for r in results if r.get('resources') and not r.get('cached')
+                and not r.get('carriedOver') and measure(r['resources']) > 0]
+    measured.sort(key=lambda r: measure(r['resources']), reverse=True)
+    return measured[:count]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Background Service Steps
+Runs `background: true` steps, e.g. "start the server, then in another
+terminal run X". The step's process is started in its own process group and
+counts as finished once its readiness probes pass (a TCP port, an HTTP path
+on a local port, a file, a log line), polled with exponential backoff. It
+keeps running while later steps use it and is torn down at the end of the run.
+"""
+
+import os
+import time
+
+from step_output import compile_pattern
+from step_processes import terminate_group
+
+PROBE_KEYS = ('port', 'http', 'file', 'log', 'host')
+DEFAULT_HOST = '127.0.0.1'
+
+# Readiness polling starts this often and backs off to MAX_PROBE_DELAY
+INITIAL_PROBE_DELAY = 0.05
+MAX_PROBE_DELAY = 1.0
+
+# Seconds a single TCP or HTTP probe may take
+PROBE_TIMEOUT = 1.0
+
+# Seconds a service gets between SIGTERM and SIGKILL to shut down cleanly
+# (execution.serviceKillGrace); servers often need longer than a step's tree
+DEFAULT_SERVICE_GRACE = 5
+
+def parse_probes(ready):
+    """Validated probe settings from a step's `ready:` frontmatter.
+
+    `ready: 8080` is short for `ready: {port: 8080}`. Raises ValueError for
+    settings that could never pass.
+    """
+    if ready is None:
+        return {}
+    if isinstance(ready, int) and not isinstance(ready, bool):
+        ready = {'port': ready}
+    if not isinstance(ready, dict):
+        raise ValueError('ready: must be a port number or a mapping of probes')
+    unknown = sorted(set(ready) - set(PROBE_KEYS))
+    if unknown:
+        raise ValueError(f'Unknown readiness probe(s): {", ".join(unknown)} '
+                         f'(choose from {", ".join(PROBE_KEYS)})')
+    probes = dict(ready)
+    if 'port' in probes and not isinstance(probes['port'], int):
+        raise ValueError(f'ready.port must be a number, not {probes["port"]!r}')
+    if 'http' in probes:
+        if 'port' not in probes:
+            raise ValueError('ready.http needs ready.port')
+        probes['http'] = '/' + str(probes['http']).lstrip('/')
+    if 'log' in probes:
+        probes['log'] = str(probes['log'])
+        compile_pattern(probes['log'])
+    return probes
+
+def port_open(host, port):
+    import socket
+    try:
+        with socket.create_connection((host, port), timeout=PROBE_TIMEOUT) as connection:
+            # Connecting to a free local port in the ephemeral range can connect the socket to itself
+            return connection.getsockname() != connection.getpeername()
+    except OSError:
+        return False
+
+def http_ok(host, port, path):
+    """Whether GET http://host:port/path answers with a non-error status"""
+    import http.client
+    connection = http.client.HTTPConnection(host, port, timeout=PROBE_TIMEOUT)
+    try:
+        connection.request('GET', path)
+        return connection.getresponse().status < 400
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        connection.close()
+
+class BackgroundService:
+    """A `background: true` step's process, from readiness until teardown"""
+
+    def __init__(self, step, process, capture, result):
+        self.step = step
+        self.process = process
+        self.capture = capture
+        self.result = result
+        self.started = time.monotonic()
+        probes = step.get('ready') or {}
+        host = probes.get('host', DEFAULT_HOST)
+        # (description, check) pairs; a check that passed once is not repeated
+        self.probes = []
+        if 'port' in probes and 'http' not in probes:
+            self.probes.append((f'port {probes["port"]}', lambda: port_open(host, probes['port'])))
+        if 'http' in probes:
+            self.probes.append((f'http://{host}:{probes["port"]}{probes["http"]}',
+                                lambda: http_ok(host, probes['port'], probes['http'])))
+        if 'file' in probes:
+            path = os.path.join(step['workingDir'], probes['file'])
+            self.probes.append((f'file {probes["file"]}', lambda: os.path.exists(path)))
+        if capture.matcher and capture.matcher.pending:
+            patterns = ', '.join(f'"{p}"' for p in capture.matcher.pending)
+            self.probes.append((f'log {patterns}', lambda: capture.matcher.verdict == 'expected'))
+        self.passed = set()
+
+    @property
+    def descriptions(self):
+        return [description for description, _ in self.probes]
+
+    def pending(self):
+        """Descriptions of the probes that haven't passed yet"""
+        for description, check in self.probes:
+            if description not in self.passed and check():
+                self.passed.add(description)
+        return [description for description in self.descriptions if description not in self.passed]
+
+    def wait_ready(self, timeout, progress=None, interval=10):
+        """Poll the probes with exponential backoff until all pass.
+
+        Returns None once ready, else why not: an expectNot match, the
+        process exiting, or `timeout` seconds passing. `progress(elapsed)`
+        is called every `interval` seconds.
+        """
+        matcher = self.capture.matcher
+        deadline = self.started + timeout
+        next_progress = self.started + interval
+        delay = INITIAL_PROBE_DELAY
+        while True:
+            if matcher and matcher.verdict == 'unexpected':
+                return f'Output matched expectNot pattern "{matcher.pattern}": {matcher.line}'
+            pending = self.pending()
+            if not pending:
+                return None
+            if self.process.poll() is not None:
+                return f'Exited with code {self.process.returncode} before becoming ready'
+
+            now = time.monotonic()
+            if now >= deadline:
+                return f'Not ready after {timeout}s, still waiting for {", ".join(pending)}'
+            if progress and now >= next_progress:
+                progress(now - self.started)
+                next_progress = now + interval
+            # A log line wakes the wait early, until the log probe has its verdict
+            # (the event then stays set and would no longer pause at all)
+            pause = min(delay, deadline - now)
+            if matcher and matcher.verdict is None:
+                matcher.event.wait(pause)
+            else:
+                time.sleep(pause)
+            delay = min(delay * 2, MAX_PROBE_DELAY)
+
+    def stop(self, grace=DEFAULT_SERVICE_GRACE):
+        """Tear down the service's whole process group (see terminate_group).
+
+        Returns (how, cleanup): how the service ended, 'exited' (on its own,
+        before teardown), 'terminated' or 'killed', and the cleanup figures.
+        """
+        exited = self.process.poll() is not None
+        # Even a shell that exited on its own may have left processes behind
+        cleanup = terminate_group(self.process.pid, grace)
+        self.process.wait()
+        self.capture.close(timeout=1)
+        how = 'exited' if exited else 'killed' if cleanup['signal'] == 'SIGKILL' else 'terminated'
+        return how, cleanup
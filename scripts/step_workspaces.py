@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Isolated Step Workspaces
+Gives each independent branch of parallel steps its own clone of the project
+tree (execution.isolation), so steps writing build dirs, node_modules or
+.venv don't trample each other. Trees are cloned with reflinks where the
+filesystem supports them, as hardlink farms on request, or by copying.
+After a branch finishes its changes are merged back, or discarded.
+"""
+
+import ctypes
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+STRATEGIES = ('auto', 'reflink', 'hardlink', 'copy')
+DEFAULT_EXCLUDE = ['.git']
+
+# ioctl number for Linux FICLONE (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+class ReflinkUnsupported(Exception):
+    """Raised on the first file a filesystem can't clone.
+
+    Not an OSError, so copytree stops at once instead of trying every file.
+    """
+
+def reflink_file(src, dst):
+    """Copy-on-write clone of one file; raises OSError where unsupported"""
+    if sys.platform == 'darwin':
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), src)
+    elif sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            try:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            except OSError:
+                target.close()
+                os.unlink(dst)
+                raise
+    else:
+        raise OSError(errno.EOPNOTSUPP, 'reflinks are not supported on this platform', src)
+    shutil.copystat(src, dst)
+    return dst
+
+def exclusion_filter(exclude=(), skip_paths=()):
+    """copytree `ignore` callable leaving out names matching `exclude` and the paths in skip_paths"""
+    patterns = shutil.ignore_patterns(*exclude)
+    skip = {os.path.abspath(path) for path in skip_paths}
+
+    def ignore(directory, names):
+        ignored = set(patterns(directory, names))
+        if skip:
+            ignored.update(name for name in names
+                           if os.path.abspath(os.path.join(directory, name)) in skip)
+        return ignored
+    return ignore
+
+def clone_tree(src, dst, strategy='auto', exclude=(), skip_paths=()):
+    """Clone directory src to dst, returning the strategy actually used.
+
+    'auto' tries reflinks and falls back to copying on the first file the
+    filesystem can't clone. Hardlinked files share their inode with the
+    original, so a step editing one in place (rather than replacing it)
+    also edits the source tree.
+    """
+    ignore = exclusion_filter(exclude, skip_paths)
+
+    if strategy in ('auto', 'reflink'):
+        def reflink_or_stop(source, target):
+            try:
+                return reflink_file(source, target)
+            except OSError as e:
+                raise ReflinkUnsupported(e) from e
+
+        try:
+            shutil.copytree(src, dst, symlinks=True, ignore=ignore, copy_function=reflink_or_stop)
+            return 'reflink'
+        except ReflinkUnsupported as e:
+            shutil.rmtree(dst, ignore_errors=True)
+            if strategy == 'reflink':
+                raise e.__cause__
+        strategy = 'copy'
+
+    copy = os.link if strategy == 'hardlink' else shutil.copy2
+    shutil.copytree(src, dst, symlinks=True, ignore=ignore, copy_function=copy)
+    return strategy
+
+def snapshot(root):
+    """{relative path: (size, mtime_ns)} for every file under root"""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            info = os.stat(path, follow_symlinks=False)
+            files[os.path.relpath(path, root)] = (info.st_size, info.st_mtime_ns)
+    return files
+
+def changed_files(root, before):
+    """Relative paths of files under root that are new or changed since snapshot `before`.
+
+    Comparing with the clone's own snapshot, not the source tree, means files
+    that change in the source during the run are never overwritten with
+    stale copies.
+    """
+    for relative, stat in snapshot(root).items():
+        if before.get(relative) != stat:
+            yield relative
+
+class WorkspacePool:
+    """Runs each dependsOn-connected group of steps in its own tree clone.
+
+    Steps linked by dependsOn share a workspace, since later steps build on
+    earlier ones; unrelated groups are isolated from each other. A group's
+    workspace is cloned when its first step starts and merged back (or
+    discarded) once its last step finishes.
+    """
+
+    def __init__(self, root, groups, settings, execute, skip_paths=(), log=print):
+        self.root = os.path.abspath(root)
+        self.settings = settings
+        self.execute_step = execute
+        self.log = log
+        self.strategy = settings.get('strategy', 'auto')
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f'Unknown isolation strategy "{self.strategy}" '
+                             f'(choose from {", ".join(STRATEGIES)})')
+        self.exclude = settings.get('exclude', DEFAULT_EXCLUDE) or []
+        self.merge = settings.get('merge', True)
+        # The verifier's own logs, cache and results must not be cloned or merged back
+        self.skip_paths = skip_paths
+        self.base = tempfile.mkdtemp(prefix='readme-workspaces-')
+        self.lock = threading.Lock()
+        self.merged_by = {}
+        self.clone_ms = 0
+
+        # group id -> state; groups maps id(step) -> group id
+        self.group_of = groups
+        self.groups = {}
+        for group in groups.values():
+            state = self.groups.setdefault(group, {'pending': 0, 'path': None, 'failed': False,
+                                                   'ready': threading.Event(), 'error': None,
+                                                   'manifest': {}})
+            state['pending'] += 1
+
+    def workspace(self, group):
+        """Path of a group's clone, creating it on first use"""
+        state = self.groups[group]
+        with self.lock:
+            owner = state['path'] is None
+            if owner:
+                state['path'] = os.path.join(self.base, f'group-{group}')
+        if owner:
+            try:
+                start = time.perf_counter()
+                used = clone_tree(self.root, state['path'], self.strategy, self.exclude,
+                                  self.skip_paths)
+                state['manifest'] = snapshot(state['path'])
+                elapsed = (time.perf_counter() - start) * 1000
+                with self.lock:
+                    self.clone_ms += elapsed
+                    if self.strategy == 'auto' and used != 'reflink':
+                        # Don't retry reflinks for every group on a filesystem without them
+                        self.strategy = used
+                self.log(f'   📂 Workspace for group {group} cloned ({used}, {elapsed:.0f}ms)')
+            except Exception as e:
+                state['error'] = e
+            finally:
+                state['ready'].set()
+        state['ready'].wait()
+        if state['error']:
+            raise RuntimeError(f'Could not create isolated workspace: {state["error"]}')
+        return state['path']
+
+    def map_step(self, step, workspace):
+        """Copy of step whose workingDir points into the workspace"""
+        directory = os.path.abspath(step['workingDir'])
+        relative = os.path.relpath(directory, self.root)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            # Outside the cloned tree, run it in place
+            return step
+        return dict(step, workingDir=os.path.normpath(os.path.join(workspace, relative)),
+                    sourceDir=step['workingDir'])
+
+    def execute(self, step):
+        """Run a step inside its group's workspace (the run_parallel `execute` hook)"""
+        group = self.group_of[id(step)]
+        failed = True
+        try:
+            result = self.execute_step(self.map_step(step, self.workspace(group)))
+            # Even a non-required failure leaves the group's changes unmerged
+            failed = result['status'] not in ('success', 'slow')
+            return result
+        finally:
+            self.finish(group, failed)
+
+    def finish(self, group, failed):
+        state = self.groups[group]
+        with self.lock:
+            state['failed'] = state['failed'] or failed
+            state['pending'] -= 1
+            done = state['pending'] == 0
+        if done:
+            self.release(group)
+
+    def release(self, group):
+        """Merge a finished group's changes back if every step passed, then delete its clone"""
+        state = self.groups[group]
+        path = state['path']
+        if not path or not os.path.isdir(path):
+            return
+        if self.merge and not state['failed']:
+            self.merge_back(group, path, state['manifest'])
+        shutil.rmtree(path, ignore_errors=True)
+
+    def merge_back(self, group, path, manifest):
+        changed = list(changed_files(path, manifest))
+        with self.lock:
+            # Earlier group that merged each file this group also changed
+            conflicts = {f: self.merged_by[f] for f in changed if self.merged_by.get(f, group) != group}
+            for relative in changed:
+                self.merged_by[relative] = group
+        for relative in changed:
+            target = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.islink(target) or os.path.isfile(target):
+                os.unlink(target)
+            shutil.copy2(os.path.join(path, relative), target, follow_symlinks=False)
+        if changed:
+            self.log(f'   📂 Merged {len(changed)} changed file(s) from group {group}')
+        if conflicts:
+            others = ', '.join(str(g) for g in sorted(set(conflicts.values())))
+            self.log(f'   ⚠️  Group {group} overwrote changes from group {others}: '
+                     f'{", ".join(list(conflicts)[:5])}' + (' ...' if len(conflicts) > 5 else ''))
+
+    def close(self):
+        """Discard workspaces of groups that never finished (e.g. after a required failure)"""
+        for group, state in self.groups.items():
+            if state['pending'] > 0 and state['path']:
+                shutil.rmtree(state['path'], ignore_errors=True)
+        shutil.rmtree(self.base, ignore_errors=True)
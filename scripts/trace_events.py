@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Run Timeline Tracing
+Records timed spans (README parse, YAML load, process spawn, execution,
+output drain, results save, README rewrite) and exports them as Chrome Trace
+Event JSON, which opens in https://ui.perfetto.dev or chrome://tracing.
+Each thread (or asyncio task slot) gets its own track, so parallel workers
+show up side by side.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Track name set by asyncio tasks, which all share the event loop's thread
+current_track = contextvars.ContextVar('current_track', default=None)
+
+class Tracer:
+    """Collects complete ('X') trace events; a disabled tracer records nothing"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.events = []
+        self.tracks = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+
+    def use_track(self, name):
+        """Record spans from the current context (e.g. an asyncio task) on track `name`"""
+        current_track.set(name)
+
+    def track_id(self):
+        """Small stable id for the calling thread or task track, naming it on first use"""
+        ident = current_track.get() or threading.get_ident()
+        with self.lock:
+            if ident not in self.tracks:
+                tid = len(self.tracks) + 1
+                self.tracks[ident] = tid
+                if isinstance(ident, str):
+                    name = ident
+                elif threading.current_thread() is threading.main_thread():
+                    name = 'main'
+                else:
+                    name = f'worker {tid - 1}'
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid,
+                                    'tid': tid, 'args': {'name': name}})
+            return self.tracks[ident]
+
+    def now(self):
+        """Microseconds since the tracer was created"""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category='verifier', **args):
+        """Record the enclosed block as one span on the current thread's track"""
+        if not self.enabled:
+            yield
+            return
+
+        tid = self.track_id()
+        start = self.now()
+        try:
+            yield
+        finally:
+            event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid,
+                     'tid': tid, 'ts': round(start, 1), 'dur': round(self.now() - start, 1)}
+            if args:
+                event['args'] = args
+            with self.lock:
+                self.events.append(event)
+
+    def export(self, path):
+        """Write the Chrome Trace Event JSON file"""
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            events = sorted(self.events, key=lambda e: (e.get('ts', -1), -e.get('dur', 0)))
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Verification History Store
+SQLite database of verification runs and per-step results, used for trend
+queries and as the duration baseline for scheduling. Honors the
+storage.keepHistory / historyPath / historyLimit settings in config.yml.
+
+Usage:
+    python scripts/verification_history.py record results.json [...]
+    python scripts/verification_history.py steps [--os Linux] [--runs 30] [--sort cpu]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+DEFAULT_HISTORY_DIR = '.github/readme-verifier/history/'
+DEFAULT_HISTORY_LIMIT = 30
+DB_NAME = 'history.sqlite'
+DEFAULT_CONFIG_PATH = '.github/readme-verifier/config.yml'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    os TEXT NOT NULL,
+    arch TEXT,
+    readme TEXT NOT NULL DEFAULT '',
+    total INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    warnings INTEGER NOT NULL,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (os, timestamp, readme)
+);
+CREATE INDEX IF NOT EXISTS runs_by_os_time ON runs (os, timestamp);
+
+CREATE TABLE IF NOT EXISTS step_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    os TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL,
+    exit_code INTEGER,
+    output_hash TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    cpu_ms REAL,
+    max_rss_kb INTEGER,
+    io_blocks INTEGER,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS steps_by_name_os ON step_results (name, os, run_id);
+"""
+
+# Columns added after the first schema version, for upgrading existing files
+ADDED_COLUMNS = {
+    'step_results': [('cpu_ms', 'REAL'), ('max_rss_kb', 'INTEGER'), ('io_blocks', 'INTEGER')]
+}
+
+SORT_KEYS = {
+    'name': None,
+    'duration': 'medianDuration',
+    'cpu': 'medianCpuMs',
+    'rss': 'peakRssKB',
+    'io': 'medianIoBlocks'
+}
+
+def output_hash(result):
+    """Stable hash of a step's captured output"""
+    import hashlib
+    text = (result.get('output') or '') + '\0' + (result.get('error') or '')
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+def count_statuses(steps):
+    counts = {'success': 0, 'failed': 0, 'warning': 0, 'skipped': 0}
+    for step in steps:
+        # A slow step still passed
+        status = 'success' if step.get('status') == 'slow' else step.get('status')
+        if status in counts:
+            counts[status] += 1
+    return counts
+
+def resource_columns(step):
+    """(cpu_ms, max_rss_kb, io_blocks) for a step result, None where not measured"""
+    usage = step.get('resources')
+    if not usage or step.get('cached') or step.get('carriedOver'):
+        return None, None, None
+    return (usage['cpuUserMs'] + usage['cpuSystemMs'], usage['maxRssKB'],
+            usage['ioReadBlocks'] + usage['ioWriteBlocks'])
+
+def detect_slowdown(duration, samples, threshold=3.5, min_ratio=1.2, min_delta=250):
+    """Compare a duration (ms) with past samples using median and MAD.
+
+    The robust score is how many scaled MADs the duration sits above the
+    median. A step is slow when the score reaches `threshold` and it is also
+    at least `min_ratio` times and `min_delta` ms slower than the median,
+    so tiny or very stable steps aren't flagged for noise.
+    """
+    import statistics
+
+    median = statistics.median(samples)
+    mad = statistics.median(abs(sample - median) for sample in samples)
+    # 1.4826 * MAD estimates the standard deviation for normal data
+    scale = max(1.4826 * mad, 0.05 * median, 1.0)
+    score = (duration - median) / scale
+    return {
+        'median': round(median, 1),
+        'mad': round(mad, 1),
+        'runs': len(samples),
+        'score': round(score, 2),
+        'slow': score >= threshold and duration >= median * min_ratio
+                and duration - median >= min_delta
+    }
+
+class HistoryStore:
+    """Indexed run/step history backed by a local SQLite file"""
+
+    def __init__(self, path, limit=DEFAULT_HISTORY_LIMIT):
+        self.path = Path(path)
+        self.limit = limit
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        import sqlite3
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        self.upgrade_schema()
+
+    def upgrade_schema(self):
+        """Add columns that history files from older versions lack"""
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+            for name, kind in columns:
+                if name not in existing:
+                    self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {kind}')
+
+    @classmethod
+    def from_config(cls, config, path=None, limit=None):
+        """Open the store described by storage.* in config, or None if disabled.
+
+        `path` and `limit`, when given, override storage.historyPath and
+        historyLimit; an explicit path opens the store even with
+        keepHistory off.
+        """
+        storage = config.get('storage', {})
+        if path is None and not storage.get('keepHistory', False):
+            return None
+        if path is None:
+            path = Path(storage.get('historyPath', DEFAULT_HISTORY_DIR)) / DB_NAME
+        if limit is None:
+            limit = storage.get('historyLimit', DEFAULT_HISTORY_LIMIT)
+        return cls(path, limit)
+
+    def record(self, results):
+        """Insert one results.json payload in a single transaction.
+
+        Returns the run id, or None if this run was already recorded.
+        """
+        readme = results.get('readme', '')
+        environment = results.get('environment', {})
+        os_name = environment.get('os', 'unknown')
+        steps = results.get('steps', [])
+        counts = count_statuses(steps)
+
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO runs (timestamp, os, arch, readme, total, success, '
+                'failed, warnings, skipped) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (results.get('timestamp', ''), os_name, environment.get('arch'), readme,
+                 len(steps), counts['success'], counts['failed'], counts['warning'],
+                 counts['skipped'])
+            )
+            if cursor.rowcount == 0:
+                return None
+            run_id = cursor.lastrowid
+
+            self.conn.executemany(
+                'INSERT INTO step_results (run_id, position, name, os, status, duration, '
+                'exit_code, output_hash, cached, cpu_ms, max_rss_kb, io_blocks) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (run_id, position, step.get('name', ''), os_name, step.get('status', ''),
+                     step.get('duration'), step.get('exitCode'), output_hash(step),
+                     int(bool(step.get('cached') or step.get('carriedOver'))),
+                     *resource_columns(step))
+                    for position, step in enumerate(steps)
+                ]
+            )
+            self.enforce_limit(os_name, readme)
+
+        return run_id
+
+    def enforce_limit(self, os_name, readme):
+        """Keep only the newest `limit` runs per OS and README"""
+        if not self.limit:
+            return
+        self.conn.execute(
+            'DELETE FROM runs WHERE os = ? AND readme = ? AND id NOT IN ('
+            'SELECT id FROM runs WHERE os = ? AND readme = ? '
+            'ORDER BY timestamp DESC LIMIT ?)',
+            (os_name, readme, os_name, readme, self.limit)
+        )
+
+    def recent_durations(self, os_name, runs=None, readme=''):
+        """{step name: [durations, newest first]} over the last `runs` runs.
+
+        Cached and carried-over results are left out since nothing ran.
+        """
+        rows = self.conn.execute(
+            'SELECT s.name, s.duration FROM step_results s '
+            'JOIN (SELECT id, timestamp FROM runs WHERE os = ? AND readme = ? '
+            'ORDER BY timestamp DESC LIMIT ?) r ON s.run_id = r.id '
+            "WHERE s.cached = 0 AND s.status IN ('success', 'slow', 'warning') "
+            'ORDER BY r.timestamp DESC',
+            (os_name, readme, runs or self.limit or -1)
+        )
+        durations = {}
+        for name, duration in rows:
+            if duration is not None:
+                durations.setdefault(name, []).append(duration)
+        return durations
+
+    def step_summary(self, os_name=None, runs=None, sort='name'):
+        """Per-step run count, pass rate, median duration and resource use.
+
+        `sort` is one of SORT_KEYS; anything but 'name' lists the top
+        consumers first.
+        """
+        query = ('SELECT s.os, s.name, s.status, s.duration, s.cpu_ms, s.max_rss_kb, s.io_blocks '
+                 'FROM step_results s JOIN runs r ON s.run_id = r.id')
+        params = []
+        if os_name:
+            query += ' WHERE s.os = ?'
+            params.append(os_name)
+        query += ' ORDER BY r.timestamp DESC'
+
+        stats = {}
+        for row_os, name, status, duration, cpu, rss, io in self.conn.execute(query, params):
+            entry = stats.setdefault((row_os, name), {'statuses': [], 'durations': [], 'cpu': [],
+                                                      'rss': [], 'io': []})
+            if runs and len(entry['statuses']) >= runs:
+                continue
+            entry['statuses'].append(status)
+            for key, value in (('durations', duration), ('cpu', cpu), ('rss', rss), ('io', io)):
+                if value is not None and (value or key != 'durations'):
+                    entry[key].append(value)
+
+        import statistics
+
+        def median(values):
+            return statistics.median(values) if values else 0
+
+        summary = [
+            {
+                'os': row_os,
+                'name': name,
+                'runs': len(entry['statuses']),
+                'passRate': round(sum(status in ('success', 'slow') for status in entry['statuses'])
+                                  / len(entry['statuses']) * 100),
+                'medianDuration': median(entry['durations']),
+                'medianCpuMs': median(entry['cpu']),
+                'peakRssKB': max(entry['rss'], default=0),
+                'medianIoBlocks': median(entry['io'])
+            }
+            for (row_os, name), entry in sorted(stats.items())
+        ]
+        if SORT_KEYS.get(sort):
+            summary.sort(key=lambda row: row[SORT_KEYS[sort]], reverse=True)
+        return summary
+
+    def close(self):
+        self.conn.close()
+
+def load_config(path):
+    """Parsed config.yml, or {} when there is none"""
+    if not Path(path).exists():
+        return {}
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+def main():
+    parser = argparse.ArgumentParser(description='Verification history store')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH,
+                        help='config.yml whose storage.* settings locate the store')
+    parser.add_argument('--db', default=None,
+                        help='SQLite history file (default: <storage.historyPath>/history.sqlite)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Runs kept per OS (default: storage.historyLimit)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Record results.json files')
+    record.add_argument('files', nargs='+')
+
+    steps = commands.add_parser('steps', help='Per-step pass rate, duration and resource use')
+    steps.add_argument('--os', default=None)
+    steps.add_argument('--runs', type=int, default=None)
+    steps.add_argument('--sort', choices=sorted(SORT_KEYS), default='name',
+                       help='List the top consumers of a resource first')
+
+    args = parser.parse_args()
+    store = HistoryStore.from_config(load_config(args.config), args.db, args.limit)
+    if store is None:
+        print(f'History is off (storage.keepHistory in {args.config}); pass --db to use a store anyway')
+        return 0
+
+    if args.command == 'record':
+        for results_file in args.files:
+            with open(results_file, encoding='utf-8') as f:
+                run_id = store.record(json.load(f))
+            print(f'{results_file}: ' + (f'recorded as run {run_id}' if run_id else 'already recorded'))
+    else:
+        print(f'{"OS":<10} {"Step":<30} {"Runs":>5} {"Pass":>6} {"Median":>10} '
+              f'{"CPU":>10} {"Peak RSS":>10} {"I/O blocks":>11}')
+        for row in store.step_summary(args.os, args.runs, args.sort):
+            print(f'{row["os"]:<10} {row["name"][:30]:<30} {row["runs"]:>5} '
+                  f'{row["passRate"]:>5}% {row["medianDuration"]:>8.0f}ms '
+                  f'{row["medianCpuMs"]:>8.0f}ms {row["peakRssKB"] / 1024:>7.0f} MB '
+                  f'{row["medianIoBlocks"]:>11.0f}')
+
+    store.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
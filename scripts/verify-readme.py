@@ -8,17 +8,55 @@ import re
 import json
 import subprocess
 import sys
-import yaml
+import argparse
+import heapq
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-import platform
 import os
 
+from readme_markdown import iter_step_blocks, rewrite_badge_section, parse_flat_frontmatter
+from step_cache import StepCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB
+from step_artifacts import ArtifactCache, ArtifactError, artifact_plan, check_paths, ARTIFACT_MAX_SIZE_MB
+from step_output import StepOutput, OutputMatcher, compile_pattern, log_file_name, DEFAULT_LOGS_DIR, DEFAULT_OUTPUT_LIMIT_KB, READ_CHUNK
+from shell_session import ShellSession, StepSkipped, find_shell
+from verification_history import HistoryStore, detect_slowdown, DEFAULT_HISTORY_DIR
+from trace_events import Tracer
+from results_aggregator import (load_combined, summarize, success_rate, overall_stats, find_platform,
+                                PLATFORM_ALIASES)
+from step_services import DEFAULT_SERVICE_GRACE, BackgroundService, parse_probes
+from step_processes import DEFAULT_GRACE, spawn_options, terminate_group
+from step_resources import wait_with_usage, usage_dict, top_consumers, cpu_ms, max_rss, io_blocks
+
+# Seconds between progress lines for long-running steps
+PROGRESS_INTERVAL = 10
+
+# Most consecutive one-line steps sent to a shell session in a single write
+DEFAULT_BATCH_SIZE = 10
+
+DEFAULT_RESULTS_PATH = '.github/readme-verifier/results.json'
+
+# Parsed config.yml and the environment description, reused while unchanged
+CONFIG_CACHE_PATH = Path(DEFAULT_CACHE_DIR) / 'config.json'
+ENVIRONMENT_CACHE_PATH = Path(DEFAULT_CACHE_DIR) / 'environment.json'
+
+# `@@ -a,b +c,d @@` hunk header in a zero-context git diff
+HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+# Set by --import-time on the re-run it profiles: the wall-clock launch time
+LAUNCH_ENV = 'README_VERIFIER_LAUNCHED'
+
+# Imports listed by the --import-time report
+IMPORT_REPORT_LIMIT = 12
+
 # Fix Windows encoding issues with emojis
 IS_WINDOWS = sys.platform == 'win32'
 
-# Set UTF-8 encoding for Windows
-if IS_WINDOWS:
+def configure_console():
+    """Set UTF-8 encoding for Windows (called by main(), not at import)"""
+    if not IS_WINDOWS:
+        return
     os.environ['PYTHONIOENCODING'] = 'utf-8'
     try:
         if hasattr(sys.stdout, 'reconfigure'):
@@ -28,6 +66,30 @@ if IS_WINDOWS:
     except:
         pass
 
+def read_startup_cache(path, key):
+    """Value saved by write_startup_cache under the same key, or None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached['value'] if cached['key'] == key else None
+    except Exception:
+        return None
+
+def write_startup_cache(path, key, value):
+    """Save a value that is slow to compute at startup, if JSON holds it losslessly"""
+    try:
+        # Only values that survive a JSON round trip unchanged (no dates, int keys...)
+        encoded = json.dumps({'key': key, 'value': value})
+        if json.loads(encoded)['value'] != value:
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(path).with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+    except Exception:
+        pass
+
 # Emoji replacements for Windows terminal
 EMOJI_MAP = {
     '🚀': '[START]',
@@ -39,6 +101,20 @@ EMOJI_MAP = {
     '💾': '[SAVE]',
     '📝': '[UPDATE]',
     '📈': '[RATE]',
+    '♻️': '[CACHED]',
+    '⏳': '[...]',
+    '⏭️': '[SKIP]',
+    '🐢': '[SLOW]',
+    '🕒': '[TRACE]',
+    '📂': '[WORKSPACE]',
+    '🧩': '[SHARD]',
+    '👀': '[WATCH]',
+    '⏱️': '[TIME]',
+    '🎯': '[EXPECT]',
+    '🛰️': '[SERVICE]',
+    '🧹': '[CLEANUP]',
+    '📦': '[ARTIFACTS]',
+    '🗄️': '[PROXY]',
 }
 
 def format_output(text):
@@ -56,62 +132,435 @@ def safe_print(text):
         # Fallback: remove all non-ASCII characters
         print(text.encode('ascii', 'ignore').decode('ascii'))
 
+def has_expectations(step):
+    """Whether a step's output is matched against expect/expectNot patterns"""
+    return bool(step.get('expect') or step.get('expectNot'))
+
 class ReadmeVerifier:
-    def __init__(self, readme_path, config_path=None):
+    def __init__(self, readme_path, config_path=None, jobs=None, use_cache=True,
+                 since=None, previous_results=None, max_time=None, tracer=None, shard=None):
         self.readme_path = readme_path
+        # Bytes read by parse_readme, reused when rewriting the badge section
+        self.readme_bytes = None
+        self.readme_stat = None
+        # {frontmatter text: parsed YAML}, kept between parses in --watch mode
+        self.frontmatter_cache = None
+        # Launch time reported with the first step (set for --import-time re-runs)
+        self.launched = None
+        # BackgroundService for each running `background: true` step
+        self.services = []
+        # Caching package proxy (proxy.enabled) and the environment pointing steps at it
+        self.proxy = None
+        self.step_env = None
         self.config_path = config_path
+        self.config = self.load_config()
+        self.jobs = jobs
+        self.since = since
+        self.previous_results = previous_results or self.config.get('storage', {}).get(
+            'resultsPath', DEFAULT_RESULTS_PATH)
+        self.cache = self.create_cache() if use_cache else None
+        self.artifacts = self.create_artifact_cache() if use_cache else None
+        # Seconds a stopped step's processes get between SIGTERM and SIGKILL
+        self.kill_grace = self.config.get('execution', {}).get('killGrace', DEFAULT_GRACE)
+        # The same for background services torn down at the end of the run
+        self.service_kill_grace = self.config.get('execution', {}).get(
+            'serviceKillGrace', DEFAULT_SERVICE_GRACE)
+        self.session = None
+        self.logs_dir = Path(self.config.get('storage', {}).get('logsPath', DEFAULT_LOGS_DIR))
+        self.base_dir = None
+        self.max_time = max_time
+        self.deadline = None
+        self.expected_durations = {}
+        self.tracer = tracer or Tracer(enabled=False)
         self.results = {
             'timestamp': datetime.now().isoformat(),
+            'readme': Path(readme_path).as_posix(),
             'environment': self.get_environment(),
             'steps': []
         }
+        # (i, N) for --shard i/N; the results only cover this shard's steps
+        self.shard = shard
+        if shard:
+            self.results['shard'] = f'{shard[0]}/{shard[1]}'
+    
+    def load_config(self):
+        """Load verifier configuration, returning an empty dict if missing.
+        
+        The parsed config is kept as JSON in the cache directory, so runs
+        with an unchanged config.yml don't need to import yaml.
+        """
+        if not self.config_path or not Path(self.config_path).exists():
+            return {}
+        
+        info = os.stat(self.config_path)
+        key = [os.path.abspath(self.config_path), info.st_mtime_ns, info.st_size]
+        cached = read_startup_cache(CONFIG_CACHE_PATH, key)
+        if cached is not None:
+            return cached
+        
+        try:
+            import yaml
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except Exception as e:
+            safe_print(f'Warning: Failed to load config {self.config_path}: {e}')
+            return {}
+        
+        write_startup_cache(CONFIG_CACHE_PATH, key, config)
+        return config
+    
+    def create_cache(self):
+        """Create the step result cache unless disabled in config"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', True):
+            return None
+        
+        return StepCache(
+            cache_config.get('path', DEFAULT_CACHE_DIR),
+            cache_config.get('maxSizeMB', DEFAULT_MAX_SIZE_MB)
+        )
+    
+    def create_artifact_cache(self):
+        """Create the install artifact cache unless disabled in config"""
+        cache_config = self.config.get('cache', {})
+        settings = cache_config.get('artifacts', {})
+        if not cache_config.get('enabled', True) or not settings.get('enabled', True):
+            return None
+        
+        path = settings.get('path') or Path(cache_config.get('path', DEFAULT_CACHE_DIR)) / 'artifacts'
+        return ArtifactCache(path, settings.get('maxSizeMB', ARTIFACT_MAX_SIZE_MB))
     
     def get_environment(self):
+        """Describe this machine, cached per interpreter and OS release.
+        
+        platform.platform() runs `uname -p` and scans the interpreter binary.
+        """
+        system = list(os.uname()) if hasattr(os, 'uname') else list(sys.getwindowsversion()[:4])
+        key = [sys.executable, sys.version, system]
+        environment = read_startup_cache(ENVIRONMENT_CACHE_PATH, key)
+        if environment is None:
+            import platform
+            environment = {
+                'os': platform.system(),
+                'arch': platform.machine(),
+                'pythonVersion': sys.version.split()[0],
+                'platform': platform.platform()
+            }
+            write_startup_cache(ENVIRONMENT_CACHE_PATH, key, environment)
+        return environment
+    
+    def read_readme(self):
+        """README bytes, read once and reused unless the file changed on disk since"""
+        info = os.stat(self.readme_path)
+        key = (info.st_mtime_ns, info.st_size)
+        if self.readme_bytes is None or self.readme_stat != key:
+            with open(self.readme_path, 'rb') as f:
+                self.readme_bytes = f.read()
+            self.readme_stat = key
+        return self.readme_bytes
+    
+    def parse_readme(self, blocks=None):
+        """Parse README.md and extract verification steps.
+        
+        `blocks` are step blocks already tokenized from the README (see --watch).
+        """
+        with self.tracer.span('parse README', readme=self.readme_path):
+            steps = []
+            
+            if blocks is None:
+                blocks = iter_step_blocks(self.read_readme().decode('utf-8').split('\n'))
+            for block in blocks:
+                # Pre-filter to only parse blocks that contain 'verify' keyword
+                if 'verify' not in block['frontmatter']:
+                    continue
+                
+                try:
+                    with self.tracer.span('load YAML', line=block['lineStart']):
+                        frontmatter = self.load_frontmatter(block['frontmatter'])
+                    
+                    if isinstance(frontmatter, dict) and frontmatter.get('verify'):
+                        expect = self.normalize_list(frontmatter.get('expect'))
+                        expect_not = self.normalize_list(frontmatter.get('expectNot'))
+                        # Report bad regexes now rather than when the step runs
+                        for pattern in expect + expect_not:
+                            compile_pattern(pattern)
+                        cache_paths = self.normalize_list(frontmatter.get('cachePaths'))
+                        check_paths(cache_paths)
+                        working_dir = frontmatter.get('workingDir', '.')
+                        if self.base_dir:
+                            working_dir = os.path.normpath(os.path.join(self.base_dir, working_dir))
+                        
+                        steps.append({
+                            'name': frontmatter.get('step', f'step-{len(steps) + 1}'),
+                            'description': frontmatter.get('description', ''),
+                            'language': block['language'] or 'bash',
+                            'code': block['code'],
+                            'required': frontmatter.get('required', True),
+                            'timeout': frontmatter.get('timeout', 60),
+                            'workingDir': working_dir,
+                            'dependsOn': self.normalize_list(frontmatter.get('dependsOn')),
+                            'inputs': self.normalize_list(frontmatter.get('inputs')),
+                            'cacheKeyFiles': self.normalize_list(frontmatter.get('cacheKeyFiles')),
+                            'cachePaths': cache_paths,
+                            'expect': expect,
+                            'expectNot': expect_not,
+                            'background': bool(frontmatter.get('background', False)),
+                            'ready': parse_probes(frontmatter.get('ready')),
+                            'lineStart': block['lineStart'],
+                            'lineEnd': block['lineEnd']
+                        })
+                    # Silently skip YAML blocks without 'verify: true' (likely documentation)
+                except Exception as e:
+                    # Only warn about potential verification blocks, not documentation examples
+                    safe_print(f'Warning: Found YAML with "verify" but failed to parse '
+                               f'(line {block["lineStart"]}): {e}')
+            
+            return steps
+    
+    def load_frontmatter(self, text):
+        """Parsed YAML frontmatter, memoized across parses when frontmatter_cache is set.
+        
+        Flat `key: value` frontmatter skips yaml (and its import) entirely.
+        """
+        if self.frontmatter_cache is not None and text in self.frontmatter_cache:
+            return self.frontmatter_cache[text]
+        frontmatter = parse_flat_frontmatter(text)
+        if frontmatter is None:
+            import yaml
+            frontmatter = yaml.safe_load(text)
+        if self.frontmatter_cache is not None:
+            self.frontmatter_cache[text] = frontmatter
+        return frontmatter
+    
+    @staticmethod
+    def normalize_list(value):
+        """Accept a single string or a list of strings from frontmatter"""
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(v) for v in value]
+        return [str(value)]
+    
+    def build_step_graph(self, steps):
+        """Resolve dependsOn names into step indices.
+        
+        Returns (deps, dependents) where deps[i] is the set of indices step i
+        waits for and dependents[i] lists the steps waiting on step i.
+        """
+        index_by_name = {}
+        for i, step in enumerate(steps):
+            index_by_name.setdefault(step['name'], i)
+        
+        deps = []
+        dependents = [[] for _ in steps]
+        for i, step in enumerate(steps):
+            step_deps = set()
+            for name in step.get('dependsOn', []):
+                if name not in index_by_name:
+                    raise ValueError(f'Step "{step["name"]}" depends on unknown step "{name}"')
+                j = index_by_name[name]
+                if j == i:
+                    raise ValueError(f'Step "{step["name"]}" depends on itself')
+                if j not in step_deps:
+                    step_deps.add(j)
+                    dependents[j].append(i)
+            deps.append(step_deps)
+        
+        return deps, dependents
+    
+    def dependency_groups(self, steps):
+        """Group number per step, counting from 0 in README order.
+        
+        Steps connected through dependsOn (in either direction) share a group.
+        """
+        deps, _ = self.build_step_graph(steps)
+        parent = list(range(len(steps)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        for i, step_deps in enumerate(deps):
+            for j in step_deps:
+                parent[find(i)] = find(j)
+        
+        numbers = {}
+        return [numbers.setdefault(find(i), len(numbers)) for i in range(len(steps))]
+    
+    def topological_order(self, steps):
+        """Order steps so dependencies run first, otherwise keeping README order"""
+        deps, dependents = self.build_step_graph(steps)
+        waiting = [len(d) for d in deps]
+        ready = [i for i, count in enumerate(waiting) if count == 0]
+        heapq.heapify(ready)
+        order = []
+        
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for j in dependents[i]:
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    heapq.heappush(ready, j)
+        
+        if len(order) != len(steps):
+            cycle = [steps[i]['name'] for i, count in enumerate(waiting) if count > 0]
+            raise ValueError(f'Circular dependsOn between steps: {", ".join(cycle)}')
+        
+        return order
+    
+    def failed_result(self, step, error):
+        """Result recorded for a required step that stopped the run"""
         return {
-            'os': platform.system(),
-            'arch': platform.machine(),
-            'pythonVersion': sys.version.split()[0],
-            'platform': platform.platform()
+            'name': step['name'],
+            'status': 'failed',
+            'error': str(error),
+            'duration': 0,
+            'timestamp': datetime.now().isoformat()
         }
     
-    def parse_readme(self):
-        """Parse README.md and extract verification steps"""
-        with open(self.readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+    def skipped_result(self, step, reason):
+        """Result recorded for a step that never ran or was cancelled"""
+        return {
+            'name': step['name'],
+            'description': step.get('description', ''),
+            'status': 'skipped',
+            'error': reason,
+            'duration': 0,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def start_budget(self):
+        """Start the clock for settings.maxVerificationTime (or --max-time)"""
+        if self.max_time is not None:
+            budget = self.max_time
+        else:
+            budget = self.config.get('settings', {}).get('maxVerificationTime', 0) / 1000
+        self.deadline = time.monotonic() + budget if budget and budget > 0 else None
+    
+    def remaining_budget(self):
+        """Seconds left in the time budget, or None when unlimited"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+    
+    def open_history(self):
+        """History store from storage.* config, or None when keepHistory is off"""
+        try:
+            return HistoryStore.from_config(self.config)
+        except Exception as e:
+            safe_print(f'Warning: Could not open history store: {e}')
+            return None
+    
+    def load_expected_durations(self):
+        """Historical step durations in ms, keyed by step name.
         
-        steps = []
-        # Regex to match YAML frontmatter followed by code block
-        # Pre-filter to only match blocks that contain 'verify' keyword
-        pattern = r'---\n(.*?verify.*?)\n---\n```(\w+)?\n(.*?)```'
+        Uses the median over the history store when available, otherwise the
+        durations in the previous results file.
+        """
+        history = self.open_history()
+        if history:
+            try:
+                recent = history.recent_durations(self.results['environment']['os'],
+                                                  readme=self.results['readme'])
+            finally:
+                history.close()
+            if recent:
+                import statistics
+                return {name: statistics.median(values) for name, values in recent.items()}
         
-        for match in re.finditer(pattern, content, re.DOTALL):
+        durations = {}
+        if Path(self.previous_results).exists():
             try:
-                frontmatter = yaml.safe_load(match.group(1))
-                
-                if frontmatter and frontmatter.get('verify'):
-                    steps.append({
-                        'name': frontmatter.get('step', f'step-{len(steps) + 1}'),
-                        'description': frontmatter.get('description', ''),
-                        'language': match.group(2) or 'bash',
-                        'code': match.group(3).strip(),
-                        'required': frontmatter.get('required', True),
-                        'timeout': frontmatter.get('timeout', 60),
-                        'workingDir': frontmatter.get('workingDir', '.')
-                    })
-                # Silently skip YAML blocks without 'verify: true' (likely documentation)
-            except Exception as e:
-                # Only warn if we found potential verification blocks with errors
-                has_verify_keyword = 'verify' in match.group(1).lower()
-                if has_verify_keyword:
-                    safe_print(f'Warning: Found YAML with "verify" but failed to parse: {e}')
-                # Otherwise silently skip (likely documentation examples)
+                with open(self.previous_results, 'r', encoding='utf-8') as f:
+                    for result in json.load(f).get('steps', []):
+                        if result.get('duration') and not result.get('cached') \
+                                and not result.get('carriedOver'):
+                            durations.setdefault(result['name'], result['duration'])
+            except Exception:
+                pass
+        return durations
+    
+    def skip_reason(self, step, skipped_names=()):
+        """Why a step should not be started now, or None to admit it"""
+        for name in step.get('dependsOn', []):
+            if name in skipped_names:
+                return f'Skipped: depends on skipped step "{name}"'
+        
+        remaining = self.remaining_budget()
+        if remaining is None:
+            return None
+        if remaining <= 0:
+            return 'Skipped: verification time budget exhausted'
         
-        return steps
+        expected = self.expected_durations.get(step['name'])
+        if expected and expected / 1000 > remaining:
+            return (f'Skipped: expected {expected / 1000:.0f}s exceeds the remaining '
+                    f'time budget ({remaining:.0f}s)')
+        return None
+    
+    def step_priority(self, steps, i):
+        """Heap key for ready steps: README order, or longest first under a time budget"""
+        if self.deadline is None:
+            return (0, i)
+        return (-self.expected_durations.get(steps[i]['name'], 0), i)
     
     def execute_step(self, step):
         """Execute a single verification step"""
+        with self.tracer.span(step['name'], 'step'):
+            run, result = self.start_step(step)
+            if result:
+                return result
+            if step.get('background'):
+                return self.start_service(run)
+            if run['artifacts']:
+                result = self.restore_artifacts(run)
+                if result:
+                    return result
+            
+            try:
+                returncode, duration, usage = self.run_step_code(run['step'], run['capture'])
+            except subprocess.TimeoutExpired:
+                return self.step_timed_out(run)
+            except StepSkipped as e:
+                safe_print(f'   ⏭️  {e}')
+                return self.skipped_result(step, str(e))
+            return self.finish_step(run, returncode, duration, usage)
+    
+    def start_step(self, step):
+        """Announce a step and check the cache and time budget.
+        
+        Returns (run, None) when the step should run, where run holds what
+        finish_step needs, or (None, result) when its result is already known.
+        """
         safe_print(f'\n🔍 Executing: {step["name"]}')
         safe_print(f'   {step["description"] or "No description"}')
+        launched, self.launched = self.launched, None
+        if launched is not None:
+            safe_print(f'   ⏱️  First step started {(time.time() - launched) * 1000:.0f}ms after launch')
+        
+        cache_key = None
+        if self.cache and self.cache.is_cacheable(step):
+            cache_key = self.cache.key_for(step, self.cache_env())
+            cached = self.cache.get(cache_key)
+            if cached:
+                cached['cached'] = True
+                cached['timestamp'] = datetime.now().isoformat()
+                safe_print(f'   ♻️  Cached result, inputs unchanged ({cached["duration"]:.0f}ms saved)')
+                return None, cached
+        
+        # Never let a step outlive the global time budget
+        budget_limited = False
+        remaining = self.remaining_budget()
+        if remaining is not None:
+            if remaining <= 0:
+                safe_print('   ⏭️  Skipped (time budget exhausted)')
+                return None, self.skipped_result(step, 'Skipped: verification time budget exhausted')
+            if remaining < step['timeout']:
+                step = dict(step, timeout=remaining)
+                budget_limited = True
         
         result = {
             'name': step['name'],
@@ -123,138 +572,1151 @@ class ReadmeVerifier:
             'timestamp': datetime.now().isoformat()
         }
         
-        start_time = datetime.now()
+        capture = (self.session and self.session.capture_for(step)) or self.create_capture(step)
+        result['logFile'] = capture.log_path.as_posix()
+        
+        artifacts = None
+        plan = self.artifacts and artifact_plan(step)
+        if plan:
+            artifacts = {'plan': plan, 'key': self.artifacts.key_for(step, plan)}
+        
+        return {
+            'step': step,
+            'result': result,
+            'capture': capture,
+            'cacheKey': cache_key,
+            'artifacts': artifacts,
+            'budgetLimited': budget_limited,
+            'startTime': datetime.now()
+        }, None
+    
+    def finish_step(self, run, returncode, duration=None, usage=None):
+        """Record how a step's code exited.
+        
+        Raises subprocess.CalledProcessError when a required step failed.
+        """
+        step, result, capture = run['step'], run['result'], run['capture']
+        result['exitCode'] = returncode
+        result['outputBytes'] = capture.total_bytes
+        if capture.cleanup:
+            result['cleanup'] = capture.cleanup
+        
+        if duration is None:
+            duration = (datetime.now() - run['startTime']).total_seconds() * 1000
+        if usage:
+            result['resources'] = usage_dict(usage, duration)
+        result['duration'] = duration
+        
+        matcher = capture.matcher
+        failure = None
+        if matcher and matcher.verdict == 'expected':
+            # Stopped on purpose once the output showed what the step waits for
+            saved = max(0, step['timeout'] * 1000 - duration)
+            result['expect'] = {'pattern': matcher.pattern, 'line': matcher.line, 'savedMs': round(saved)}
+            safe_print(f'   🎯 Expected output seen, step stopped {saved / 1000:.1f}s before its timeout')
+            returncode = 0
+        elif matcher and matcher.verdict == 'unexpected':
+            failure = f'Output matched expectNot pattern "{matcher.pattern}": {matcher.line}'
+        elif returncode == 0 and matcher and matcher.pending:
+            failure = 'Exited before the expected output: ' + ', '.join(f'"{p}"' for p in matcher.pending)
+        
+        if returncode == 0 and not failure:
+            result['status'] = 'success'
+            result['output'] = capture.text('stdout')
+            safe_print(f'   ✅ Success ({duration:.0f}ms)')
+            
+            if run['cacheKey']:
+                self.cache.put(run['cacheKey'], result)
+            if run['artifacts']:
+                self.save_artifacts(run)
+            return result
+        
+        error = subprocess.CalledProcessError(returncode, step['code'],
+                                              capture.text('stdout'), capture.text('stderr'))
+        result['status'] = 'failed'
+        result['error'] = failure or error.stderr or str(error)
+        result['output'] = error.stdout or ''
+        safe_print(f'   ❌ Failed ({duration:.0f}ms)')
+        safe_print(f'   Error: {result["error"]}')
+        
+        if step['required']:
+            raise error
+        result['status'] = 'warning'
+        safe_print(f'   ⚠️  Non-required step, continuing...')
+        return result
+    
+    def restore_artifacts(self, run):
+        """Restore an install step's archived node_modules/.venv instead of installing.
         
+        Returns the step's result on a cache hit for a step that is nothing
+        but the install. Otherwise returns None and the step runs: on a hit
+        without its install commands where they can be taken out, else whole.
+        """
+        step, result, artifacts = run['step'], run['result'], run['artifacts']
+        entry = self.artifacts.get(artifacts['key'])
+        if entry is None:
+            return None
+        
+        paths = ', '.join(entry['paths'])
+        start = time.monotonic()
+        try:
+            with self.tracer.span('restore artifacts', paths=paths):
+                self.artifacts.restore(artifacts['key'], entry, step['workingDir'])
+        except ArtifactError as e:
+            safe_print(f'   ⚠️  Cached {paths} is unusable ({e}), installing instead')
+            return None
+        
+        duration = (time.monotonic() - start) * 1000
+        size = f'{entry["size"] / (1024 * 1024):.1f} MB'
+        result['artifacts'] = {'restored': True, 'paths': entry['paths'], 'sizeBytes': entry['size']}
+        rest = artifacts['plan']['rest']
+        if rest == '':
+            run['capture'].close()
+            result.update(status='success', duration=duration, cached=True)
+            safe_print(f'   📦 Restored {paths} from the artifact cache ({size}), install skipped')
+            safe_print(f'   ✅ Success ({duration:.0f}ms)')
+            return result
+        
+        # Whatever else the step does (tests, a build) still has to run
+        if rest is None:
+            safe_print(f'   📦 Restored {paths} from the artifact cache ({size}), running the whole step')
+        else:
+            run['step'] = dict(step, code=rest)
+            safe_print(f'   📦 Restored {paths} from the artifact cache ({size}), '
+                       f'running the step without its install')
+        # Already archived under this key
+        run['artifacts'] = None
+        return None
+    
+    def save_artifacts(self, run):
+        """Archive what a successful install step produced, keyed by its lockfiles"""
+        step, result, artifacts = run['step'], run['result'], run['artifacts']
+        start = time.monotonic()
         try:
-            # Execute the code
-            process = subprocess.run(
+            with self.tracer.span('save artifacts'):
+                entry = self.artifacts.put(artifacts['key'], step['workingDir'], artifacts['plan']['paths'])
+        except Exception as e:
+            safe_print(f'   ⚠️  Could not save install artifacts: {e}')
+            return
+        if entry is None:
+            return
+        
+        elapsed = (time.monotonic() - start) * 1000
+        result['artifacts'] = {'restored': False, 'paths': entry['paths'],
+                               'sizeBytes': entry['size'], 'saveMs': round(elapsed)}
+        safe_print(f'   📦 Saved {", ".join(entry["paths"])} to the artifact cache '
+                   f'({entry["size"] / (1024 * 1024):.1f} MB in {elapsed:.0f}ms)')
+    
+    def step_timed_out(self, run):
+        """Record a step that hit its timeout or the time budget.
+        
+        Raises subprocess.TimeoutExpired when a required step timed out.
+        """
+        step, result, capture = run['step'], run['result'], run['capture']
+        result['output'] = capture.text('stdout')
+        result['outputBytes'] = capture.total_bytes
+        result['duration'] = step['timeout'] * 1000
+        if capture.cleanup:
+            result['cleanup'] = capture.cleanup
+        
+        if run['budgetLimited']:
+            result['status'] = 'skipped'
+            result['error'] = 'Cancelled: verification time budget exhausted'
+            safe_print(f'   ⏭️  Cancelled (time budget exhausted)')
+            return result
+        
+        result['status'] = 'failed'
+        result['error'] = f'Timeout after {step["timeout"]}s'
+        safe_print(f'   ❌ Failed (timeout)')
+        
+        if step['required']:
+            raise subprocess.TimeoutExpired(step['code'], step['timeout'])
+        result['status'] = 'warning'
+        safe_print(f'   ⚠️  Non-required step, continuing...')
+        return result
+    
+    def start_service(self, run):
+        """Start a `background: true` step and wait for its readiness probes.
+        
+        The step counts as finished once ready; its process group keeps
+        running until stop_services(). Raises subprocess.CalledProcessError
+        when a required service never became ready.
+        """
+        step, result, capture = run['step'], run['result'], run['capture']
+        with self.tracer.span('spawn', 'process'):
+            process = subprocess.Popen(
                 step['code'],
                 shell=True,
                 cwd=step['workingDir'],
-                timeout=step['timeout'],
-                capture_output=True,
-                text=True
+                env=self.step_env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **spawn_options()
             )
-            
-            duration = (datetime.now() - start_time).total_seconds() * 1000
-            
-            if process.returncode == 0:
-                result['status'] = 'success'
-                result['output'] = process.stdout
-                result['duration'] = duration
-                safe_print(f'   ✅ Success ({duration:.0f}ms)')
+            capture.attach(process.stdout, 'stdout')
+            capture.attach(process.stderr, 'stderr')
+        
+        service = BackgroundService(step, process, capture, result)
+        with self.tracer.span('wait for readiness', 'process', pid=process.pid):
+            error = service.wait_ready(step['timeout'],
+                                       progress=lambda elapsed: self.print_progress(step, elapsed, capture),
+                                       interval=PROGRESS_INTERVAL)
+        
+        duration = (datetime.now() - run['startTime']).total_seconds() * 1000
+        result['duration'] = duration
+        result['background'] = {'pid': process.pid, 'probes': service.descriptions}
+        if error is None:
+            self.services.append(service)
+            result['status'] = 'success'
+            result['background']['readyAfterMs'] = round(duration)
+            safe_print(f'   🛰️  Ready after {duration:.0f}ms, running in the background (pid {process.pid})')
+            safe_print(f'   ✅ Success ({duration:.0f}ms)')
+            return result
+        
+        _, result['cleanup'] = service.stop(self.service_kill_grace)
+        result['background']['stopped'] = 'failed'
+        result['status'] = 'failed'
+        result['error'] = error
+        result['output'] = capture.text('stdout')
+        result['outputBytes'] = capture.total_bytes
+        result['exitCode'] = process.returncode
+        safe_print(f'   ❌ Failed ({duration:.0f}ms)')
+        safe_print(f'   Error: {error}')
+        
+        if step['required']:
+            raise subprocess.CalledProcessError(process.returncode, step['code'],
+                                                capture.text('stdout'), error)
+        result['status'] = 'warning'
+        safe_print(f'   ⚠️  Non-required step, continuing...')
+        return result
+    
+    def stop_services(self):
+        """Tear down background services, most recently started first"""
+        while self.services:
+            service = self.services.pop()
+            result = service.result
+            uptime = (time.monotonic() - service.started) * 1000
+            how, result['cleanup'] = service.stop(self.service_kill_grace)
+            result['background'].update(stopped=how, exitCode=service.process.returncode,
+                                        uptimeMs=round(uptime))
+            result['output'] = service.capture.text('stdout')
+            result['outputBytes'] = service.capture.total_bytes
+            if how == 'exited':
+                safe_print(f'⚠️  Service {result["name"]} had already exited '
+                           f'(code {service.process.returncode}) before the run ended')
             else:
-                raise subprocess.CalledProcessError(
-                    process.returncode, 
-                    step['code'], 
-                    process.stdout, 
-                    process.stderr
-                )
-                
+                safe_print(f'🛰️  Stopped service {result["name"]} ({how}, up {uptime / 1000:.1f}s)')
+    
+    def start_proxy(self):
+        """Start the caching package proxy when proxy.enabled and point installs at it.
+        
+        It runs offline, serving only what's already stored, when
+        proxy.offline is set or security.allowNetwork is false.
+        """
+        settings = self.config.get('proxy', {})
+        if not settings.get('enabled', False):
+            return
+        from package_proxy import PackageProxy, DEFAULT_STORE_DIR, DEFAULT_METADATA_MAX_AGE
+        offline = settings.get('offline', False) or \
+            not self.config.get('security', {}).get('allowNetwork', True)
+        self.proxy = PackageProxy(settings.get('path', DEFAULT_STORE_DIR), settings.get('upstreams'),
+                                  offline=offline,
+                                  metadata_max_age=settings.get('metadataMaxAge', DEFAULT_METADATA_MAX_AGE))
+        self.proxy.start()
+        self.step_env = dict(os.environ, **self.proxy.environment())
+        mode = 'offline, serving stored packages only' if offline else 'caching'
+        safe_print(f'🗄️  Package proxy on {self.proxy.url} ({mode})\n')
+    
+    def cache_env(self):
+        """The environment steps run with, as it goes into step cache keys.
+        
+        The proxy listens on a new port every run, so its variables stand
+        for its mode and upstreams instead of its URL.
+        """
+        if not self.proxy:
+            return self.step_env
+        upstreams = ' '.join(f'{route}={url}' for route, url in sorted(self.proxy.upstreams.items()))
+        stable = f'package-proxy ({"offline" if self.proxy.offline else "online"}) {upstreams}'
+        return dict(self.step_env, **{name: stable for name in self.proxy.environment()})
+    
+    def stop_proxy(self):
+        """Stop the package proxy and record how many requests the store answered"""
+        if not self.proxy:
+            return
+        self.proxy.stop()
+        stats = self.proxy.stats
+        self.results['packageProxy'] = dict(stats, offline=self.proxy.offline)
+        self.proxy = None
+        self.step_env = None
+        if stats['requests']:
+            safe_print(f'🗄️  Package proxy served {stats["fromStore"]} of {stats["requests"]} request(s) '
+                       f'from its store ({stats["bytesFromStore"] / (1024 * 1024):.1f} MB), '
+                       f'fetched {stats["fetched"]}, missing {stats["missing"]}')
+    
+    def stop_process_group(self, pid, capture):
+        """Stop a step's process tree, noting the cleanup on its capture for the result"""
+        capture.cleanup = terminate_group(pid, self.kill_grace)
+        self.print_cleanup(capture.cleanup)
+    
+    def print_cleanup(self, cleanup):
+        count = f'{cleanup["processes"]} process(es)' if cleanup['processes'] is not None else 'process tree'
+        safe_print(f'   🧹 Stopped {count} in {cleanup["cleanupMs"]:.0f}ms ({cleanup["signal"]})')
+    
+    def create_capture(self, step):
+        """Output capture spilling to the step's log file"""
+        limit_kb = self.config.get('execution', {}).get('outputLimitKB', DEFAULT_OUTPUT_LIMIT_KB)
+        capture = StepOutput(self.logs_dir / log_file_name(step['name']), limit_kb)
+        # A background step's ready.log is one more pattern it must print
+        log = (step.get('ready') or {}).get('log') if step.get('background') else None
+        if has_expectations(step) or log:
+            capture.matcher = OutputMatcher(step.get('expect', []) + ([log] if log else []),
+                                            step.get('expectNot', []))
+        return capture
+    
+    def run_step_code(self, step, capture):
+        """Run a step in the shell session if one is active, else in a new process.
+        
+        Returns (returncode, duration in ms or None if not measured, rusage
+        or None). Steps sharing a shell session have no per-step rusage.
+        """
+        # Steps stopped on their output need a process of their own to kill
+        if not self.session or has_expectations(step):
+            returncode, usage = self.run_process(step, capture)
+            return returncode, None, usage
+        
+        try:
+            with self.tracer.span('execute', 'process', session=True):
+                return (*self.session.run(
+                    step, capture, step['timeout'],
+                    progress=lambda elapsed: self.print_progress(step, elapsed, capture),
+                    interval=PROGRESS_INTERVAL
+                ), None)
         except subprocess.TimeoutExpired:
-            result['status'] = 'failed'
-            result['error'] = f'Timeout after {step["timeout"]}s'
-            result['duration'] = step['timeout'] * 1000
-            safe_print(f'   ❌ Failed (timeout)')
+            if capture.cleanup:
+                self.print_cleanup(capture.cleanup)
+            safe_print('   ⚠️  Shell session restarted; environment from earlier steps is lost')
+            raise
+        finally:
+            with self.tracer.span('drain output', 'process'):
+                capture.close()
+    
+    def create_workspaces(self, steps):
+        """Isolated workspace pool for parallel steps (execution.isolation), or None"""
+        settings = self.config.get('execution', {}).get('isolation', {})
+        if not settings.get('enabled', False):
+            return None
+        
+        # Steps connected through dependsOn build on each other, so they share a workspace
+        step_groups = self.dependency_groups(steps)
+        groups = {id(step): group + 1 for step, group in zip(steps, step_groups)}
+        safe_print(f'Isolating {len(set(step_groups))} independent step group(s) in separate workspaces')
+        storage = self.config.get('storage', {})
+        state_dirs = [
+            self.logs_dir,
+            self.config.get('cache', {}).get('path', DEFAULT_CACHE_DIR),
+            storage.get('historyPath', DEFAULT_HISTORY_DIR),
+            Path(storage.get('resultsPath', DEFAULT_RESULTS_PATH)).parent
+        ]
+        from step_workspaces import WorkspacePool
+        return WorkspacePool(self.base_dir or '.', groups, settings, self.execute_step,
+                             skip_paths=state_dirs, log=safe_print)
+    
+    def create_session(self):
+        """Start a persistent shell when execution.preserveEnv is set.
+        
+        On Windows steps keep their per-step shells unless execution.shell
+        names one, so a Git Bash on PATH doesn't change what they run in.
+        """
+        execution = self.config.get('execution', {})
+        if not execution.get('preserveEnv', False):
+            return None
+        if IS_WINDOWS and not execution.get('shell'):
+            safe_print('Running each step in a fresh shell on Windows (set execution.shell to share one)')
+            return None
+        
+        shell = find_shell(execution.get('shell'))
+        if not shell:
+            safe_print('⚠️  No POSIX shell found, running each step in a fresh shell')
+            return None
+        
+        safe_print(f'Preserving environment between steps in one {Path(shell).name} session')
+        return ShellSession(shell, kill_grace=self.kill_grace, env=self.step_env)
+    
+    def session_batch(self, steps, order):
+        """Leading run of one-line steps in order that can share a round trip"""
+        size = self.config.get('execution', {}).get('batchSize', DEFAULT_BATCH_SIZE)
+        batch = []
+        for i in order[:size]:
+            step = steps[i]
+            # Cached or budget-skipped steps must not run, so they can't be sent ahead
+            if '\n' in step['code'] or (self.cache and self.cache.is_cacheable(step)) \
+                    or (self.artifacts and artifact_plan(step)) or has_expectations(step) or step.get('background') or self.skip_reason(step):
+                break
+            batch.append(step)
+        return batch
+    
+    def run_process(self, step, capture):
+        """Run a step's code, streaming its output into capture.
+        
+        Only a bounded tail of stdout/stderr is kept in memory. Returns
+        (exit code, rusage or None) or raises subprocess.TimeoutExpired.
+        The step runs in its own process group, which is stopped on timeout,
+        on interruption, or once expect/expectNot patterns decide the result.
+        """
+        matcher = capture.matcher
+        with self.tracer.span('spawn', 'process'):
+            process = subprocess.Popen(
+                step['code'],
+                shell=True,
+                cwd=step['workingDir'],
+                env=self.step_env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **spawn_options()
+            )
+            capture.attach(process.stdout, 'stdout')
+            capture.attach(process.stderr, 'stderr')
+        
+        start = datetime.now()
+        killed = False
+        try:
+            with self.tracer.span('execute', 'process', pid=process.pid):
+                while True:
+                    elapsed = (datetime.now() - start).total_seconds()
+                    remaining = step['timeout'] - elapsed
+                    if matcher and matcher.verdict:
+                        self.stop_process_group(process.pid, capture)
+                        returncode, usage = wait_with_usage(process, step['timeout'])
+                        killed = True
+                        break
+                    if remaining <= 0:
+                        self.stop_process_group(process.pid, capture)
+                        process.wait()
+                        killed = True
+                        raise subprocess.TimeoutExpired(step['code'], step['timeout'])
+                    
+                    try:
+                        returncode, usage = wait_with_usage(process, min(remaining, PROGRESS_INTERVAL),
+                                                            matcher.event if matcher else None)
+                        break
+                    except subprocess.TimeoutExpired:
+                        elapsed = (datetime.now() - start).total_seconds()
+                        if elapsed < step['timeout'] and not (matcher and matcher.verdict):
+                            self.print_progress(step, elapsed, capture)
+        except BaseException:
+            # Interrupted (e.g. Ctrl+C): a step in its own process group wouldn't get the signal
+            if process.returncode is None:
+                self.stop_process_group(process.pid, capture)
+                process.wait()
+                killed = True
+            raise
+        finally:
+            # Orphaned grandchildren may still hold the pipes open; don't wait on them forever
+            with self.tracer.span('drain output', 'process'):
+                capture.close(timeout=1 if killed else None if process.returncode == 0 else 5)
+        
+        return returncode, usage
+    
+    def print_progress(self, step, elapsed, capture):
+        """Heartbeat line for a step that is still running"""
+        size = capture.total_bytes / 1024
+        last = capture.last_line[:80]
+        safe_print(f'   ⏳ {step["name"]}: {elapsed:.0f}s elapsed, {size:.0f} KB output'
+                   + (f' | {last}' if last else ''))
+    
+    def get_jobs(self):
+        """Number of parallel workers, or 1 to use the sequential engine"""
+        if self.jobs is not None:
+            return max(1, self.jobs)
+        
+        if self.config.get('execution', {}).get('sequential', True):
+            return 1
+        
+        return os.cpu_count() or 1
+    
+    def run_sequential(self, steps):
+        """Run steps one at a time, stopping at the first required failure.
+        
+        Returns {step index: result} for the steps that ran.
+        """
+        results = {}
+        skipped = set()
+        order = self.topological_order(steps)
+        
+        for position, i in enumerate(order):
+            reason = self.skip_reason(steps[i], skipped)
+            if reason and not (self.session and self.session.capture_for(steps[i])):
+                safe_print(f'\n⏭️  {steps[i]["name"]}: {reason}')
+                results[i] = self.skipped_result(steps[i], reason)
+                skipped.add(steps[i]['name'])
+                continue
             
-            if not step['required']:
-                result['status'] = 'warning'
-                safe_print(f'   ⚠️  Non-required step, continuing...')
-            else:
-                raise
+            if self.session and not self.session.capture_for(steps[i]):
+                batch = self.session_batch(steps, order[position:])
+                if len(batch) > 1:
+                    self.session.submit([(step, self.create_capture(step)) for step in batch])
+            
+            try:
+                results[i] = self.execute_step(steps[i])
+            except Exception as e:
+                # If a required step fails, stop execution
+                results[i] = self.failed_result(steps[i], e)
+                break
+            
+            if results[i]['status'] == 'skipped':
+                skipped.add(steps[i]['name'])
+        
+        return results
+    
+    def run_parallel(self, steps, jobs, pool=None, execute=None):
+        """Run independent steps concurrently on a bounded worker pool.
+        
+        A step is started once every step it dependsOn has finished. When a
+        required step fails no new steps are started, in-flight steps are
+        allowed to finish. Returns {step index: result} like run_sequential.
+        
+        `pool` lets several verifiers share one executor, with at most `jobs`
+        of this README's steps in flight; `execute` replaces execute_step.
+        """
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+        
+        execute = execute or self.execute_step
+        deps, dependents = self.build_step_graph(steps)
+        # Validates the graph before anything runs
+        self.topological_order(steps)
+        
+        waiting = [len(d) for d in deps]
+        ready = [(self.step_priority(steps, i), i) for i, count in enumerate(waiting) if count == 0]
+        heapq.heapify(ready)
+        results = {}
+        running = {}
+        skipped = set()
+        stop = False
+        
+        def release(i):
+            for j in dependents[i]:
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    heapq.heappush(ready, (self.step_priority(steps, j), j))
+        
+        own_pool = pool is None
+        if own_pool:
+            pool = ThreadPoolExecutor(max_workers=jobs)
+        
+        try:
+            while running or (ready and not stop):
+                while ready and not stop and len(running) < jobs:
+                    _, i = heapq.heappop(ready)
+                    reason = self.skip_reason(steps[i], skipped)
+                    if reason:
+                        safe_print(f'\n⏭️  {steps[i]["name"]}: {reason}')
+                        results[i] = self.skipped_result(steps[i], reason)
+                        skipped.add(steps[i]['name'])
+                        release(i)
+                        continue
+                    running[pool.submit(execute, steps[i])] = i
+                
+                if not running:
+                    continue
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = self.failed_result(steps[i], e)
+                        stop = True
+                        continue
+                    
+                    if results[i]['status'] == 'skipped':
+                        skipped.add(steps[i]['name'])
+                    release(i)
+        finally:
+            if own_pool:
+                pool.shutdown()
+        
+        return results
+    
+    async def run_async(self, steps, jobs, semaphore=None):
+        """Asyncio counterpart of run_parallel, yielding (index, result) as steps finish.
+        
+        Scheduling and required-failure handling match run_parallel. Steps
+        still running when the generator is closed are cancelled.
+        """
+        import asyncio
+        
+        deps, dependents = self.build_step_graph(steps)
+        self.topological_order(steps)
+        
+        waiting = [len(d) for d in deps]
+        ready = [(self.step_priority(steps, i), i) for i, count in enumerate(waiting) if count == 0]
+        heapq.heapify(ready)
+        running = {}
+        free_slots = list(range(jobs, 0, -1))
+        skipped = set()
+        stop = False
+        
+        def release(i):
+            for j in dependents[i]:
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    heapq.heappush(ready, (self.step_priority(steps, j), j))
+        
+        try:
+            while running or (ready and not stop):
+                while ready and not stop and len(running) < jobs:
+                    _, i = heapq.heappop(ready)
+                    reason = self.skip_reason(steps[i], skipped)
+                    if reason:
+                        safe_print(f'\n⏭️  {steps[i]["name"]}: {reason}')
+                        skipped.add(steps[i]['name'])
+                        release(i)
+                        yield i, self.skipped_result(steps[i], reason)
+                        continue
+                    slot = free_slots.pop()
+                    task = asyncio.ensure_future(
+                        self.execute_step_async(steps[i], semaphore, track=f'async worker {slot}'))
+                    running[task] = (i, slot)
                 
-        except subprocess.CalledProcessError as e:
-            duration = (datetime.now() - start_time).total_seconds() * 1000
-            result['status'] = 'failed'
-            result['error'] = e.stderr or str(e)
-            result['output'] = e.stdout or ''
-            result['duration'] = duration
-            safe_print(f'   ❌ Failed ({duration:.0f}ms)')
-            safe_print(f'   Error: {e.stderr or e}')
+                if not running:
+                    continue
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i, slot = running.pop(task)
+                    free_slots.append(slot)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        stop = True
+                        yield i, self.failed_result(steps[i], e)
+                        continue
+                    
+                    if result['status'] == 'skipped':
+                        skipped.add(steps[i]['name'])
+                    release(i)
+                    yield i, result
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    async def execute_step_async(self, step, semaphore=None, track=None):
+        """Asyncio counterpart of execute_step"""
+        if semaphore is not None:
+            async with semaphore:
+                return await self.execute_step_async(step, track=track)
+        
+        import asyncio
+        if track:
+            self.tracer.use_track(track)
+        with self.tracer.span(step['name'], 'step'):
+            run, result = self.start_step(step)
+            if result:
+                return result
+            loop = asyncio.get_running_loop()
+            if step.get('background'):
+                # Readiness probes block, so they are polled on a worker thread
+                return await loop.run_in_executor(None, self.start_service, run)
+            if run['artifacts']:
+                # So are unpacking and archiving install artifacts
+                result = await loop.run_in_executor(None, self.restore_artifacts, run)
+                if result:
+                    return result
             
-            if not step['required']:
-                result['status'] = 'warning'
-                safe_print(f'   ⚠️  Non-required step, continuing...')
+            try:
+                returncode = await self.run_process_async(run['step'], run['capture'])
+            except subprocess.TimeoutExpired:
+                return self.step_timed_out(run)
+            if run['artifacts']:
+                return await loop.run_in_executor(None, self.finish_step, run, returncode)
+            return self.finish_step(run, returncode)
+    
+    async def run_process_async(self, step, capture):
+        """Run a step's code with asyncio, streaming its output into capture.
+        
+        Returns the exit code or raises subprocess.TimeoutExpired. The
+        step's process group is stopped on timeout, if the step is
+        cancelled, or once its expect/expectNot patterns decide the result.
+        """
+        import asyncio
+        
+        matcher = capture.matcher
+        decided = asyncio.Event()
+        if matcher:
+            # Output is fed in from this event loop, so the event can be set directly
+            matcher.on_verdict = decided.set
+        with self.tracer.span('spawn', 'process'):
+            process = await asyncio.create_subprocess_shell(
+                step['code'],
+                cwd=step['workingDir'],
+                env=self.step_env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **spawn_options()
+            )
+        readers = []
+        for name in ('stdout', 'stderr'):
+            capture.open(name)
+            readers.append(asyncio.ensure_future(self.drain_async(getattr(process, name), name, capture)))
+        
+        exited = asyncio.ensure_future(process.wait())
+        verdict = asyncio.ensure_future(decided.wait())
+        start = time.monotonic()
+        killed = False
+        try:
+            with self.tracer.span('execute', 'process', pid=process.pid):
+                while True:
+                    remaining = step['timeout'] - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(step['code'], step['timeout'])
+                    done, _ = await asyncio.wait({exited, verdict}, return_when=asyncio.FIRST_COMPLETED,
+                                                 timeout=min(remaining, PROGRESS_INTERVAL))
+                    if exited in done:
+                        return exited.result()
+                    if verdict in done:
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, self.stop_process_group, process.pid, capture)
+                        killed = True
+                        return await exited
+                    elapsed = time.monotonic() - start
+                    if elapsed < step['timeout']:
+                        self.print_progress(step, elapsed, capture)
+        except BaseException:
+            # Timed out or cancelled
+            if process.returncode is None:
+                await asyncio.shield(asyncio.get_running_loop().run_in_executor(
+                    None, self.stop_process_group, process.pid, capture))
+                killed = True
+            await asyncio.shield(exited)
+            raise
+        finally:
+            verdict.cancel()
+            # Orphaned grandchildren may still hold the pipes open; don't wait on them forever
+            with self.tracer.span('drain output', 'process'):
+                _, pending = await asyncio.wait(
+                    readers, timeout=1 if killed else None if process.returncode == 0 else 5)
+                for reader in pending:
+                    reader.cancel()
+                capture.close()
+    
+    async def drain_async(self, stream, name, capture):
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            capture.write(name, chunk)
+    
+    def verify(self, steps=None, pool=None, execute=None, carried=None):
+        """Execute all verification steps, in parallel when configured.
+        
+        `steps` skips parsing when the README was already parsed; `pool` and
+        `execute` are forwarded to run_parallel (see BatchVerifier).
+        `carried` maps step indices to results reused instead of running
+        those steps (see --watch).
+        """
+        steps, selected, carried = self.plan_run(steps, carried)
+        if not steps:
+            return self.results
+        
+        to_run = self.restrict_steps(steps, selected)
+        
+        jobs = self.get_jobs()
+        self.start_proxy()
+        try:
+            if not to_run:
+                results = {}
+            elif pool is not None:
+                results = self.run_parallel(to_run, jobs, pool=pool, execute=execute)
+            elif jobs > 1:
+                safe_print(f'Running with up to {jobs} parallel jobs')
+                workspaces = self.create_workspaces(to_run)
+                try:
+                    results = self.run_parallel(to_run, jobs,
+                                                execute=workspaces.execute if workspaces else None)
+                finally:
+                    if workspaces:
+                        workspaces.close()
+                        safe_print(f'📂 Workspace cloning took {workspaces.clone_ms:.0f}ms in total')
             else:
-                raise
+                # A shared shell only makes sense when steps run one at a time
+                self.session = self.create_session()
+                try:
+                    results = self.run_sequential(to_run)
+                finally:
+                    if self.session:
+                        self.session.close()
+                        self.session = None
+        finally:
+            # Services started by background steps live until every step has run
+            self.stop_services()
+            self.stop_proxy()
         
-        return result
+        # Map results back to README positions and merge in carried-over steps
+        merged = dict(carried)
+        for position, result in results.items():
+            merged[selected[position]] = result
+        
+        self.unreached_results(steps, merged)
+        self.record_run(steps, merged)
+        return self.results
+    
+    async def iter_verify(self, steps=None, semaphore=None):
+        """Verify asynchronously, yielding each step result as soon as it finishes.
+        
+        Steps run as asyncio subprocesses with dependsOn, timeouts, the time
+        budget and --since handled as in verify(); carried-over results come
+        first. `semaphore` (an asyncio.Semaphore) caps running steps across
+        several verifiers. Closing the generator early kills running steps.
+        self.results is complete once iteration finishes.
+        
+            async for result in verifier.iter_verify():
+                print(result['name'], result['status'])
+        """
+        steps, selected, carried = self.plan_run(steps)
+        if not steps:
+            return
+        
+        for i in sorted(carried):
+            yield carried[i]
+        
+        merged = dict(carried)
+        self.start_proxy()
+        runner = self.run_async(self.restrict_steps(steps, selected), self.get_jobs(), semaphore)
+        try:
+            async for position, result in runner:
+                merged[selected[position]] = result
+                yield result
+        finally:
+            # Cancel running steps now, not when the event loop shuts down
+            await runner.aclose()
+            import asyncio
+            await asyncio.get_running_loop().run_in_executor(None, self.stop_services)
+            await asyncio.get_running_loop().run_in_executor(None, self.stop_proxy)
+        
+        for result in self.unreached_results(steps, merged):
+            yield result
+        self.record_run(steps, merged)
     
-    def verify(self):
-        """Execute all verification steps sequentially"""
-        safe_print('🚀 Starting README verification...\n')
+    def plan_run(self, steps=None, carried=None):
+        """Parse the README if needed, start the time budget and pick the steps to run.
+        
+        Returns (steps, selected, carried): the README's steps, indices of
+        those to run, and {index: result} carried over by --since or given
+        by the caller.
+        """
+        safe_print(f'🚀 Starting README verification: {self.readme_path}\n')
         safe_print(f'Environment: {self.results["environment"]["os"]} ({self.results["environment"]["arch"]})')
         safe_print(f'Python: {self.results["environment"]["pythonVersion"]}\n')
         
-        steps = self.parse_readme()
+        if steps is None:
+            steps = self.parse_readme()
         
         if not steps:
-            safe_print('⚠️  No verification steps found in README.md')
-            return self.results
+            safe_print(f'⚠️  No verification steps found in {self.readme_path}')
+            return [], [], {}
         
         safe_print(f'Found {len(steps)} verification step(s)\n')
         
-        for step in steps:
-            try:
-                result = self.execute_step(step)
-                self.results['steps'].append(result)
-            except Exception as e:
-                # If a required step fails, stop execution
-                self.results['steps'].append({
-                    'name': step['name'],
-                    'status': 'failed',
-                    'error': str(e),
-                    'duration': 0,
-                    'timestamp': datetime.now().isoformat()
-                })
-                break
+        if self.shard:
+            steps = self.shard_steps(steps)
+            if not steps:
+                return [], [], {}
         
-        return self.results
+        self.start_budget()
+        if self.deadline is not None:
+            self.expected_durations = self.load_expected_durations()
+        
+        if carried is not None:
+            selected = [i for i in range(len(steps)) if i not in carried]
+            return steps, selected, carried
+        
+        carried = {}
+        selected = list(range(len(steps)))
+        if self.since:
+            selected, carried = self.select_changed_steps(steps, self.since)
+            safe_print(f'Changes since {self.since}: re-running {len(selected)} step(s), '
+                       f'carrying over {len(carried)}\n')
+        
+        return steps, selected, carried
+    
+    def shard_steps(self, steps):
+        """The steps this worker runs under --shard i/N.
+        
+        dependsOn-connected groups stay in one shard. Groups are weighed by
+        their historical duration and assigned longest first to the least
+        loaded shard (lowest number on ties), so every worker computes the
+        same split from the same history and README.
+        """
+        index, count = self.shard
+        durations = self.load_expected_durations()
+        import statistics
+        
+        known = [durations[step['name']] for step in steps if step['name'] in durations]
+        # Steps without history count as a typical step
+        default = statistics.median(known) if known else 1000
+        
+        step_groups = self.dependency_groups(steps)
+        weights = {}
+        for step, group in zip(steps, step_groups):
+            weights[group] = weights.get(group, 0) + durations.get(step['name'], default)
+        
+        loads = [0] * count
+        owners = {}
+        for group in sorted(weights, key=lambda g: (-weights[g], g)):
+            shard = min(range(count), key=lambda s: (loads[s], s))
+            owners[group] = shard
+            loads[shard] += weights[group]
+        
+        mine = [step for step, group in zip(steps, step_groups) if owners[group] == index - 1]
+        safe_print(f'🧩 Shard {index}/{count}: {len(mine)} of {len(steps)} step(s), '
+                   f'~{loads[index - 1] / 1000:.1f}s expected '
+                   f'(shards range {min(loads) / 1000:.1f}-{max(loads) / 1000:.1f}s)\n')
+        return mine
+    
+    def unreached_results(self, steps, merged):
+        """Add skipped results to merged for steps the run never reached.
+        
+        A required failure stops the run, so it is given as the reason when
+        there was one; otherwise only an exhausted time budget leaves steps
+        unreached.
+        """
+        failed = [steps[i]['name'] for i in sorted(merged) if merged[i]['status'] == 'failed']
+        if failed:
+            reason = f'Skipped: required step "{failed[0]}" failed'
+        else:
+            remaining = self.remaining_budget()
+            if remaining is None or remaining > 0:
+                return []
+            reason = 'Skipped: verification time budget exhausted'
+        
+        # Report unreached steps instead of dropping them
+        added = []
+        for i, step in enumerate(steps):
+            if i not in merged:
+                merged[i] = self.skipped_result(step, reason)
+                added.append(merged[i])
+        return added
+    
+    def record_run(self, steps, merged):
+        """Store {README index: result} in self.results in README order.
+        
+        Each result notes its step's README line, so shard results can be
+        merged back into README order.
+        """
+        for i in sorted(merged):
+            merged[i]['lineStart'] = steps[i].get('lineStart')
+            self.results['steps'].append(merged[i])
+        self.detect_regressions()
+        
+        if self.cache:
+            self.cache.save()
+        if self.artifacts:
+            self.artifacts.save()
+    
+    def detect_regressions(self):
+        """Flag steps much slower than their rolling baseline in the history store.
+        
+        Slow steps get the 'slow' status, or 'failed' once the score reaches
+        regression.failThreshold.
+        """
+        settings = self.config.get('regression', {})
+        if not settings.get('enabled', True):
+            return
+        
+        history = self.open_history()
+        if not history:
+            return
+        try:
+            samples = history.recent_durations(self.results['environment']['os'],
+                                               runs=settings.get('window', 10),
+                                               readme=self.results['readme'])
+        finally:
+            history.close()
+        
+        fail_threshold = settings.get('failThreshold')
+        for result in self.results['steps']:
+            past = samples.get(result['name'], [])
+            if result['status'] != 'success' or result.get('cached') or result.get('carriedOver') \
+                    or len(past) < settings.get('minRuns', 5):
+                continue
+            
+            check = detect_slowdown(
+                result['duration'], past,
+                threshold=settings.get('threshold', 3.5),
+                min_ratio=settings.get('minSlowdown', 1.2),
+                min_delta=settings.get('minDeltaMs', 250)
+            )
+            result['baseline'] = {key: check[key] for key in ('median', 'mad', 'runs', 'score')}
+            if not check['slow']:
+                continue
+            
+            failing = fail_threshold is not None and check['score'] >= fail_threshold
+            result['status'] = 'failed' if failing else 'slow'
+            result['error'] = (f'Duration regression: {result["duration"]:.0f}ms vs median '
+                               f'{check["median"]:.0f}ms over {check["runs"]} runs '
+                               f'(score {check["score"]})')
+            safe_print(f'{"❌" if failing else "🐢"} {result["name"]}: {result["error"]}')
+    
+    def restrict_steps(self, steps, indices):
+        """Copies of the selected steps with dependsOn limited to that selection"""
+        names = {steps[i]['name'] for i in indices}
+        return [
+            dict(steps[i], dependsOn=[n for n in steps[i].get('dependsOn', []) if n in names])
+            for i in indices
+        ]
+    
+    def git_changes(self, ref):
+        """Return (changed paths, changed README line ranges) relative to ref"""
+        def git(*args):
+            return subprocess.run(
+                ['git', '-c', 'core.quotepath=off', *args],
+                capture_output=True, text=True, encoding='utf-8', check=True
+            ).stdout
+        
+        changed = set(git('diff', '--name-only', '--relative', ref).splitlines())
+        changed.update(git('ls-files', '--others', '--exclude-standard').splitlines())
+        
+        ranges = []
+        for line in git('diff', '-U0', '--relative', ref, '--', self.readme_path).splitlines():
+            match = HUNK_HEADER.match(line)
+            if match:
+                start = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                # Pure deletions touch the boundary between two lines
+                ranges.append((start, start + max(count, 1) - 1))
+        
+        readme = Path(self.readme_path).as_posix()
+        if readme in changed and not ranges:
+            # Untracked README: everything is new
+            ranges.append((1, float('inf')))
+        
+        return {Path(p).as_posix() for p in changed if p}, ranges
+    
+    def step_touches_paths(self, step, paths):
+        """True if a changed path is a declared input or lies under workingDir"""
+        base = Path(step.get('workingDir') or '.')
+        base_posix = base.as_posix().rstrip('/')
+        for path in paths:
+            if base_posix not in ('.', '') and (path == base_posix or path.startswith(base_posix + '/')):
+                return True
+            relative = Path(path)
+            if base_posix not in ('.', ''):
+                try:
+                    relative = Path(path).relative_to(base)
+                except ValueError:
+                    continue
+            if any(relative.match(pattern) or relative.as_posix() == pattern
+                   for pattern in step.get('inputs', [])):
+                return True
+        return False
+    
+    def select_changed_steps(self, steps, ref):
+        """Pick steps affected by changes since ref.
+        
+        A step is affected when its README lines changed, a changed path
+        matches its inputs or workingDir, or it didn't pass last time (so a
+        flaky failure doesn't stick until the step is edited). Affected steps, their transitive
+        dependents and the dependencies they need are re-run; every other
+        step is carried over from the previous results. Returns
+        (indices to run, {index: carried result}).
+        """
+        previous = {}
+        if Path(self.previous_results).exists():
+            with open(self.previous_results, 'r', encoding='utf-8') as f:
+                for result in json.load(f).get('steps', []):
+                    previous.setdefault(result['name'], result)
+        
+        try:
+            paths, ranges = self.git_changes(ref)
+        except (OSError, subprocess.CalledProcessError) as e:
+            safe_print(f'⚠️  Could not diff against {ref}, verifying every step: {e}')
+            return list(range(len(steps))), {}
+        
+        affected = set()
+        for i, step in enumerate(steps):
+            line_start = step.get('lineStart', 0)
+            line_end = step.get('lineEnd', float('inf'))
+            if (previous.get(step['name'], {}).get('status') != 'success'
+                    or any(start <= line_end and end >= line_start for start, end in ranges)
+                    or self.step_touches_paths(step, paths)):
+                affected.add(i)
+        
+        deps, dependents = self.build_step_graph(steps)
+        selected = set()
+        stack = list(affected)
+        while stack:
+            i = stack.pop()
+            if i not in selected:
+                selected.add(i)
+                stack.extend(dependents[i])
+        
+        # Re-run prerequisites so affected steps find the state they expect
+        stack = list(selected)
+        while stack:
+            i = stack.pop()
+            for j in deps[i]:
+                if j not in selected:
+                    selected.add(j)
+                    stack.append(j)
+        
+        carried = {}
+        for i, step in enumerate(steps):
+            if i not in selected:
+                carried[i] = dict(previous[step['name']], carriedOver=True)
+        
+        return sorted(selected), carried
     
     def get_summary(self):
         """Generate summary statistics"""
-        total = len(self.results['steps'])
-        success = sum(1 for s in self.results['steps'] if s['status'] == 'success')
-        failed = sum(1 for s in self.results['steps'] if s['status'] == 'failed')
-        warnings = sum(1 for s in self.results['steps'] if s['status'] == 'warning')
-        
-        return {
-            'total': total,
-            'success': success,
-            'failed': failed,
-            'warnings': warnings,
-            'successRate': round((success / total * 100) if total > 0 else 0)
-        }
+        summary = summarize(self.results)
+        summary['successRate'] = success_rate(summary)
+        return summary
     
-    def save_results(self, output_path='.github/readme-verifier/results.json'):
-        """Save results to JSON file"""
+    def save_results(self, output_path=DEFAULT_RESULTS_PATH, record=True):
+        """Save results to JSON file, and to the history store unless record is False"""
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2)
+        with self.tracer.span('save results'):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f, indent=2)
         
         safe_print(f'\n💾 Results saved to {output_path}')
+        if record:
+            self.record_history()
+    
+    def record_history(self):
+        """Append this run to the history store (one transaction per run)"""
+        history = self.open_history()
+        if not history:
+            return
+        try:
+            with self.tracer.span('record history'):
+                history.record(self.results)
+        except Exception as e:
+            safe_print(f'Warning: Could not record history: {e}')
+        finally:
+            history.close()
     
     def generate_badges(self):
         """Generate badge markdown - uses multi-OS results if available"""
-        # Check if combined multi-OS results exist
-        combined_results_path = Path('.github/readme-verifier/combined-results.json')
+        # Use multi-OS combined results if they exist
+        try:
+            combined = load_combined()
+        except Exception:
+            combined = None
         
-        if combined_results_path.exists():
-            # Use multi-OS combined results
+        if combined:
             try:
-                with open(combined_results_path, 'r', encoding='utf-8') as f:
-                    combined = json.load(f)
-                
                 last_verified = datetime.fromisoformat(combined['timestamp']).strftime('%m/%d/%Y')
                 
                 # Calculate overall statistics
-                total_steps = combined['total_steps']
-                total_success = combined['total_success']
                 total_failed = combined['total_failed']
                 total_warnings = combined['total_warnings']
-                success_rate = round((total_success / total_steps * 100)) if total_steps > 0 else 0
+                overall_rate = success_rate(overall_stats(combined))
                 
                 # Determine overall status
                 if total_failed == 0 and total_warnings == 0:
@@ -274,9 +1736,9 @@ class ReadmeVerifier:
                 
                 # Generate OS badges
                 os_badge_parts = []
-                for os_name in ['macOS', 'Ubuntu', 'Windows']:
-                    if os_name in os_results:
-                        stats = os_results[os_name]
+                for os_name, aliases in PLATFORM_ALIASES.items():
+                    _, stats = find_platform(combined, aliases)
+                    if stats:
                         if stats['failed'] == 0:
                             os_badge_parts.append(f'{os_name}%20OK')
                         else:
@@ -288,7 +1750,7 @@ class ReadmeVerifier:
                     f'![Multi-OS Status](https://img.shields.io/badge/multi--os-{status_text}-{status_color})',
                     f'![Platforms](https://img.shields.io/badge/{os_badge_text}-blue)',
                     f'![Last Verified](https://img.shields.io/badge/last%20verified-{last_verified.replace("/", "%2F")}-lightgrey)',
-                    f'![Success Rate](https://img.shields.io/badge/success%20rate-{success_rate}%25-{status_color})'
+                    f'![Success Rate](https://img.shields.io/badge/success%20rate-{overall_rate}%25-{status_color})'
                 ]
                 
                 return ' '.join(badges)
@@ -302,7 +1764,8 @@ class ReadmeVerifier:
         last_verified = datetime.fromisoformat(self.results['timestamp']).strftime('%m/%d/%Y')
         os_name = self.results['environment']['os']
         
-        if summary['failed'] == 0 and summary['warnings'] == 0:
+        if summary['failed'] == 0 and summary['warnings'] == 0 and summary['skipped'] == 0 \
+                and summary['slow'] == 0:
             status_color = 'brightgreen'
             status_text = 'passing'
         elif summary['failed'] == 0:
@@ -318,122 +1781,93 @@ class ReadmeVerifier:
             f'![Last Verified](https://img.shields.io/badge/last%20verified-{last_verified.replace("/", "%2F")}-lightgrey)',
             f'![Success Rate](https://img.shields.io/badge/success%20rate-{summary["successRate"]}%25-{status_color})'
         ]
+        if summary['slow']:
+            badges.append(f'![Slow Steps](https://img.shields.io/badge/slow%20steps-{summary["slow"]}-orange)')
         
         return ' '.join(badges)
     
     def update_readme(self):
         """Update README with verification badges or table"""
-        with open(self.readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Check if we have multi-OS combined results
-        combined_results_path = Path('.github/readme-verifier/combined-results.json')
-        
-        if combined_results_path.exists():
-            # Generate multi-OS table
+        with self.tracer.span('rewrite README', readme=self.readme_path):
+            # Check if we have multi-OS combined results
             try:
-                with open(combined_results_path, 'r', encoding='utf-8') as f:
-                    combined = json.load(f)
-                
-                last_verified = datetime.fromisoformat(combined['timestamp']).strftime('%B %d, %Y at %I:%M %p UTC')
-                
-                # Build table
-                table_lines = [
-                    '## 📊 Multi-OS Verification Status',
-                    '',
-                    f'**Last Verified:** {last_verified}',
-                    '',
-                    '| OS | Total | Success | Failed | Warnings | Success Rate |',
-                    '|---|---|---|---|---|---|'
-                ]
-                
-                # Add rows for each OS
-                os_display_names = {
-                    'macOS': ['macos', 'darwin'],
-                    'Ubuntu': ['ubuntu', 'linux'],
-                    'Windows': ['windows']
-                }
-                
-                for display_name, match_names in os_display_names.items():
-                    # Find matching OS in results
-                    stats = None
-                    matched_key = None
-                    for key, value in combined.get('results_by_os', {}).items():
-                        if any(name in key.lower() for name in match_names):
-                            stats = value
-                            matched_key = key
-                            break
+                combined = load_combined()
+            except Exception:
+                combined = None
+            
+            if combined:
+                # Generate multi-OS table
+                try:
+                    last_verified = datetime.fromisoformat(combined['timestamp']).strftime('%B %d, %Y at %I:%M %p UTC')
                     
-                    if stats:
-                        total = stats['total']
-                        success = stats['success']
-                        failed = stats['failed']
-                        warnings = stats['warnings']
-                        rate = round((success/total)*100) if total > 0 else 0
+                    # Build table
+                    table_lines = [
+                        '## 📊 Multi-OS Verification Status',
+                        '',
+                        f'**Last Verified:** {last_verified}',
+                        '',
+                        '| OS | Total | Success | Failed | Warnings | Success Rate |',
+                        '|---|---|---|---|---|---|'
+                    ]
+                    
+                    # Add rows for each OS
+                    for display_name, aliases in PLATFORM_ALIASES.items():
+                        matched_key, stats = find_platform(combined, aliases)
                         
-                        # Status emoji/icon
-                        if failed == 0 and warnings == 0:
-                            status = '✅'
-                        elif failed == 0:
-                            status = '⚠️'
+                        if stats:
+                            total = stats['total']
+                            success = stats['success']
+                            failed = stats['failed']
+                            warnings = stats['warnings']
+                            rate = success_rate(stats)
+                            
+                            # Status emoji/icon
+                            if failed == 0 and warnings == 0 and not stats.get('slow'):
+                                status = '✅'
+                            elif failed == 0:
+                                status = '⚠️'
+                            else:
+                                status = '❌'
+                            
+                            # Use actual OS name from results in parentheses if different
+                            os_label = display_name
+                            if matched_key and matched_key != display_name:
+                                os_label = f'{display_name} ({matched_key})'
+                            if stats.get('slow'):
+                                os_label += f' 🐢 {stats["slow"]} slow'
+                            
+                            table_lines.append(f'| {status} {os_label} | {total} | {success} | {failed} | {warnings} | {rate}% |')
                         else:
-                            status = '❌'
-                        
-                        # Use actual OS name from results in parentheses if different
-                        os_label = display_name
-                        if matched_key and matched_key != display_name:
-                            os_label = f'{display_name} ({matched_key})'
-                        
-                        table_lines.append(f'| {status} {os_label} | {total} | {success} | {failed} | {warnings} | {rate}% |')
-                    else:
-                        # OS not tested
-                        table_lines.append(f'| ⏭️ {display_name} | - | - | - | - | - |')
-                
-                # Add overall summary
-                table_lines.extend([
-                    '',
-                    '**Overall Statistics:**',
-                    f"- Total Steps Across All Platforms: {combined.get('total_steps', 0)}",
-                    f"- Total Successful: {combined.get('total_success', 0)}",
-                    f"- Total Failed: {combined.get('total_failed', 0)}",
-                    f"- Total Warnings: {combined.get('total_warnings', 0)}",
-                    f"- Combined Success Rate: {round((combined.get('total_success', 0) / combined.get('total_steps', 1) * 100))}%",
-                    ''
-                ])
-                
-                verification_section = '\n'.join(table_lines)
-                
-            except Exception as e:
-                # Fall back to badges on error
+                            # OS not tested
+                            table_lines.append(f'| ⏭️ {display_name} | - | - | - | - | - |')
+                    
+                    # Add overall summary
+                    table_lines.extend([
+                        '',
+                        '**Overall Statistics:**',
+                        f"- Total Steps Across All Platforms: {combined.get('total_steps', 0)}",
+                        f"- Total Successful: {combined.get('total_success', 0)}",
+                        f"- Total Failed: {combined.get('total_failed', 0)}",
+                        f"- Total Warnings: {combined.get('total_warnings', 0)}",
+                        *([f"- Slow Steps (duration regressions): {combined['total_slow']}"]
+                          if combined.get('total_slow') else []),
+                        f"- Combined Success Rate: {success_rate(overall_stats(combined))}%",
+                        ''
+                    ])
+                    
+                    verification_section = '\n'.join(table_lines)
+                    
+                except Exception as e:
+                    # Fall back to badges on error
+                    verification_section = self.generate_badges()
+            else:
+                # Fall back to single-OS badges
                 verification_section = self.generate_badges()
-        else:
-            # Fall back to single-OS badges
-            verification_section = self.generate_badges()
-        
-        badge_marker = '<!-- VERIFICATION-BADGES -->'
-        badge_end_marker = '<!-- END-VERIFICATION-BADGES -->'
-        
-        badge_section = f'{badge_marker}\n{verification_section}\n{badge_end_marker}'
-        
-        if badge_marker in content:
-            # Replace existing badges/table
-            pattern = f'{re.escape(badge_marker)}.*?{re.escape(badge_end_marker)}'
-            content = re.sub(pattern, badge_section, content, flags=re.DOTALL)
-        else:
-            # Add badges/table after first header
-            lines = content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('# '):
-                    lines.insert(i + 1, '')
-                    lines.insert(i + 2, badge_section)
-                    lines.insert(i + 3, '')
-                    break
-            content = '\n'.join(lines)
-        
-        with open(self.readme_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        safe_print('📝 README.md updated with verification badges')
+            
+            if rewrite_badge_section(self.readme_path, verification_section, self.read_readme()):
+                safe_print(f'📝 {self.readme_path} updated with verification badges')
+            else:
+                safe_print(f'📝 {self.readme_path} unchanged, badges already up to date')
     
     def print_report(self):
         """Print verification report"""
@@ -446,29 +1880,351 @@ class ReadmeVerifier:
         safe_print(f'✅ Success:      {summary["success"]}')
         safe_print(f'❌ Failed:       {summary["failed"]}')
         safe_print(f'⚠️  Warnings:     {summary["warnings"]}')
+        safe_print(f'⏭️  Skipped:      {summary["skipped"]}')
+        safe_print(f'🐢 Slow:         {summary["slow"]}')
         safe_print(f'📈 Success Rate: {summary["successRate"]}%')
         safe_print('=' * 60)
         
         safe_print('\nStep Details:')
         for i, step in enumerate(self.results['steps'], 1):
-            icon = '✅' if step['status'] == 'success' else '⚠️' if step['status'] == 'warning' else '❌'
-            safe_print(f'  {i}. {icon} {step["name"]} ({step["duration"]:.0f}ms)')
+            icon = {'success': '✅', 'warning': '⚠️', 'skipped': '⏭️', 'slow': '🐢'}.get(step['status'], '❌')
+            note = ', carried over' if step.get('carriedOver') else ', cached' if step.get('cached') else ''
+            safe_print(f'  {i}. {icon} {step["name"]} ({step["duration"]:.0f}ms{note})')
             if step.get('error'):
                 safe_print(f'     Error: {step["error"]}')
         
+        saved = [step['expect']['savedMs'] for step in self.results['steps']
+                 if step.get('expect') and not step.get('cached') and not step.get('carriedOver')]
+        if saved:
+            safe_print(f'\n🎯 {len(saved)} step(s) stopped on expected output, '
+                       f'{sum(saved) / 1000:.1f}s sooner than waiting for their timeouts')
+        
+        self.print_top_consumers()
         safe_print('')
+    
+    def print_top_consumers(self):
+        """Steps using the most CPU, memory and disk I/O, for sizing runners"""
+        rows = [
+            ('CPU', cpu_ms, lambda u: f'{cpu_ms(u) / 1000:.1f}s, {u.get("cpuPercent", 0):.0f}% of a core'),
+            ('Memory', max_rss, lambda u: f'{u["maxRssKB"] / 1024:.0f} MB peak'),
+            ('Disk I/O', io_blocks, lambda u: f'{io_blocks(u)} blocks')
+        ]
+        lines = []
+        for label, measure, describe in rows:
+            top = top_consumers(self.results['steps'], measure)
+            if top:
+                lines.append(f'  {label + ":":<10}' + ', '.join(
+                    f'{step["name"]} ({describe(step["resources"])})' for step in top))
+        
+        if lines:
+            safe_print('\nTop resource consumers:')
+            for line in lines:
+                safe_print(line)
+
+def parse_readme_steps(readme_path, config_path):
+    """Parse one README in a worker process (see BatchVerifier)"""
+    verifier = ReadmeVerifier(readme_path, config_path, use_cache=False)
+    verifier.base_dir = str(Path(readme_path).parent)
+    return verifier.parse_readme()
+
+class BatchVerifier:
+    """Verifies every README matching a glob, e.g. in a monorepo.
+    
+    READMEs are parsed in parallel worker processes. Their steps then share
+    one worker pool, and a step body (code + working directory) that appears
+    in several READMEs is executed only once.
+    """
+    
+    def __init__(self, pattern, config_path=None, jobs=None, use_cache=True, max_time=None,
+                 results_dir='.github/readme-verifier/batch', tracer=None, shard=None):
+        self.pattern = pattern
+        self.config_path = config_path
+        # --jobs caps each README's concurrency; otherwise execution.sequential decides
+        self.readme_jobs = jobs
+        self.jobs = jobs or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.max_time = max_time
+        self.shard = shard
+        self.results_dir = Path(results_dir)
+        self.verifiers = []
+        self.shared = {}
+        self.lock = threading.Lock()
+        self.tracer = tracer or Tracer(enabled=False)
+    
+    def discover(self):
+        """README paths matching the glob, in a stable order"""
+        return sorted(str(p) for p in Path('.').glob(self.pattern) if p.is_file())
+    
+    @staticmethod
+    def slug(readme_path):
+        return re.sub(r'[^A-Za-z0-9._-]+', '__', Path(readme_path).as_posix()).strip('_')
+    
+    def execute_shared(self, verifier, step):
+        """Run a step, or reuse the result of an identical step from another README.
+        
+        Repeats of a step within one README always run again, since earlier
+        steps in between may have changed what it sees.
+        """
+        from concurrent.futures import Future
+        
+        key = (step['code'], step['language'], os.path.abspath(step['workingDir']))
+        with self.lock:
+            entry = self.shared.get(key)
+            owner = entry is None
+            if owner:
+                entry = (verifier.readme_path, Future())
+                self.shared[key] = entry
+        source, future = entry
+        
+        if not owner and source == verifier.readme_path:
+            return verifier.execute_step(step)
+        if owner:
+            try:
+                future.set_result((verifier.readme_path, verifier.execute_step(step)))
+            except Exception as e:
+                future.set_exception(e)
+            return future.result()[1]
+        
+        try:
+            source, result = future.result()
+        except Exception as e:
+            if step['required']:
+                raise
+            result = verifier.failed_result(step, e)
+            result['status'] = 'warning'
+            return result
+        
+        safe_print(f'\n♻️  {step["name"]} ({verifier.readme_path}): same step already run for {source}')
+        shared = dict(result, name=step['name'], description=step['description'], sharedWith=source)
+        if shared['status'] == 'warning' and step['required']:
+            # Non-fatal where it first ran, but this README requires it
+            raise RuntimeError(shared.get('error') or 'Step failed')
+        return shared
+    
+    def run(self):
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        readmes = self.discover()
+        if not readmes:
+            safe_print(f'⚠️  No READMEs match {self.pattern}')
+            return []
+        
+        safe_print(f'📚 Verifying {len(readmes)} README(s) matching {self.pattern}\n')
+        
+        # Parse every README in parallel before anything runs
+        with self.tracer.span('parse READMEs', count=len(readmes)), \
+                ProcessPoolExecutor(max_workers=min(len(readmes), self.jobs)) as parsers:
+            parsed = list(parsers.map(parse_readme_steps, readmes, [self.config_path] * len(readmes)))
+        
+        shared_cache = shared_artifacts = None
+        for readme, steps in zip(readmes, parsed):
+            verifier = ReadmeVerifier(readme, self.config_path, jobs=self.readme_jobs, use_cache=False,
+                                      max_time=self.max_time, tracer=self.tracer, shard=self.shard)
+            if self.use_cache:
+                shared_cache = shared_cache or verifier.create_cache()
+                shared_artifacts = shared_artifacts or verifier.create_artifact_cache()
+                verifier.cache = shared_cache
+                verifier.artifacts = shared_artifacts
+            verifier.base_dir = str(Path(readme).parent)
+            verifier.logs_dir = verifier.logs_dir / self.slug(readme)
+            self.verifiers.append((verifier, steps))
+        
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            coordinators = [
+                threading.Thread(
+                    target=verifier.verify,
+                    args=(steps, pool, lambda step, v=verifier: self.execute_shared(v, step))
+                )
+                for verifier, steps in self.verifiers
+            ]
+            for thread in coordinators:
+                thread.start()
+            for thread in coordinators:
+                thread.join()
+        
+        return [verifier for verifier, _ in self.verifiers]
+    
+    def save_results(self):
+        """Write per-README results plus one aggregated file"""
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        aggregated = {
+            'timestamp': datetime.now().isoformat(),
+            'pattern': self.pattern,
+            'readmes': {},
+            'total': 0,
+            'success': 0,
+            'failed': 0,
+            'warnings': 0,
+            'skipped': 0,
+            'slow': 0
+        }
+        
+        for verifier, _ in self.verifiers:
+            results_file = self.results_dir / f'{self.slug(verifier.readme_path)}.json'
+            with open(results_file, 'w', encoding='utf-8') as f:
+                json.dump(verifier.results, f, indent=2)
+            verifier.record_history()
+            
+            summary = verifier.get_summary()
+            aggregated['readmes'][Path(verifier.readme_path).as_posix()] = dict(
+                summary, resultsFile=results_file.as_posix())
+            for key in ('total', 'success', 'failed', 'warnings', 'skipped', 'slow'):
+                aggregated[key] += summary[key]
+        
+        aggregated['environment'] = self.verifiers[0][0].results['environment'] if self.verifiers else {}
+        aggregated_file = self.results_dir / 'batch-results.json'
+        with open(aggregated_file, 'w', encoding='utf-8') as f:
+            json.dump(aggregated, f, indent=2)
+        
+        safe_print(f'\n💾 Results for {len(self.verifiers)} README(s) saved to {aggregated_file}')
+        return aggregated
+    
+    def print_report(self):
+        safe_print('\n' + '=' * 60)
+        safe_print('📊 BATCH VERIFICATION REPORT')
+        safe_print('=' * 60)
+        for verifier, _ in self.verifiers:
+            summary = verifier.get_summary()
+            icon = '✅' if summary['failed'] == 0 and summary['warnings'] == 0 else \
+                '⚠️' if summary['failed'] == 0 else '❌'
+            safe_print(f'{icon} {verifier.readme_path}: {summary["success"]}/{summary["total"]} passed')
+        safe_print('=' * 60)
+
+def run_batch(args, tracer=None):
+    batch = BatchVerifier(args.glob, args.config, jobs=args.jobs, use_cache=not args.no_cache,
+                          max_time=args.max_time, tracer=tracer, shard=args.shard)
+    verifiers = batch.run()
+    if not verifiers:
+        return 0
+    
+    batch.print_report()
+    aggregated = batch.save_results()
+    # A shard only saw part of each README; badges come from the merged results
+    for verifier in ([] if args.shard else verifiers):
+        # Each README's badge section is rewritten exactly once
+        verifier.update_readme()
+    
+    return 1 if aggregated['failed'] > 0 else 0
+
+def parse_shard(value):
+    """argparse type for --shard: 'i/N' -> (i, N)"""
+    match = re.fullmatch(r'(\d+)/(\d+)', value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f'expected I/N, e.g. 2/4, got "{value}"')
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f'shard {index} is not between 1 and {count}')
+    return index, count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Verify README setup instructions')
+    parser.add_argument('readme', nargs='?', default='README.md',
+                        help='README file to verify (default: README.md)')
+    parser.add_argument('config', nargs='?', default='.github/readme-verifier/config.yml',
+                        help='Verifier config file')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Run independent steps on N parallel workers '
+                             '(default: CPU count when execution.sequential is false)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore cached results and re-run every step')
+    parser.add_argument('--max-time', metavar='SECONDS', type=float, default=None,
+                        help='Overall time budget; unfinished steps are reported as skipped '
+                             '(default: settings.maxVerificationTime, 0 disables)')
+    parser.add_argument('--glob', metavar='PATTERN', default=None,
+                        help="Verify every README matching a glob, e.g. 'packages/**/README.md'")
+    parser.add_argument('--since', metavar='REF', default=None,
+                        help='Only re-run steps affected by changes since a git ref; '
+                             'carry the rest over from the previous results')
+    parser.add_argument('--previous-results', metavar='PATH', default=None,
+                        help='Results file to carry unchanged steps over from '
+                             '(default: storage.resultsPath)')
+    parser.add_argument('--trace', metavar='PATH', default=None,
+                        help='Write a Chrome Trace Event timeline of the run (open in Perfetto)')
+    parser.add_argument('--shard', metavar='I/N', type=parse_shard, default=None,
+                        help='Run only shard I of N, split by historical step duration '
+                             '(dependsOn chains stay in one shard)')
+    parser.add_argument('--import-time', action='store_true',
+                        help='Re-run under `python -X importtime` and report the slowest imports '
+                             'and the time to the first step')
+    parser.add_argument('--watch', action='store_true',
+                        help='Stay running and re-verify on every README or input change, '
+                             're-running only the steps that changed')
+    args = parser.parse_args(argv)
+    if args.watch and (args.glob or args.shard or args.since):
+        parser.error('--watch verifies a single README and cannot be combined with '
+                     '--glob, --shard or --since')
+    return args
+
+def profile_startup(argv):
+    """Re-run this command under `python -X importtime` and report where startup time goes"""
+    argv = [arg for arg in argv if arg != '--import-time']
+    env = dict(os.environ, **{LAUNCH_ENV: repr(time.time())})
+    completed = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv],
+                               env=env, stderr=subprocess.PIPE, text=True, encoding='utf-8',
+                               errors='replace')
+
+    # Lines look like "import time:  self [us] | cumulative | <indent>package"
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        if own.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append((int(cumulative), int(own), depth, name.strip()))
+
+    top_level = sorted((entry for entry in imports if entry[2] == 0), reverse=True)
+    loaded = {entry[3] for entry in imports}
+    safe_print(f'\n⏱️  Import time: {sum(entry[0] for entry in top_level) / 1000:.1f}ms '
+               f'in {len(imports)} module(s)')
+    for cumulative, own, _, name in top_level[:IMPORT_REPORT_LIMIT]:
+        safe_print(f'   {cumulative / 1000:>7.1f}ms  {name} ({own / 1000:.1f}ms itself)')
+    heavy = [name for name in ('yaml', 'asyncio', 'concurrent.futures', 'statistics') if name in loaded]
+    safe_print(f'   Deferred imports loaded: {", ".join(heavy) if heavy else "none"}')
+    return completed.returncode
 
 def main():
-    readme_path = sys.argv[1] if len(sys.argv) > 1 else 'README.md'
-    config_path = sys.argv[2] if len(sys.argv) > 2 else '.github/readme-verifier/config.yml'
+    configure_console()
+    args = parse_args()
+    if args.import_time:
+        sys.exit(profile_startup(sys.argv[1:]))
+    tracer = Tracer(enabled=bool(args.trace))
+    try:
+        run(args, tracer)
+    finally:
+        if args.trace:
+            tracer.export(args.trace)
+            safe_print(f'🕒 Trace saved to {args.trace} (open in https://ui.perfetto.dev)')
+
+def run(args, tracer):
+    if args.glob:
+        try:
+            sys.exit(run_batch(args, tracer))
+        except Exception as e:
+            safe_print(f'\n❌ Verification failed: {e}')
+            sys.exit(1)
+    
+    verifier = ReadmeVerifier(args.readme, args.config, jobs=args.jobs,
+                              use_cache=not args.no_cache, since=args.since,
+                              previous_results=args.previous_results, max_time=args.max_time,
+                              tracer=tracer, shard=args.shard)
+    if LAUNCH_ENV in os.environ:
+        # Only the re-run started by --import-time reports this, and not to its steps
+        verifier.launched = float(os.environ.pop(LAUNCH_ENV))
     
-    verifier = ReadmeVerifier(readme_path, config_path)
+    if args.watch:
+        from readme_watch import WatchSession
+        sys.exit(WatchSession(verifier, log=safe_print).run())
     
     try:
         verifier.verify()
         verifier.print_report()
         verifier.save_results()
-        verifier.update_readme()
+        if args.shard:
+            safe_print('📝 README badges are left to the job that merges all shards')
+        else:
+            verifier.update_readme()
         
         summary = verifier.get_summary()
         
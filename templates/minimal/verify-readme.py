@@ -4,7 +4,6 @@ Living README Verifier (Python Implementation)
 Parses README.md, executes verification steps, and updates status badges
 """
 
-import re
 import json
 import subprocess
 import sys
@@ -13,6 +12,10 @@ from datetime import datetime
 from pathlib import Path
 import platform
 
+# The Markdown tokenizer and badge rewriting live in readme_markdown.py, a
+# copy of scripts/readme_markdown.py shipped next to this script
+from readme_markdown import iter_step_blocks, rewrite_badge_section
+
 class ReadmeVerifier:
     def __init__(self, readme_path, config_path=None):
         self.readme_path = readme_path
@@ -33,29 +36,27 @@ class ReadmeVerifier:
     
     def parse_readme(self):
         """Parse README.md and extract verification steps"""
-        with open(self.readme_path, 'r') as f:
-            content = f.read()
-        
         steps = []
-        # Regex to match YAML frontmatter followed by code block
-        pattern = r'---\n(.*?)\n---\n```(\w+)?\n(.*?)```'
         
-        for match in re.finditer(pattern, content, re.DOTALL):
-            try:
-                frontmatter = yaml.safe_load(match.group(1))
-                
-                if frontmatter and frontmatter.get('verify'):
-                    steps.append({
-                        'name': frontmatter.get('step', f'step-{len(steps) + 1}'),
-                        'description': frontmatter.get('description', ''),
-                        'language': match.group(2) or 'bash',
-                        'code': match.group(3).strip(),
-                        'required': frontmatter.get('required', True),
-                        'timeout': frontmatter.get('timeout', 60),
-                        'workingDir': frontmatter.get('workingDir', '.')
-                    })
-            except Exception as e:
-                print(f'Warning: Failed to parse frontmatter: {e}')
+        with open(self.readme_path, 'r') as f:
+            for block in iter_step_blocks(f):
+                try:
+                    frontmatter = yaml.safe_load(block['frontmatter'])
+                    
+                    if isinstance(frontmatter, dict) and frontmatter.get('verify'):
+                        steps.append({
+                            'name': frontmatter.get('step', f'step-{len(steps) + 1}'),
+                            'description': frontmatter.get('description', ''),
+                            'language': block['language'] or 'bash',
+                            'code': block['code'],
+                            'required': frontmatter.get('required', True),
+                            'timeout': frontmatter.get('timeout', 60),
+                            'workingDir': frontmatter.get('workingDir', '.'),
+                            'lineStart': block['lineStart'],
+                            'lineEnd': block['lineEnd']
+                        })
+                except Exception as e:
+                    print(f'Warning: Failed to parse frontmatter (line {block["lineStart"]}): {e}')
         
         return steps
     
@@ -213,36 +214,12 @@ class ReadmeVerifier:
         return ' '.join(badges)
     
     def update_readme(self):
-        """Update README with verification badges"""
-        with open(self.readme_path, 'r') as f:
-            content = f.read()
-        
-        badges = self.generate_badges()
-        
-        badge_marker = '<!-- VERIFICATION-BADGES -->'
-        badge_end_marker = '<!-- END-VERIFICATION-BADGES -->'
-        
-        badge_section = f'{badge_marker}\n{badges}\n{badge_end_marker}'
-        
-        if badge_marker in content:
-            # Replace existing badges
-            pattern = f'{re.escape(badge_marker)}.*?{re.escape(badge_end_marker)}'
-            content = re.sub(pattern, badge_section, content, flags=re.DOTALL)
+        """Update README with verification badges, leaving it untouched when they didn't change"""
+        # Markers inside code fences are documentation examples, not the badge slot
+        if rewrite_badge_section(self.readme_path, self.generate_badges()):
+            print('📝 README.md updated with verification badges')
         else:
-            # Add badges after first header
-            lines = content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('# '):
-                    lines.insert(i + 1, '')
-                    lines.insert(i + 2, badge_section)
-                    lines.insert(i + 3, '')
-                    break
-            content = '\n'.join(lines)
-        
-        with open(self.readme_path, 'w') as f:
-            f.write(content)
-        
-        print('📝 README.md updated with verification badges')
+            print('📝 README.md badges already up to date')
     
     def print_report(self):
         """Print verification report"""
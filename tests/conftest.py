@@ -0,0 +1,30 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS))
+
+@pytest.fixture(scope='session')
+def verify_readme():
+    """The scripts/verify-readme.py module (its name isn't importable as is)"""
+    spec = importlib.util.spec_from_file_location('verify_readme', SCRIPTS / 'verify-readme.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """An empty project directory, made the working directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def write_readme(path, *steps):
+    """Write a README of verification steps given as (frontmatter lines, code)"""
+    blocks = ['# Test']
+    for frontmatter, code in steps:
+        blocks.append('---\nverify: true\n' + frontmatter.strip() + '\n---\n```bash\n' + code + '\n```')
+    path.write_text('\n\n'.join(blocks) + '\n', encoding='utf-8')
+    return str(path)
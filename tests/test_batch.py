@@ -0,0 +1,36 @@
+import json
+import subprocess
+import sys
+
+from conftest import SCRIPTS, write_readme
+
+STATEFUL = (
+    ('step: "before"\nrequired: false', 'test -f made.txt'),
+    ('step: "make"\nrequired: false', 'touch made.txt'),
+    ('step: "after"\nrequired: false', 'test -f made.txt'),
+)
+
+def run_batch(project, pattern, jobs=1):
+    """Run --glob in a subprocess (READMEs are parsed in worker processes) and load its results"""
+    subprocess.run([sys.executable, str(SCRIPTS / 'verify-readme.py'), '--glob', pattern,
+                    '--no-cache', '--jobs', str(jobs)], cwd=project, capture_output=True, timeout=120)
+    batch = project / '.github' / 'readme-verifier' / 'batch'
+    aggregated = json.loads((batch / 'batch-results.json').read_text())
+    return {readme: json.loads((project / entry['resultsFile']).read_text())['steps']
+            for readme, entry in aggregated['readmes'].items()}
+
+def test_repeated_step_in_one_readme_runs_again(project):
+    (project / 'a').mkdir()
+    write_readme(project / 'a' / 'README.md', *STATEFUL)
+    steps = run_batch(project, '*/README.md')['a/README.md']
+    assert [step['status'] for step in steps] == ['warning', 'success', 'success']
+    assert not any('sharedWith' in step for step in steps)
+
+def test_identical_step_in_another_readme_is_reused(project):
+    write_readme(project / 'README.md', ('step: "count"', 'echo run >> runs.txt'))
+    (project / 'docs').mkdir()
+    write_readme(project / 'docs' / 'README.md', ('step: "count again"\nworkingDir: ".."', 'echo run >> runs.txt'))
+    steps = run_batch(project, '**/README.md', jobs=2)
+    assert (project / 'runs.txt').read_text() == 'run\n'
+    shared = [step for readme in steps.values() for step in readme if 'sharedWith' in step]
+    assert len(shared) == 1 and shared[0]['status'] == 'success'
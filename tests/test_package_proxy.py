@@ -0,0 +1,142 @@
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from package_proxy import PackageProxy
+
+class IndexHandler(BaseHTTPRequestHandler):
+    """A stand-in package index: one index page linking to one wheel"""
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        if self.path == '/simple/demo/':
+            body = f'<a href="{base}/files/demo-1.0-py3-none-any.whl">demo</a>'.encode()
+            content_type = 'text/html'
+        elif self.path == '/simple/legacy/':
+            # Latin-1, not UTF-8
+            body = f'caf\xe9 <a href="{base}/files/legacy-1.0.tar.gz">legacy</a>'.encode('latin-1')
+            content_type = 'text/html; charset=iso-8859-1'
+        elif self.path == '/files/demo-1.0-py3-none-any.whl':
+            body, content_type = b'PK\x03\x04wheel', 'application/octet-stream'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def index():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), IndexHandler)
+    server.hits = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def start_proxy(tmp_path, index, **options):
+    base = f'http://127.0.0.1:{index.server_address[1]}'
+    proxy = PackageProxy(tmp_path / 'store', upstreams={'pypi': f'{base}/simple', 'pypi-files': f'{base}/files'},
+                         **options)
+    proxy.start()
+    return proxy
+
+def get(url, accept=None):
+    request = urllib.request.Request(url, headers={'Accept': accept} if accept else {})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read()
+
+def test_online_then_offline(tmp_path, index):
+    proxy = start_proxy(tmp_path, index)
+    try:
+        page = get(f'{proxy.url}/pypi/demo/').decode()
+        # File links are rewritten to come back through the proxy
+        assert f'{proxy.url}/pypi-files/demo-1.0-py3-none-any.whl' in page
+        assert get(f'{proxy.url}/pypi-files/demo-1.0-py3-none-any.whl') == b'PK\x03\x04wheel'
+        # A package file is never fetched twice; a fresh index page isn't either
+        get(f'{proxy.url}/pypi-files/demo-1.0-py3-none-any.whl')
+        get(f'{proxy.url}/pypi/demo/')
+        assert len(index.hits) == 2
+        assert proxy.stats['fetched'] == 2 and proxy.stats['fromStore'] == 2
+    finally:
+        proxy.stop()
+
+    offline = start_proxy(tmp_path, index, offline=True, metadata_max_age=0)
+    try:
+        assert f'{offline.url}/pypi-files/' in get(f'{offline.url}/pypi/demo/').decode()
+        assert get(f'{offline.url}/pypi-files/demo-1.0-py3-none-any.whl') == b'PK\x03\x04wheel'
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get(f'{offline.url}/pypi/other/')
+        assert error.value.code == 404
+        assert len(index.hits) == 2 and offline.stats['missing'] == 1
+    finally:
+        offline.stop()
+
+def test_stale_index_pages_are_refetched_or_served_when_upstream_is_down(tmp_path, index, monkeypatch):
+    proxy = start_proxy(tmp_path, index, metadata_max_age=0)
+    try:
+        get(f'{proxy.url}/pypi/demo/')
+        get(f'{proxy.url}/pypi/demo/')
+        assert index.hits == ['/simple/demo/'] * 2
+
+        def unreachable(url, accept):
+            raise OSError('connection refused')
+        monkeypatch.setattr(proxy, 'fetch', unreachable)
+        assert b'demo' in get(f'{proxy.url}/pypi/demo/')
+    finally:
+        proxy.stop()
+
+def test_upstream_errors_are_passed_on_and_not_stored(tmp_path, index):
+    proxy = start_proxy(tmp_path, index)
+    try:
+        for _ in range(2):
+            with pytest.raises(urllib.error.HTTPError) as error:
+                get(f'{proxy.url}/pypi/missing/')
+            assert error.value.code == 404
+        assert index.hits == ['/simple/missing/'] * 2
+        with pytest.raises(urllib.error.HTTPError):
+            get(f'{proxy.url}/nope/x')
+    finally:
+        proxy.stop()
+
+def test_environment_points_installers_at_the_proxy(tmp_path, index):
+    proxy = start_proxy(tmp_path, index)
+    try:
+        env = proxy.environment()
+        assert env['PIP_INDEX_URL'] == f'{proxy.url}/pypi/'
+        assert env['npm_config_registry'] == f'{proxy.url}/npm/'
+    finally:
+        proxy.stop()
+
+def test_non_utf8_index_pages_are_rewritten_byte_for_byte(tmp_path, index):
+    proxy = start_proxy(tmp_path, index)
+    try:
+        page = get(f'{proxy.url}/pypi/legacy/')
+        assert page == f'caf\xe9 <a href="{proxy.url}/pypi-files/legacy-1.0.tar.gz">legacy</a>'.encode('latin-1')
+    finally:
+        proxy.stop()
+
+def test_offline_serves_pages_stored_under_another_accept(tmp_path, index):
+    proxy = start_proxy(tmp_path, index)
+    try:
+        get(f'{proxy.url}/pypi/demo/', accept='text/html')
+        get(f'{proxy.url}/pypi-files/demo-1.0-py3-none-any.whl', accept='application/octet-stream')
+    finally:
+        proxy.stop()
+
+    offline = start_proxy(tmp_path, index, offline=True)
+    try:
+        assert b'demo' in get(f'{offline.url}/pypi/demo/', accept='application/vnd.pypi.simple.v1+json')
+        assert get(f'{offline.url}/pypi-files/demo-1.0-py3-none-any.whl', accept='*/*') == b'PK\x03\x04wheel'
+        assert offline.stats['missing'] == 0
+    finally:
+        offline.stop()
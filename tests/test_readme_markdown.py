@@ -0,0 +1,133 @@
+import pytest
+import yaml
+
+from readme_markdown import (BADGE_END_MARKER, BADGE_MARKER, find_marker_span, iter_step_blocks,
+                             parse_flat_frontmatter, render_badge_section, reparse_step_blocks,
+                             tokenize_markdown)
+
+README = '''# Project
+
+---
+name: build
+---
+```bash
+make build
+```
+
+Text with a --- rule
+---
+
+````markdown
+---
+name: inside-fence
+---
+```bash
+echo nope
+```
+````
+
+---
+name: test
+---
+~~~sh
+make test
+~~~
+'''
+
+def test_tokenizer_finds_steps_outside_fences():
+    blocks = list(iter_step_blocks(README.splitlines()))
+    assert [b['frontmatter'] for b in blocks] == ['name: build', 'name: test']
+    assert [b['language'] for b in blocks] == ['bash', 'sh']
+    assert [b['code'] for b in blocks] == ['make build', 'make test']
+    assert (blocks[0]['lineStart'], blocks[0]['codeStart'], blocks[0]['lineEnd']) == (3, 7, 8)
+
+def test_frontmatter_must_touch_the_fence():
+    lines = ['---', 'name: a', '---', '', '```bash', 'echo', '```']
+    assert list(iter_step_blocks(lines)) == []
+
+def test_markers_inside_fences_are_ignored():
+    lines = ['```', '<!-- M -->', '```', 'x <!-- M -->']
+    hits = [hit for kind, hit in tokenize_markdown(lines, ('<!-- M -->',)) if kind == 'marker']
+    assert hits == [{'marker': '<!-- M -->', 'line': 4, 'column': 2}]
+
+def test_unclosed_fence_swallows_the_rest():
+    lines = ['````', '---', 'name: a', '---', '```bash', 'echo', '```']
+    assert list(iter_step_blocks(lines)) == []
+
+def test_many_rules_stay_linear():
+    lines = ['---'] * 50000 + ['```bash', 'echo', '```']
+    blocks = list(iter_step_blocks(lines))
+    assert len(blocks) == 1 and blocks[0]['frontmatter'] == ''
+
+def test_badge_section_replaced_between_markers():
+    data = f'# T\n\n{BADGE_MARKER}\nold\n{BADGE_END_MARKER}\n\nbody ü\n'.encode('utf-8')
+    out = render_badge_section(data, 'new')
+    assert out == f'# T\n\n{BADGE_MARKER}\nnew\n{BADGE_END_MARKER}\n\nbody ü\n'.encode('utf-8')
+    assert render_badge_section(out, 'new') == out
+
+def test_badge_markers_in_fences_and_multibyte_offsets():
+    data = f'é ```\n```\n{BADGE_MARKER}\n```\nü {BADGE_MARKER}{BADGE_END_MARKER}\n'.encode('utf-8')
+    start, end = find_marker_span(data)
+    assert data[start:end] == f'{BADGE_MARKER}{BADGE_END_MARKER}'.encode('utf-8')
+
+def test_badge_section_inserted_after_heading_or_left_alone():
+    assert render_badge_section(b'# T\ntext\n', 's') == \
+        f'# T\n\n{BADGE_MARKER}\ns\n{BADGE_END_MARKER}\n\ntext\n'.encode('utf-8')
+    assert render_badge_section(b'no heading\n', 's') == b'no heading\n'
+    unterminated = f'# T\n{BADGE_MARKER}\n'.encode('utf-8')
+    assert render_badge_section(unterminated, 's') == unterminated
+
+@pytest.mark.parametrize('text', [
+    'name: build\ntimeout: 30\nrequired: no\nratio: 1.5',
+    "name: 'quoted: value'\nlang: \"bash\"",
+    'tags: [a, b, 3]\nempty: []\nnothing:\ntilde: ~',
+    '# comment\nname: x # trailing\nflag: On\nnum: -0',
+    'path: /usr/bin\nwhen: TRUE',
+])
+def test_flat_frontmatter_matches_yaml(text):
+    assert parse_flat_frontmatter(text) == yaml.safe_load(text)
+
+@pytest.mark.parametrize('text', [
+    '',
+    'env:\n  A: 1',
+    'name: "esc\\"aped"',
+    'time: 12:30',
+    'version: 1.0.0e',
+    'yes: 1',
+    'list: [a, [b]]',
+    'name: a: b',
+    '\tname: x',
+    'date: 2024-01-01',
+    'name: *alias',
+])
+def test_flat_frontmatter_defers_to_yaml(text):
+    assert parse_flat_frontmatter(text) is None
+
+def step_lines(*names):
+    lines = ['# T', '']
+    for name in names:
+        lines += ['---', f'name: {name}', '---', '```bash', f'echo {name}', '```', '']
+    return lines
+
+def test_reparse_matches_a_full_parse():
+    old = step_lines('a', 'b', 'c', 'd')
+    old_blocks = list(iter_step_blocks(old))
+    edits = [
+        step_lines('a', 'b', 'x', 'd'),
+        step_lines('a', 'b', 'c', 'd', 'e'),
+        ['intro', ''] + step_lines('a', 'b', 'c', 'd'),
+        step_lines('a', 'c', 'd'),
+        old[:-3] + ['echo more'] + old[-3:],
+        list(old),
+    ]
+    for new in edits:
+        blocks, _ = reparse_step_blocks(old, old_blocks, new)
+        assert blocks == list(iter_step_blocks(new))
+
+def test_reparse_scans_only_the_edit():
+    old = step_lines(*'abcdefghij')
+    new = list(old)
+    new[new.index('echo e')] = 'echo E'
+    blocks, scanned = reparse_step_blocks(old, list(iter_step_blocks(old)), new)
+    assert blocks == list(iter_step_blocks(new))
+    assert scanned <= 2 * 7
@@ -0,0 +1,67 @@
+import threading
+
+from conftest import write_readme
+from readme_watch import ChangeWatcher, WatchSession
+
+STEPS = [
+    ('step: "a"', 'echo a >> ran.log'),
+    ('step: "b"\ndependsOn: ["a"]', 'echo b >> ran.log'),
+    ('step: "c"\ninputs: ["data.txt"]', 'echo c >> ran.log && cat data.txt'),
+]
+
+def runs(project):
+    path = project / 'ran.log'
+    ran = path.read_text().split() if path.exists() else []
+    path.write_text('')
+    return sorted(ran)
+
+def watch(verify_readme, project, steps=STEPS):
+    (project / 'data.txt').write_text('one')
+    readme = write_readme(project / 'README.md', *steps)
+    verifier = verify_readme.ReadmeVerifier(readme, use_cache=False)
+    log = []
+    return WatchSession(verifier, log=log.append), log
+
+def test_only_changed_steps_and_their_dependents_rerun(verify_readme, project):
+    session, log = watch(verify_readme, project)
+    session.iteration()
+    assert runs(project) == ['a', 'b', 'c']
+
+    session.iteration()
+    assert runs(project) == [] and log[-1] == '👀 No step code or inputs changed'
+
+    readme = project / 'README.md'
+    readme.write_text(readme.read_text().replace('echo a >>', 'echo  a >>'))
+    session.iteration()
+    assert runs(project) == ['a', 'b']
+    results = {step['name']: step for step in session.verifier.results['steps']}
+    assert results['c'].get('carriedOver') and not results['a'].get('carriedOver')
+
+    (project / 'data.txt').write_text('two')
+    session.iteration()
+    assert runs(project) == ['c']
+
+def test_edits_are_reparsed_incrementally(verify_readme, project):
+    steps = [(f'step: "s{i}"', f'echo s{i} >> ran.log') for i in range(20)]
+    session, log = watch(verify_readme, project, steps)
+    session.iteration()
+    runs(project)
+    readme = project / 'README.md'
+    readme.write_text(readme.read_text().replace('echo s10 >>', 'echo x >> ran.log; echo s10 >>'))
+    session.iteration()
+    assert runs(project) == ['s10', 'x']
+    reparsed = [line for line in log if line.startswith('👀 Re-parsed')]
+    scanned, total = map(int, reparsed[-1].split()[2::2][:2])
+    assert scanned < total / 4
+
+def test_change_watcher_reports_only_watched_files(project):
+    watched = project / 'README.md'
+    watched.write_text('one')
+    watcher = ChangeWatcher(lambda: [str(watched)], interval=0.05)
+    try:
+        watcher.mark()
+        (project / 'other.txt').write_text('x')
+        threading.Timer(0.3, watched.write_text, args=('two!',)).start()
+        assert watcher.wait() == [str(watched)]
+    finally:
+        watcher.close()
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import write_readme
+from verification_history import HistoryStore
+
+STEPS = (('step: "quick"', 'true'), ('step: "slowed"\nrequired: false', 'sleep 0.8'))
+
+def config(project, **regression):
+    path = project / 'config.yml'
+    settings = ''.join(f'\n  {key}: {value}' for key, value in dict({'enabled': 'true'}, **regression).items())
+    path.write_text(f'storage:\n  keepHistory: true\n  historyPath: "history/"\nregression:{settings}\n')
+    return str(path)
+
+def seed_history(verify_readme, readme, config_path, runs=6):
+    """Past runs in which every step took about 100 ms"""
+    verifier = verify_readme.ReadmeVerifier(readme, config_path)
+    store = HistoryStore.from_config(verifier.config)
+    for run in range(runs):
+        store.record({'timestamp': f'2026-01-0{run + 1}T00:00:00', 'readme': verifier.results['readme'],
+                      'environment': verifier.results['environment'],
+                      'steps': [{'name': name, 'status': 'success', 'duration': 100 + run}
+                                for name in ('quick', 'slowed')]})
+    store.close()
+
+def statuses(verifier):
+    return {step['name']: step['status'] for step in verifier.results['steps']}
+
+def test_slowdown_against_history_is_flagged(verify_readme, project):
+    readme = write_readme(project / 'README.md', *STEPS)
+    config_path = config(project)
+    seed_history(verify_readme, readme, config_path)
+    verifier = verify_readme.ReadmeVerifier(readme, config_path, use_cache=False)
+    verifier.verify()
+    assert statuses(verifier) == {'quick': 'success', 'slowed': 'slow'}
+    slowed = verifier.results['steps'][1]
+    assert slowed['baseline']['runs'] == 6 and 'Duration regression' in slowed['error']
+    assert verifier.get_summary()['failed'] == 0
+
+def test_fail_threshold_fails_the_step(verify_readme, project):
+    readme = write_readme(project / 'README.md', *STEPS)
+    config_path = config(project, failThreshold=5)
+    seed_history(verify_readme, readme, config_path)
+    verifier = verify_readme.ReadmeVerifier(readme, config_path, use_cache=False)
+    verifier.verify()
+    assert statuses(verifier)['slowed'] == 'failed'
+
+@pytest.mark.parametrize('runs, regression', [(3, {}), (6, {'enabled': 'false'})])
+def test_not_judged_without_enough_history_or_when_off(verify_readme, project, runs, regression):
+    readme = write_readme(project / 'README.md', *STEPS)
+    config_path = config(project, **regression)
+    seed_history(verify_readme, readme, config_path, runs=runs)
+    verifier = verify_readme.ReadmeVerifier(readme, config_path, use_cache=False)
+    verifier.verify()
+    assert statuses(verifier)['slowed'] == 'success'
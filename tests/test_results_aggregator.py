@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+
+from conftest import write_readme
+from results_aggregator import combine, iter_results, merge_shard_files, merge_sources, summarize_file
+
+STATUSES = ['success', 'slow', 'failed', 'warning', 'skipped']
+
+def write_results(path, os_name, statuses, timestamp='2026-01-01T00:00:00', shard=None):
+    results = {'timestamp': timestamp, 'environment': {'os': os_name},
+               'steps': [{'name': f'step {i}', 'status': status, 'stdout': '1e5 ' * 10}
+                         for i, status in enumerate(statuses)]}
+    if shard:
+        results['shard'] = shard
+    path.write_text(json.dumps(results, indent=2))
+    return path
+
+class ShortReads(io.StringIO):
+    """A file that returns at most `limit` characters per read, like a slow pipe"""
+
+    def __init__(self, text, limit):
+        super().__init__(text)
+        self.limit = limit
+
+    def read(self, size=-1):
+        return super().read(self.limit)
+
+@pytest.mark.parametrize('limit', [1, 7, 64 * 1024])
+def test_stream_yields_each_step(limit):
+    document = {'a': 1.25, 'steps': [{'n': 1}, {'n': [2, 3]}], 'b': 12345, 'tail': 'x'}
+    pairs = list(iter_results(ShortReads(json.dumps(document), limit)))
+    assert pairs == [('a', 1.25), ('steps', {'n': 1}), ('steps', {'n': [2, 3]}), ('b', 12345), ('tail', 'x')]
+
+def test_stream_rejects_truncated_files():
+    with pytest.raises(ValueError):
+        list(iter_results(io.StringIO('{"steps": [{"n": 1},')))
+
+def test_summarize_counts_statuses(tmp_path):
+    source = summarize_file(write_results(tmp_path / 'r.json', 'Linux', STATUSES))
+    assert source['os'] == 'Linux'
+    assert {key: source[key] for key in ('total', 'success', 'slow', 'failed', 'warnings', 'skipped')} == \
+        {'total': 5, 'success': 2, 'slow': 1, 'failed': 1, 'warnings': 1, 'skipped': 1}
+
+def test_remerging_an_os_replaces_its_counts(tmp_path):
+    linux = write_results(tmp_path / 'linux.json', 'Linux', ['success', 'failed'])
+    mac = write_results(tmp_path / 'mac.json', 'macOS', ['success'], timestamp='2026-01-02T00:00:00')
+    combined = combine([linux, mac])
+    assert combined['total_steps'] == 3 and combined['timestamp'] == '2026-01-02T00:00:00'
+
+    fixed = write_results(tmp_path / 'linux2.json', 'Linux', ['success', 'success'])
+    combined = combine([fixed], existing=combined)
+    assert combined['total_steps'] == 3 and combined['total_failed'] == 0
+    assert combined['results_by_os']['Linux']['success'] == 2
+
+def test_shards_replace_an_unsharded_run(tmp_path):
+    whole = combine([write_results(tmp_path / 'w.json', 'Linux', ['failed'] * 4)])
+    shards = [summarize_file(write_results(tmp_path / f's{i}.json', 'Linux', ['success'], shard=f'{i}/2'))
+              for i in (1, 2)]
+    combined = merge_sources(shards, whole)
+    assert combined['results_by_os']['Linux']['total'] == 2
+    assert sorted(combined['sources']) == ['Linux shard 1/2', 'Linux shard 2/2']
+
+def test_merge_shard_files_restores_readme_order(tmp_path):
+    def shard(name, label, lines, timestamp='2026-01-01T00:00:00'):
+        path = tmp_path / name
+        path.write_text(json.dumps({'timestamp': timestamp, 'environment': {'os': 'Linux'}, 'shard': label,
+                                    'steps': [{'name': f'line {line}', 'status': 'success', 'lineStart': line}
+                                              for line in lines]}))
+        return path
+
+    second = shard('s2.json', '2/2', [20, 50], timestamp='2026-01-03T00:00:00')
+    first = shard('s1.json', '1/2', [40, 10, 30])
+    merge_shard_files([second, first], tmp_path / 'out.json')
+    merged = json.loads((tmp_path / 'out.json').read_text())
+    assert [step['lineStart'] for step in merged['steps']] == [10, 20, 30, 40, 50]
+    assert merged['timestamp'] == '2026-01-03T00:00:00' and merged['shards'] == 2
+    assert 'shard' not in merged
+
+    merge_shard_files([first, second], tmp_path / 'again.json')
+    assert (tmp_path / 'again.json').read_text() == (tmp_path / 'out.json').read_text()
+
+def test_sharded_runs_merge_back_in_readme_order(verify_readme, project):
+    readme = write_readme(project / 'README.md', *[(f'step: "s{i}"', 'true') for i in range(6)])
+    paths = []
+    for index in (2, 1):
+        verifier = verify_readme.ReadmeVerifier(readme, shard=(index, 2))
+        verifier.verify()
+        path = project / f'shard{index}.json'
+        verifier.save_results(str(path), record=False)
+        paths.append(path)
+    merge_shard_files(paths, project / 'merged.json')
+    steps = json.loads((project / 'merged.json').read_text())['steps']
+    assert [step['name'] for step in steps] == [f's{i}' for i in range(6)]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from conftest import write_readme
+
+STEPS = (
+    ('step: "a"', 'sleep 0.3'),
+    ('step: "b"', 'false'),
+    ('step: "c"\ndependsOn: ["a"]', 'true'),
+)
+
+def statuses(results):
+    return {result['name']: (result['status'], result['error']) for result in results}
+
+def test_steps_blocked_by_a_required_failure_say_so(verify_readme, project):
+    verifier = verify_readme.ReadmeVerifier(write_readme(project / 'README.md', *STEPS), jobs=4, max_time=30)
+    verifier.verify()
+    results = statuses(verifier.results['steps'])
+    assert results['a'][0] == 'success' and results['b'][0] == 'failed'
+    assert results['c'] == ('skipped', 'Skipped: required step "b" failed')
+
+def test_iter_verify_gives_the_same_reason(verify_readme, project):
+    verifier = verify_readme.ReadmeVerifier(write_readme(project / 'README.md', *STEPS), jobs=4, max_time=30)
+
+    async def collect():
+        return [result async for result in verifier.iter_verify()]
+    results = statuses(asyncio.run(collect()))
+    assert results['c'] == ('skipped', 'Skipped: required step "b" failed')
+
+def test_budget_reason_only_when_the_budget_ran_out(verify_readme, project):
+    readme = write_readme(project / 'README.md', ('step: "slow"', 'sleep 2'), ('step: "next"', 'true'))
+    verifier = verify_readme.ReadmeVerifier(readme, max_time=1)
+    verifier.verify()
+    results = statuses(verifier.results['steps'])
+    assert results['slow'][0] == 'skipped'
+    assert results['next'] == ('skipped', 'Skipped: verification time budget exhausted')
+
+def test_dependency_order_and_cycles(verify_readme):
+    verifier = verify_readme.ReadmeVerifier.__new__(verify_readme.ReadmeVerifier)
+    steps = [{'name': 'b', 'dependsOn': ['a']}, {'name': 'a', 'dependsOn': []}]
+    assert verifier.topological_order(steps) == [1, 0]
+    with pytest.raises(ValueError):
+        verifier.topological_order([{'name': 'a', 'dependsOn': ['b']}, {'name': 'b', 'dependsOn': ['a']}])
+
+def test_config_budget_cancels_running_and_skips_unstarted_steps(verify_readme, project):
+    config = project / 'config.yml'
+    config.write_text('settings:\n  maxVerificationTime: 1000\n')
+    readme = write_readme(project / 'README.md', ('step: "fast"', 'true'), ('step: "slow"', 'sleep 5'),
+                          ('step: "never"', 'true'))
+    verifier = verify_readme.ReadmeVerifier(str(readme), str(config), use_cache=False)
+    verifier.verify()
+    results = statuses(verifier.results['steps'])
+    assert results['fast'][0] == 'success'
+    assert results['slow'] == ('skipped', 'Cancelled: verification time budget exhausted')
+    assert results['never'] == ('skipped', 'Skipped: verification time budget exhausted')
+    assert verifier.get_summary()['failed'] == 0
+
+def test_max_time_overrides_the_config_budget(verify_readme, project):
+    config = project / 'config.yml'
+    config.write_text('settings:\n  maxVerificationTime: 1\n')
+    readme = write_readme(project / 'README.md', ('step: "a"', 'sleep 0.2'))
+    verifier = verify_readme.ReadmeVerifier(str(readme), str(config), max_time=0, use_cache=False)
+    verifier.verify()
+    assert verifier.results['steps'][0]['status'] == 'success'
@@ -0,0 +1,84 @@
+import pytest
+
+from conftest import write_readme
+from shell_session import ShellSession, find_shell
+from step_output import StepOutput
+
+pytestmark = pytest.mark.skipif(find_shell() is None, reason='needs a POSIX shell')
+
+@pytest.fixture
+def session(project):
+    session = ShellSession(find_shell(), cwd=str(project))
+    yield session
+    session.close()
+
+def run(session, code, **settings):
+    step = dict({'name': 'step', 'code': code}, **settings)
+    capture = StepOutput()
+    returncode, duration = session.run(step, capture, timeout=10)
+    return returncode, capture.text('stdout'), capture.text('stderr')
+
+def test_output_is_split_per_step(session):
+    assert run(session, 'printf "no newline"') == (0, 'no newline', '')
+    assert run(session, 'echo out; echo err >&2; (exit 3)', required=False) == (3, 'out\n', 'err\n')
+    assert run(session, 'printf "a\\n\\n"') == (0, 'a\n\n', '')
+
+def test_environment_carries_over(session):
+    run(session, 'export GREETING=hi; cd sub 2>/dev/null || mkdir sub')
+    assert run(session, 'echo $GREETING') == (0, 'hi\n', '')
+
+def test_batched_steps(session):
+    steps = [{'name': f's{i}', 'code': f'echo {i}'} for i in range(3)]
+    captures = [StepOutput() for _ in steps]
+    session.submit(list(zip(steps, captures)))
+    for i, (step, capture) in enumerate(zip(steps, captures)):
+        assert session.run(step, capture, timeout=10)[0] == 0
+        assert capture.text('stdout') == f'{i}\n'
+
+def verify(verify_readme, project, *steps, **execution):
+    config = project / 'config.yml'
+    settings = ''.join(f'  {key}: {value}\n' for key, value in execution.items())
+    config.write_text('execution:\n  preserveEnv: true\n' + settings)
+    readme = write_readme(project / 'README.md', *steps)
+    verifier = verify_readme.ReadmeVerifier(readme, str(config))
+    verifier.verify()
+    return {result['name']: result for result in verifier.results['steps']}
+
+def test_step_exiting_the_shell_does_not_fail_the_rest_of_its_batch(verify_readme, project):
+    results = verify(verify_readme, project,
+                     ('step: "leaves"\nrequired: false', 'echo partial; exit 4'),
+                     ('step: "after"', 'echo after'),
+                     ('step: "required"', 'true'))
+    assert results['leaves']['status'] == 'warning' and results['leaves']['exitCode'] == 4
+    assert results['after']['status'] == 'success' and results['after']['output'] == 'after\n'
+    assert results['required']['status'] == 'success'
+
+def test_working_dir_does_not_leak_into_later_steps(verify_readme, project):
+    (project / 'sub').mkdir()
+    results = verify(verify_readme, project,
+                     ('step: "in-sub"\nworkingDir: "sub"', 'pwd'),
+                     ('step: "at-root"\nworkingDir: "."', 'pwd'),
+                     ('step: "moves"', 'cd sub'),
+                     ('step: "follows-cd"', 'pwd'))
+    assert results['in-sub']['output'].strip().endswith('/sub')
+    assert not results['at-root']['output'].strip().endswith('/sub')
+    # A plain `cd` still carries over, as preserveEnv promises
+    assert results['follows-cd']['output'].strip().endswith('/sub')
+
+def test_steps_after_a_required_failure_in_a_batch_are_skipped(session):
+    from shell_session import StepSkipped
+    steps = [{'name': 'fails', 'code': 'false'}, {'name': 'next', 'code': 'echo never'}]
+    captures = [StepOutput() for _ in steps]
+    session.submit(list(zip(steps, captures)))
+    assert session.run(steps[0], captures[0], timeout=10)[0] == 1
+    with pytest.raises(StepSkipped):
+        session.run(steps[1], captures[1], timeout=10)
+    assert captures[1].text('stdout') == ''
+
+def test_windows_keeps_per_step_shells_unless_a_shell_is_named(verify_readme, project, monkeypatch):
+    verifier = verify_readme.ReadmeVerifier(write_readme(project / 'README.md', ('step: "a"', 'true')))
+    verifier.config['execution'] = {'preserveEnv': True}
+    monkeypatch.setattr(verify_readme, 'IS_WINDOWS', True)
+    assert verifier.create_session() is None
+    verifier.config['execution']['shell'] = 'sh'
+    assert verifier.create_session() is not None
@@ -0,0 +1,68 @@
+import json
+import subprocess
+
+import pytest
+
+from conftest import write_readme
+
+STEPS = [
+    ('step: "one"', 'echo one'),
+    ('step: "two"', 'echo two'),
+    ('step: "three"\ninputs: ["src/*.txt"]', 'echo three'),
+]
+
+def git(project, *args):
+    subprocess.run(['git', *args], cwd=project, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(project):
+    git(project, 'init', '-q')
+    git(project, '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty', '-m', 'root')
+    (project / 'src').mkdir()
+    (project / 'src' / 'a.txt').write_text('a')
+    write_readme(project / 'README.md', *STEPS)
+    git(project, 'add', '-A')
+    git(project, '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '-m', 'readme')
+    return project
+
+def previous(project, statuses):
+    path = project / 'previous.json'
+    path.write_text(json.dumps({'steps': [{'name': name, 'status': status, 'duration': 1}
+                                          for name, status in statuses.items()]}))
+    return str(path)
+
+def select(verify_readme, project, statuses):
+    verifier = verify_readme.ReadmeVerifier(str(project / 'README.md'), since='HEAD',
+                                            previous_results=previous(project, statuses))
+    steps = verifier.parse_readme()
+    selected, carried = verifier.select_changed_steps(steps, 'HEAD')
+    return [steps[i]['name'] for i in selected], sorted(steps[i]['name'] for i in carried)
+
+PASSED = {'one': 'success', 'two': 'success', 'three': 'success'}
+
+def test_nothing_changed_carries_everything(verify_readme, repo):
+    assert select(verify_readme, repo, PASSED) == ([], ['one', 'three', 'two'])
+
+def test_edited_step_lines_select_that_step(verify_readme, repo):
+    readme = repo / 'README.md'
+    readme.write_text(readme.read_text().replace('echo two', 'echo 2'))
+    assert select(verify_readme, repo, PASSED) == (['two'], ['one', 'three'])
+
+def test_changed_input_selects_its_step(verify_readme, repo):
+    (repo / 'src' / 'a.txt').write_text('b')
+    assert select(verify_readme, repo, PASSED)[0] == ['three']
+
+def test_failed_or_unknown_steps_run_again(verify_readme, repo):
+    statuses = {'one': 'failed', 'two': 'warning'}
+    assert select(verify_readme, repo, statuses) == (['one', 'two', 'three'], [])
+    statuses = dict(PASSED, two='skipped')
+    assert select(verify_readme, repo, statuses) == (['two'], ['one', 'three'])
+
+def test_hunks_map_to_new_line_numbers(verify_readme, repo):
+    readme = repo / 'README.md'
+    lines = readme.read_text().split('\n')
+    lines.insert(1, 'added line')
+    readme.write_text('\n'.join(lines))
+    verifier = verify_readme.ReadmeVerifier(str(readme))
+    paths, ranges = verifier.git_changes('HEAD')
+    assert 'README.md' in paths and ranges == [(2, 2)]
@@ -0,0 +1,137 @@
+import os
+import stat
+
+import pytest
+
+from conftest import write_readme
+from step_artifacts import ArtifactCache, ArtifactError, artifact_plan, check_paths, code_without_installs
+
+def shell_step(code, working_dir='.', **settings):
+    return dict({'name': 'install', 'code': code, 'language': 'bash', 'workingDir': working_dir}, **settings)
+
+@pytest.fixture
+def node_project(project):
+    (project / 'package.json').write_text('{}')
+    (project / 'package-lock.json').write_text('{"lockfileVersion": 3}')
+    return project
+
+@pytest.mark.parametrize('code, rest', [
+    ('npm ci', ''),
+    ('npm ci --silent\n# done', ''),
+    ('npm ci && npm test', 'npm test'),
+    ('npm install\nnpm run build', 'npm run build'),
+    ('npm run lint; npm ci; npm test', 'npm run lint; npm test'),
+    ('npm ci && test -f "tests pass"', None),
+    ('npm ci || exit 1', None),
+])
+def test_code_without_installs(code, rest):
+    assert code_without_installs(shell_step(code), ['node_modules']) == rest
+
+def test_venv_creation_counts_as_part_of_the_install():
+    step = shell_step('python3 -m venv .venv && .venv/bin/pip install -q -r requirements.txt')
+    assert code_without_installs(step, ['.venv']) == ''
+
+def test_chained_install_is_detected_but_not_install_only(node_project):
+    plan = artifact_plan(shell_step('npm ci && npm test'))
+    assert [path.name for path in plan['keyFiles']] == ['package-lock.json', 'package.json']
+    assert plan['paths'] == ['node_modules']
+    assert plan['rest'] == 'npm test'
+
+def test_install_with_packages_is_not_an_install_step(node_project):
+    assert artifact_plan(shell_step('npm install left-pad')) is None
+
+def test_pip_needs_a_venv(project):
+    (project / 'requirements.txt').write_text('requests\n')
+    assert artifact_plan(shell_step('pip install -r requirements.txt')) is None
+    plan = artifact_plan(shell_step('.venv/bin/pip install -r requirements.txt'))
+    assert plan['paths'] == ['.venv']
+
+def test_cache_key_files_and_default_paths(project):
+    (project / 'poetry.lock').write_text('')
+    plan = artifact_plan(shell_step('make deps', cacheKeyFiles=['*.lock']))
+    assert plan['paths'] == ['.venv'] and plan['rest'] is None
+
+def test_cache_paths_must_stay_inside_the_working_directory():
+    check_paths(['node_modules', 'web/node_modules'])
+    for path in ['/abs', '../up', '']:
+        with pytest.raises(ValueError):
+            check_paths([path])
+
+def test_venv_key_includes_python_version(node_project, monkeypatch):
+    import platform
+    (node_project / 'requirements.txt').write_text('')
+    cache = ArtifactCache(node_project / 'cache')
+    step = shell_step('.venv/bin/pip install -r requirements.txt')
+    plan = artifact_plan(step)
+    key = cache.key_for(step, plan)
+    monkeypatch.setattr(platform, 'python_version', lambda: '3.0.0')
+    assert cache.key_for(step, plan) != key
+
+def test_round_trip_and_integrity_check(node_project):
+    modules = node_project / 'node_modules'
+    (modules / '.bin').mkdir(parents=True)
+    (modules / 'pkg.js').write_text('module.exports = 1')
+    os.symlink('../pkg.js', modules / '.bin' / 'pkg')
+    cache = ArtifactCache(node_project / 'cache')
+    entry = cache.put('k', str(node_project), ['node_modules'])
+    assert entry['paths'] == ['node_modules']
+
+    (modules / 'pkg.js').write_text('changed')
+    cache.restore('k', cache.get('k'), str(node_project))
+    assert (modules / 'pkg.js').read_text() == 'module.exports = 1'
+    assert os.readlink(modules / '.bin' / 'pkg') == '../pkg.js'
+
+    with open(cache.archive_path('k'), 'ab') as f:
+        f.write(b'x')
+    with pytest.raises(ArtifactError):
+        cache.restore('k', cache.get('k'), str(node_project))
+    assert cache.get('k') is None
+
+def test_eviction_keeps_the_cache_under_its_cap(node_project):
+    (node_project / 'node_modules').mkdir()
+    (node_project / 'node_modules' / 'blob').write_bytes(os.urandom(64 * 1024))
+    cache = ArtifactCache(node_project / 'cache', max_size_mb=0.1)
+    cache.put('old', str(node_project), ['node_modules'])
+    cache.put('new', str(node_project), ['node_modules'])
+    assert cache.get('old') is None and cache.get('new') is not None
+
+@pytest.fixture
+def fake_npm(project, monkeypatch):
+    bin_dir = project / 'bin'
+    bin_dir.mkdir()
+    npm = bin_dir / 'npm'
+    npm.write_text('#!/bin/sh\necho "$@" >> npm-calls\nmkdir -p node_modules\necho 1 > node_modules/pkg.js\n')
+    npm.chmod(npm.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ["PATH"]}')
+    (project / 'package.json').write_text('{}')
+    (project / 'package-lock.json').write_text('{}')
+    return project
+
+def run_verifier(verify_readme, readme):
+    verifier = verify_readme.ReadmeVerifier(readme)
+    try:
+        verifier.verify()
+    except Exception:
+        pass
+    return verifier.results['steps']
+
+def test_restored_install_still_runs_the_rest_of_the_step(verify_readme, fake_npm):
+    readme = write_readme(fake_npm / 'README.md', ('step: "install-and-test"\nrequired: false', 'npm ci && test -f tests-pass'))
+    (fake_npm / 'tests-pass').write_text('')
+    first = run_verifier(verify_readme, readme)
+    assert first[0]['status'] == 'success' and not first[0]['artifacts']['restored']
+
+    (fake_npm / 'tests-pass').unlink()
+    second = run_verifier(verify_readme, readme)
+    assert second[0]['artifacts']['restored']
+    assert second[0]['status'] == 'warning'
+    assert (fake_npm / 'npm-calls').read_text().count('ci') == 1
+
+def test_install_only_step_is_skipped_on_a_hit(verify_readme, fake_npm):
+    readme = write_readme(fake_npm / 'README.md', ('step: "install"', 'npm ci'))
+    run_verifier(verify_readme, readme)
+    (fake_npm / 'node_modules' / 'pkg.js').unlink()
+    second = run_verifier(verify_readme, readme)
+    assert second[0]['cached'] and second[0]['status'] == 'success'
+    assert (fake_npm / 'node_modules' / 'pkg.js').exists()
+    assert (fake_npm / 'npm-calls').read_text().count('ci') == 1
@@ -0,0 +1,89 @@
+import os
+
+from step_cache import FileHasher, StepCache
+
+def step(code='cat data.txt', **settings):
+    return dict({'name': 'read', 'code': code, 'language': 'bash', 'inputs': ['*.txt']}, **settings)
+
+def test_only_steps_with_inputs_are_cacheable():
+    assert StepCache.is_cacheable(step())
+    assert not StepCache.is_cacheable(step(inputs=[]))
+    assert not StepCache.is_cacheable(step(background=True))
+
+def test_key_follows_code_inputs_and_referenced_env(project, monkeypatch):
+    (project / 'data.txt').write_text('one')
+    cache = StepCache(project / 'cache')
+    key = cache.key_for(step())
+    assert cache.key_for(step()) == key
+    assert cache.key_for(step('cat data.txt ')) != key
+
+    (project / 'data.txt').write_text('two')
+    changed = cache.key_for(step())
+    assert changed != key
+    (project / 'other.md').write_text('not an input')
+    assert cache.key_for(step()) == changed
+
+    monkeypatch.setenv('GREETING', 'hi')
+    with_env = cache.key_for(step('echo $GREETING'))
+    monkeypatch.setenv('GREETING', 'hello')
+    assert cache.key_for(step('echo $GREETING')) != with_env
+    monkeypatch.setenv('UNRELATED', 'x')
+    assert cache.key_for(step()) == changed
+
+def test_put_get_and_persist(project):
+    cache = StepCache(project / 'cache')
+    assert cache.get('k') is None
+    cache.put('k', {'status': 'success', 'stdout': 'ok'})
+    assert cache.get('k')['stdout'] == 'ok'
+    cache.save()
+    assert StepCache(project / 'cache').get('k')['status'] == 'success'
+
+def test_evicts_least_recently_used(project):
+    cache = StepCache(project / 'cache', max_size_mb=2500 / (1024 * 1024))
+    payload = 'x' * 1000
+    cache.put('a', {'stdout': payload})
+    cache.put('b', {'stdout': payload})
+    cache.index['a']['lastUsed'] += 10
+    cache.put('c', {'stdout': payload})
+    assert cache.get('b') is None
+    assert cache.get('a') and cache.get('c')
+    assert not (project / 'cache' / 'entries' / 'b.json').exists()
+
+def test_file_hasher_reuses_unchanged_hashes(project):
+    path = project / 'data.txt'
+    path.write_text('one')
+    hasher = FileHasher(project / 'hashes.json')
+    first = hasher.hash_file(path)
+    hasher.save()
+
+    reloaded = FileHasher(project / 'hashes.json')
+    assert reloaded.hash_file(path) == first and not reloaded.dirty
+    path.write_text('two!')
+    os.utime(path, ns=(1, 1))
+    assert reloaded.hash_file(path) != first
+
+def test_key_uses_the_environment_the_step_runs_with(project):
+    (project / 'data.txt').write_text('one')
+    cache = StepCache(project / 'cache')
+    plain = cache.key_for(step())
+    assert cache.key_for(step(), dict(os.environ)) == plain
+    proxied = cache.key_for(step(), dict(os.environ, PIP_INDEX_URL='http://127.0.0.1:1/pypi/'))
+    assert proxied != plain
+    assert cache.key_for(step(), dict(os.environ, PIP_INDEX_URL='http://127.0.0.1:2/pypi/')) != proxied
+
+def test_verifier_keys_follow_the_proxy_mode_not_its_port(verify_readme, project):
+    readme = project / 'README.md'
+    readme.write_text('# T\n')
+    verifier = verify_readme.ReadmeVerifier(str(readme))
+    verifier.config['proxy'] = {'enabled': True, 'path': str(project / 'packages')}
+    cache = StepCache(project / 'cache')
+    keys = []
+    for offline in (False, False, True):
+        verifier.config['security'] = {'allowNetwork': not offline}
+        verifier.start_proxy()
+        try:
+            keys.append(cache.key_for(step(), verifier.cache_env()))
+        finally:
+            verifier.stop_proxy()
+    assert keys[0] == keys[1] != keys[2]
+    assert cache.key_for(step(), verifier.cache_env()) not in keys
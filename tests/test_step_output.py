@@ -0,0 +1,49 @@
+from step_output import OutputMatcher, StepOutput, compile_pattern, log_file_name
+
+def test_compile_pattern():
+    assert compile_pattern('a.b (x)').search('got a.b (x)!')
+    assert not compile_pattern('a.b').search('axb')
+    assert compile_pattern('/listening on \\d+/').search('listening on 8080')
+    assert compile_pattern('/ERROR/i').search('error: boom')
+    assert not compile_pattern('/ERROR/').search('error: boom')
+
+def test_matcher_needs_every_expect_pattern():
+    calls = []
+    matcher = OutputMatcher(['ready', '/port \\d+/'], on_verdict=lambda: calls.append(1))
+    matcher.feed('stdout', b'starting\nrea')
+    matcher.feed('stdout', b'dy\n')
+    assert matcher.verdict is None
+    matcher.feed('stderr', b'on port 80')
+    assert matcher.verdict == 'expected' and matcher.event.is_set() and calls == [1]
+    assert matcher.line == 'on port 80'
+
+def test_matcher_streams_are_matched_separately():
+    matcher = OutputMatcher(['hello world'])
+    matcher.feed('stdout', b'hello ')
+    matcher.feed('stderr', b'world\n')
+    assert matcher.verdict is None
+
+def test_expect_not_wins_and_handles_split_utf8():
+    matcher = OutputMatcher(['done'], ['Traceback', 'ü'])
+    matcher.feed('stdout', 'x \u00fc'.encode('utf-8')[:-1])
+    assert matcher.verdict is None
+    matcher.feed('stdout', 'x \u00fc'.encode('utf-8')[-1:] + b' done\n')
+    assert matcher.verdict == 'unexpected' and matcher.pattern == 'ü'
+    matcher.feed('stdout', b'done\n')
+    assert matcher.verdict == 'unexpected'
+
+def test_log_file_name():
+    assert log_file_name('Run the tests / unit') == 'Run-the-tests-unit.log'
+    assert log_file_name('!!!') == 'step.log'
+
+def test_output_keeps_a_bounded_tail_and_full_log(tmp_path):
+    capture = StepOutput(tmp_path / 'logs' / 'step.log', limit_kb=1)
+    capture.open('stdout')
+    for i in range(300):
+        capture.write('stdout', f'line {i}\n'.encode())
+    capture.close()
+    text = capture.text('stdout')
+    assert text.startswith('[... ') and 'full log:' in text and text.endswith('line 299\n')
+    assert len(text.split('\n', 1)[1]) == 1024
+    assert (tmp_path / 'logs' / 'step.log').read_text().count('\n') == 300
+    assert capture.last_line == 'line 299' and capture.total_bytes == sum(len(f'line {i}\n') for i in range(300))
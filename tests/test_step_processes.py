@@ -0,0 +1,48 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import write_readme
+from step_processes import group_alive, spawn_options, terminate_group
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='POSIX process groups')
+
+def running(pid):
+    """Whether pid is a live process (a zombie left for init to reap doesn't count)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def spawn(script):
+    return subprocess.Popen(['sh', '-c', script], **spawn_options())
+
+def test_terminate_group_stops_backgrounded_children():
+    process = spawn('sleep 30 & sleep 30 & wait')
+    time.sleep(0.2)
+    cleanup = terminate_group(process.pid, grace=2)
+    process.wait(timeout=5)
+    assert cleanup['signal'] == 'SIGTERM'
+    assert not group_alive(process.pid)
+
+def test_terminate_group_escalates_to_sigkill():
+    process = spawn("trap '' TERM; sleep 30 & trap '' TERM; wait; sleep 30")
+    time.sleep(0.2)
+    cleanup = terminate_group(process.pid, grace=0.3)
+    process.wait(timeout=5)
+    assert cleanup['signal'] == 'SIGKILL'
+    assert not group_alive(process.pid)
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='reads /proc')
+def test_timed_out_step_leaves_nothing_behind(verify_readme, project):
+    readme = write_readme(project / 'README.md',
+                          ('step: "hang"\ntimeout: 1\nrequired: false', 'sleep 30 &\necho $! > child.pid\nwait'))
+    verifier = verify_readme.ReadmeVerifier(readme)
+    verifier.verify()
+    result = verifier.results['steps'][0]
+    assert result['status'] == 'warning' and result['cleanup']['signal'] in ('SIGTERM', 'SIGKILL')
+    child = int((project / 'child.pid').read_text())
+    assert not running(child)
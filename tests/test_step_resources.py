@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from conftest import write_readme
+from step_resources import HAS_WAIT4, cpu_ms, max_rss, top_consumers, wait_with_usage
+
+needs_wait4 = pytest.mark.skipif(not HAS_WAIT4, reason='needs os.wait4')
+
+BURN = 'import time\nend = time.process_time() + 0.3\nwhile time.process_time() < end: pass'
+
+@needs_wait4
+def test_wait_with_usage_reports_the_cpu_of_waited_descendants():
+    # The shell waits for python, so python's CPU time is included
+    process = subprocess.Popen(['sh', '-c', f'{sys.executable} -c "{BURN}"; exit 3'])
+    returncode, rusage = wait_with_usage(process, timeout=30)
+    assert returncode == 3 and process.returncode == 3
+    assert rusage.ru_utime + rusage.ru_stime >= 0.25
+
+def test_wait_with_usage_times_out_and_can_be_interrupted():
+    process = subprocess.Popen(['sleep', '30'])
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            wait_with_usage(process, timeout=0.1)
+        interrupt = threading.Event()
+        threading.Timer(0.1, interrupt.set).start()
+        with pytest.raises(subprocess.TimeoutExpired):
+            wait_with_usage(process, timeout=30, interrupt=interrupt)
+    finally:
+        process.kill()
+        process.wait()
+
+def test_top_consumers_skips_reused_and_idle_results():
+    def result(name, cpu, **flags):
+        return dict({'name': name, 'resources': {'cpuUserMs': cpu, 'cpuSystemMs': 0, 'maxRssKB': 1}}, **flags)
+    results = [result('a', 5), result('b', 50), result('cached', 500, cached=True),
+               result('carried', 500, carriedOver=True), result('idle', 0), result('c', 20),
+               result('d', 10), {'name': 'windows'}]
+    assert [r['name'] for r in top_consumers(results, cpu_ms)] == ['b', 'c', 'd']
+    assert len(top_consumers(results, max_rss, count=10)) == 5
+
+@needs_wait4
+def test_step_results_carry_resources(verify_readme, project):
+    readme = write_readme(project / 'README.md', ('step: "burn"', f"{sys.executable} -c '{BURN}'"))
+    verifier = verify_readme.ReadmeVerifier(readme, use_cache=False)
+    verifier.config.setdefault('execution', {})['preserveEnv'] = False
+    verifier.verify()
+    resources = verifier.results['steps'][0]['resources']
+    assert cpu_ms(resources) >= 250 and resources['maxRssKB'] > 1000
+    assert 0 < resources['cpuPercent'] <= 100 * 64
@@ -0,0 +1,92 @@
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import step_services
+from conftest import write_readme
+from step_output import OutputMatcher, StepOutput
+from step_processes import spawn_options
+from step_services import BackgroundService, parse_probes, port_open
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_service(code, ready, tmp_path):
+    step = {'name': 'svc', 'code': code, 'workingDir': str(tmp_path), 'ready': parse_probes(ready)}
+    process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               **spawn_options())
+    capture = StepOutput()
+    if 'log' in step['ready']:
+        capture.matcher = OutputMatcher([step['ready']['log']])
+    capture.attach(process.stdout, 'stdout')
+    capture.attach(process.stderr, 'stderr')
+    return BackgroundService(step, process, capture, {})
+
+def test_parse_probes():
+    assert parse_probes(8080) == {'port': 8080}
+    assert parse_probes({'port': 80, 'http': 'health'})['http'] == '/health'
+    for bad in [{'http': '/'}, {'nope': 1}, 'soon', {'port': 'x'}]:
+        with pytest.raises(ValueError):
+            parse_probes(bad)
+
+def test_log_and_port_probes_back_off_after_the_log_line(tmp_path, monkeypatch):
+    port = free_port()
+    calls = []
+
+    def counting_port_open(host, port):
+        calls.append(port)
+        return False
+    monkeypatch.setattr(step_services, 'port_open', counting_port_open)
+
+    service = start_service('import time; print("ready", flush=True); time.sleep(30)',
+                            {'log': 'ready', 'port': port}, tmp_path)
+    try:
+        error = service.wait_ready(1.5)
+    finally:
+        service.stop(grace=1)
+    assert error.startswith('Not ready after 1.5s') and f'port {port}' in error
+    # Backing off from 50 ms, not spinning on the already-set log event
+    assert len(calls) < 20
+
+def test_ready_once_log_and_port_pass(tmp_path):
+    port = free_port()
+    code = ('import socket, time; s = socket.socket(); s.bind(("127.0.0.1", %d)); s.listen(); '
+            'print("listening", flush=True); time.sleep(30)' % port)
+    service = start_service(code, {'log': 'listening', 'port': port}, tmp_path)
+    try:
+        assert service.wait_ready(10) is None
+    finally:
+        how, _ = service.stop(grace=1)
+    assert how == 'terminated'
+
+def test_closed_port_is_not_open():
+    assert not port_open('127.0.0.1', free_port())
+
+def test_service_grace_comes_from_config(verify_readme, project):
+    readme = write_readme(project / 'README.md', ('step: "a"', 'true'))
+    verifier = verify_readme.ReadmeVerifier(readme)
+    assert (verifier.kill_grace, verifier.service_kill_grace) == (2, 5)
+    config = project / 'config.yml'
+    config.write_text('execution:\n  killGrace: 1\n  serviceKillGrace: 0.5\n')
+    verifier = verify_readme.ReadmeVerifier(readme, str(config))
+    assert (verifier.kill_grace, verifier.service_kill_grace) == (1, 0.5)
+
+def test_service_ignoring_sigterm_is_killed_after_its_grace(verify_readme, project):
+    config = project / 'config.yml'
+    config.write_text('execution:\n  serviceKillGrace: 0.3\n')
+    readme = write_readme(project / 'README.md',
+                          ('step: "svc"\nbackground: true\nready:\n  file: "up"',
+                           "trap '' TERM; touch up; while true; do sleep 0.1; done"),
+                          ('step: "use"', 'test -f up'))
+    verifier = verify_readme.ReadmeVerifier(readme, str(config))
+    start = time.monotonic()
+    verifier.verify()
+    service = verifier.results['steps'][0]
+    assert service['background']['stopped'] == 'killed'
+    assert service['cleanup']['signal'] == 'SIGKILL'
+    assert time.monotonic() - start < 4
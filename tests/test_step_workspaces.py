@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from conftest import write_readme
+from step_workspaces import changed_files, clone_tree, snapshot
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / 'src'
+    (source / '.git').mkdir(parents=True)
+    (source / '.git' / 'HEAD').write_text('ref')
+    (source / 'pkg').mkdir()
+    (source / 'pkg' / 'module.py').write_text('x = 1\n')
+    (source / 'link').symlink_to('pkg')
+    return source
+
+@pytest.mark.parametrize('strategy', ['auto', 'copy', 'hardlink'])
+def test_clone_tree(tree, tmp_path, strategy):
+    clone = tmp_path / 'clone'
+    used = clone_tree(tree, clone, strategy, exclude=['.git'])
+    assert used in (('reflink', 'copy') if strategy == 'auto' else (strategy,))
+    assert (clone / 'pkg' / 'module.py').read_text() == 'x = 1\n'
+    assert not (clone / '.git').exists()
+    assert os.path.islink(clone / 'link')
+    shared = os.stat(clone / 'pkg' / 'module.py').st_ino == os.stat(tree / 'pkg' / 'module.py').st_ino
+    assert shared == (strategy == 'hardlink')
+
+def test_changed_files_compares_with_the_clone_snapshot(tree):
+    before = snapshot(tree)
+    (tree / 'pkg' / 'new.txt').write_text('new')
+    (tree / 'pkg' / 'module.py').write_text('x = 22\n')
+    assert sorted(changed_files(tree, before)) == [os.path.join('pkg', 'module.py'), os.path.join('pkg', 'new.txt')]
+
+def isolated_config(project, merge=True):
+    path = project / 'config.yml'
+    path.write_text('execution:\n  sequential: false\n  preserveEnv: false\n'
+                    f'  isolation:\n    enabled: true\n    strategy: copy\n    merge: {str(merge).lower()}\n')
+    return str(path)
+
+def test_parallel_groups_run_in_separate_clones(verify_readme, project):
+    (project / 'shared.txt').write_text('original\n')
+    readme = write_readme(
+        project / 'README.md',
+        ('step: "first"', 'echo first > shared.txt && echo a > a.txt'),
+        ('step: "check first"\ndependsOn: ["first"]', 'grep -qx first shared.txt && test -f a.txt'),
+        ('step: "second"', 'test ! -f a.txt && echo b > b.txt && pwd > where.txt'),
+    )
+    verifier = verify_readme.ReadmeVerifier(readme, isolated_config(project), jobs=2, use_cache=False)
+    verifier.verify()
+    assert [step['status'] for step in verifier.results['steps']] == ['success'] * 3
+    assert (project / 'a.txt').exists() and (project / 'b.txt').exists()
+    assert (project / 'shared.txt').read_text() == 'first\n'
+    # Steps ran in a clone, not the project directory
+    assert (project / 'where.txt').read_text().strip() != str(project)
+
+def test_failed_groups_and_merge_off_are_discarded(verify_readme, project):
+    readme = write_readme(
+        project / 'README.md',
+        ('step: "broken"\nrequired: false', 'echo x > broken.txt && false'),
+        ('step: "fine"', 'echo y > fine.txt'),
+    )
+    verifier = verify_readme.ReadmeVerifier(readme, isolated_config(project), jobs=2, use_cache=False)
+    verifier.verify()
+    assert not (project / 'broken.txt').exists() and (project / 'fine.txt').exists()
+
+    (project / 'fine.txt').unlink()
+    verifier = verify_readme.ReadmeVerifier(readme, isolated_config(project, merge=False), jobs=2, use_cache=False)
+    verifier.verify()
+    assert not (project / 'fine.txt').exists()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS, write_readme
+
+TEMPLATES = SCRIPTS.parent / 'templates'
+PYTHON_TEMPLATES = ['minimal', 'python']
+
+@pytest.mark.parametrize('template', PYTHON_TEMPLATES)
+def test_vendored_tokenizer_matches_the_scripts_copy(template):
+    # Fix scripts/readme_markdown.py, then copy it over the templates' copies
+    vendored = TEMPLATES / template / 'readme_markdown.py'
+    assert vendored.read_bytes() == (SCRIPTS / 'readme_markdown.py').read_bytes()
+
+@pytest.mark.parametrize('template', PYTHON_TEMPLATES)
+def test_template_runs_standalone_and_rewrites_badges_only_on_change(template, project):
+    for name in ('verify-readme.py', 'readme_markdown.py'):
+        (project / name).write_bytes((TEMPLATES / template / name).read_bytes())
+    readme = project / 'README.md'
+    write_readme(readme, ('step: "ok"', 'echo ok'), ('step: "fenced"', 'true'))
+    readme.write_text(readme.read_text() + '\n```\n<!-- VERIFICATION-BADGES -->\n```\n')
+
+    def run():
+        return subprocess.run([sys.executable, 'verify-readme.py', 'README.md'], cwd=project,
+                              capture_output=True, text=True, timeout=60)
+    first = run()
+    assert first.returncode == 0, first.stdout + first.stderr
+    text = readme.read_text()
+    assert text.count('<!-- VERIFICATION-BADGES -->') == 2
+    assert text.index('<!-- VERIFICATION-BADGES -->') < text.index('```')
+
+    os.utime(readme, ns=(1, 1))
+    second = run()
+    assert second.returncode == 0 and 'already up to date' in second.stdout
+    assert os.stat(readme).st_mtime_ns == 1
@@ -0,0 +1,52 @@
+import json
+import threading
+
+from conftest import write_readme
+from trace_events import Tracer
+
+def spans(tracer, category=None):
+    return [e for e in tracer.events if e['ph'] == 'X' and (category is None or e['cat'] == category)]
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span('work'):
+        pass
+    assert tracer.events == []
+
+def test_threads_get_their_own_named_tracks(tmp_path):
+    tracer = Tracer()
+    with tracer.span('outer', size=3):
+        with tracer.span('inner'):
+            pass
+    def in_thread():
+        with tracer.span('elsewhere'):
+            pass
+    worker = threading.Thread(target=in_thread)
+    worker.start()
+    worker.join()
+
+    names = {e['tid']: e['args']['name'] for e in tracer.events if e['ph'] == 'M'}
+    by_name = {e['name']: e for e in spans(tracer)}
+    assert names[by_name['outer']['tid']] == 'main'
+    assert names[by_name['elsewhere']['tid']] == 'worker 1'
+    outer, inner = by_name['outer'], by_name['inner']
+    assert outer['args'] == {'size': 3}
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'] + 0.2
+
+    path = tmp_path / 'trace' / 'run.json'
+    tracer.export(path)
+    exported = json.loads(path.read_text())
+    assert exported['displayTimeUnit'] == 'ms'
+    timed = [e['ts'] for e in exported['traceEvents'] if e['ph'] == 'X']
+    assert timed == sorted(timed) and len(timed) == 3
+
+def test_verification_run_is_traced(verify_readme, project):
+    readme = write_readme(project / 'README.md', ('step: "a"', 'echo a'), ('step: "b"', 'echo b'))
+    tracer = Tracer()
+    verifier = verify_readme.ReadmeVerifier(readme, tracer=tracer, use_cache=False)
+    verifier.verify()
+    steps = [e['name'] for e in spans(tracer, 'step')]
+    assert steps == ['a', 'b']
+    processes = {e['name'] for e in spans(tracer, 'process')}
+    assert {'spawn', 'execute', 'drain output'} <= processes
+    assert 'parse README' in {e['name'] for e in spans(tracer, 'verifier')}
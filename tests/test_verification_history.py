@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+
+from conftest import SCRIPTS
+from verification_history import HistoryStore, detect_slowdown
+
+def results(timestamp, os_name='Linux', duration=100, status='success'):
+    return {'timestamp': timestamp, 'readme': 'README.md',
+            'environment': {'os': os_name, 'arch': 'x86_64'},
+            'steps': [{'name': 'build', 'status': status, 'duration': duration, 'exitCode': 0}]}
+
+def test_record_is_idempotent_and_limited_per_os(tmp_path):
+    store = HistoryStore(tmp_path / 'h.sqlite', limit=2)
+    assert store.record(results('t1')) is not None
+    assert store.record(results('t1')) is None
+    store.record(results('t2'))
+    store.record(results('t3'))
+    store.record(results('t1', os_name='macOS'))
+    summary = {(row['os'], row['name']): row for row in store.step_summary()}
+    assert summary[('Linux', 'build')]['runs'] == 2
+    assert summary[('macOS', 'build')]['runs'] == 1
+    store.close()
+
+def test_from_config(tmp_path):
+    assert HistoryStore.from_config({}) is None
+    config = {'storage': {'keepHistory': True, 'historyPath': str(tmp_path / 'hist'), 'historyLimit': 5}}
+    store = HistoryStore.from_config(config)
+    assert store.path == tmp_path / 'hist' / 'history.sqlite' and store.limit == 5
+    store.close()
+    store = HistoryStore.from_config(config, limit=7)
+    assert store.limit == 7
+    store.close()
+
+def test_slowdown_needs_a_real_regression():
+    baseline = [1000, 1020, 980, 1010, 990, 1000]
+    assert detect_slowdown(3000, baseline)['slow']
+    assert not detect_slowdown(1030, baseline)['slow']
+
+def run_cli(cwd, *args):
+    return subprocess.run([sys.executable, str(SCRIPTS / 'verification_history.py'), *args],
+                          cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+def test_cli_follows_config(tmp_path):
+    (tmp_path / 'results.json').write_text(json.dumps(results('t1')))
+    config = tmp_path / 'config.yml'
+    config.write_text('storage:\n  keepHistory: true\n  historyPath: "custom/"\n  historyLimit: 3\n')
+    run_cli(tmp_path, '--config', str(config), 'record', 'results.json')
+    assert (tmp_path / 'custom' / 'history.sqlite').exists()
+
+    config.write_text('storage:\n  keepHistory: false\n')
+    assert 'History is off' in run_cli(tmp_path, '--config', str(config), 'record', 'results.json')
+    run_cli(tmp_path, '--config', str(config), '--db', 'explicit.sqlite', 'record', 'results.json')
+    assert (tmp_path / 'explicit.sqlite').exists()